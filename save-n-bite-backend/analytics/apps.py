@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AnalyticsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'analytics'
+
+    def ready(self):
+        import analytics.rankings  # Monthly ranking updates on order completion
+        import analytics.rollups  # Daily rollup updates on order and follow events
@@ -0,0 +1,172 @@
+# analytics/exports.py
+
+import os
+import shutil
+from collections import namedtuple
+from itertools import islice
+
+import pandas as pd
+from django.conf import settings
+
+from food_listings.models import FoodListing
+from interactions.models import Interaction, InteractionItem, Order
+from reviews.models import Review
+
+EXPORT_CHUNK_SIZE = 5000
+
+# columns: (column name, ORM path, kind); rows are partitioned by the month of partition_by
+Dataset = namedtuple('Dataset', ['model', 'partition_by', 'columns'])
+
+DATASETS = {
+    'orders': Dataset(Order, 'created_at', [
+        ('id', 'id', 'str'),
+        ('interaction_id', 'interaction_id', 'str'),
+        ('business_id', 'interaction__business_id', 'str'),
+        ('user_id', 'interaction__user_id', 'str'),
+        ('status', 'status', 'str'),
+        ('interaction_type', 'interaction__interaction_type', 'str'),
+        ('quantity', 'interaction__quantity', 'int'),
+        ('total_amount', 'interaction__total_amount', 'float'),
+        ('created_at', 'created_at', 'datetime'),
+    ]),
+    'interactions': Dataset(Interaction, 'created_at', [
+        ('id', 'id', 'str'),
+        ('business_id', 'business_id', 'str'),
+        ('user_id', 'user_id', 'str'),
+        ('interaction_type', 'interaction_type', 'str'),
+        ('status', 'status', 'str'),
+        ('quantity', 'quantity', 'int'),
+        ('total_amount', 'total_amount', 'float'),
+        ('created_at', 'created_at', 'datetime'),
+        ('completed_at', 'completed_at', 'datetime'),
+    ]),
+    'interaction_items': Dataset(InteractionItem, 'interaction__created_at', [
+        ('id', 'id', 'str'),
+        ('interaction_id', 'interaction_id', 'str'),
+        ('food_listing_id', 'food_listing_id', 'str'),
+        ('quantity', 'quantity', 'int'),
+        ('price_per_item', 'price_per_item', 'float'),
+        ('total_price', 'total_price', 'float'),
+        ('created_at', 'interaction__created_at', 'datetime'),
+    ]),
+    'food_listings': Dataset(FoodListing, 'created_at', [
+        ('id', 'id', 'str'),
+        ('provider_id', 'provider_id', 'str'),
+        ('food_type', 'food_type', 'str'),
+        ('status', 'status', 'str'),
+        ('original_price', 'original_price', 'float'),
+        ('discounted_price', 'discounted_price', 'float'),
+        ('quantity', 'quantity', 'int'),
+        ('quantity_available', 'quantity_available', 'int'),
+        ('expiry_date', 'expiry_date', 'date'),
+        ('created_at', 'created_at', 'datetime'),
+    ]),
+    'reviews': Dataset(Review, 'created_at', [
+        ('id', 'id', 'str'),
+        ('business_id', 'business_id', 'str'),
+        ('reviewer_id', 'reviewer_id', 'str'),
+        ('general_rating', 'general_rating', 'int'),
+        ('status', 'status', 'str'),
+        ('interaction_type', 'interaction_type', 'str'),
+        ('created_at', 'created_at', 'datetime'),
+    ]),
+}
+
+
+def export_root():
+    return settings.ANALYTICS_EXPORT_DIR
+
+
+def month_dirs(dataset, root=None):
+    """Partition directories of an exported dataset as {'YYYY-MM': path}, oldest first"""
+    dataset_dir = os.path.join(root or export_root(), dataset)
+    if not os.path.isdir(dataset_dir):
+        return {}
+    return {
+        name.split('=', 1)[1]: os.path.join(dataset_dir, name)
+        for name in sorted(os.listdir(dataset_dir))
+        if name.startswith('month=')
+    }
+
+
+def _typed_frame(rows, columns):
+    frame = pd.DataFrame.from_records(rows, columns=[name for name, _, _ in columns])
+    for name, _, kind in columns:
+        if kind == 'str':
+            frame[name] = frame[name].astype('string')
+        elif kind == 'int':
+            frame[name] = frame[name].astype('Int64')
+        elif kind == 'float':
+            frame[name] = frame[name].astype('float64')
+        elif kind == 'datetime':
+            frame[name] = pd.to_datetime(frame[name], utc=True)
+        elif kind == 'date':
+            frame[name] = pd.to_datetime(frame[name])
+    return frame
+
+
+def export_dataset(name, root=None, since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stream a dataset out of the database in chunks into Parquet files under
+    <root>/<name>/month=YYYY-MM/. Every month written is replaced, so a full
+    export (since=None) rewrites the dataset and an export with ``since``
+    refreshes the month containing it and later ones. Returns the number of
+    rows written.
+    """
+    dataset = DATASETS[name]
+    dataset_dir = os.path.join(root or export_root(), name)
+    partition_column = next(column for column, path, _ in dataset.columns if path == dataset.partition_by)
+
+    queryset = dataset.model.objects.order_by(dataset.partition_by)
+    if since:
+        # Whole months only, a partially exported month would replace a complete one
+        since = since.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        queryset = queryset.filter(**{f'{dataset.partition_by}__gte': since})
+    elif os.path.isdir(dataset_dir):
+        shutil.rmtree(dataset_dir)
+
+    rows = queryset.values_list(*[path for _, path, _ in dataset.columns]).iterator(chunk_size=chunk_size)
+    replaced_months = set()
+    total = 0
+    part = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        frame = _typed_frame(chunk, dataset.columns)
+        months = frame[partition_column].dt.strftime('%Y-%m')
+        for month, month_frame in frame.groupby(months, sort=False):
+            month_dir = os.path.join(dataset_dir, f'month={month}')
+            if month not in replaced_months:
+                shutil.rmtree(month_dir, ignore_errors=True)
+                os.makedirs(month_dir)
+                replaced_months.add(month)
+            month_frame.to_parquet(os.path.join(month_dir, f'part-{part:05d}.parquet'), index=False)
+        total += len(frame)
+        part += 1
+
+    return total
+
+
+def export_datasets(names=None, root=None, since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Export the named datasets (default: all), returning rows written per dataset"""
+    return {
+        name: export_dataset(name, root=root, since=since, chunk_size=chunk_size)
+        for name in names or DATASETS
+    }
+
+
+def load_dataset(name, root=None, since=None):
+    """
+    Read an exported dataset into a DataFrame, optionally only the months
+    from ``since`` ('YYYY-MM') on. A dataset that was never exported loads
+    as an empty frame with the dataset's columns.
+    """
+    frames = [
+        pd.read_parquet(path)
+        for month, path in month_dirs(name, root).items()
+        if since is None or month >= since
+    ]
+    if not frames:
+        return _typed_frame([], DATASETS[name].columns)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,250 @@
+# analytics/forecasting.py
+
+import math
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from food_listings.models import FoodListing
+from interactions.models import InteractionItem
+
+from .models import DemandForecast
+
+HISTORY_DAYS = 90
+HOLDOUT_DAYS = 14
+
+# Candidate smoothing factors, every series picks the one with the lowest in-sample error
+ALPHAS = np.linspace(0.1, 0.9, 9)
+
+# Providers with fewer listings of a food type in the history get the category model
+MIN_PROVIDER_LISTINGS = 5
+
+# Discounts are suggested from listings that sold at least this share of their quantity
+SELL_THROUGH_TARGET = 0.8
+
+FOOD_TYPES = [food_type for food_type, _ in FoodListing.FOOD_TYPE_CHOICES]
+
+
+def smooth(series, alphas=ALPHAS, holdout=HOLDOUT_DAYS):
+    """
+    Simple exponential smoothing of many daily series at once.
+
+    ``series`` is a (series, days) array. Every series is smoothed with every
+    alpha in one pass over the days; each picks the alpha with the lowest
+    one-day-ahead absolute error before the last ``holdout`` days, which are
+    then used to measure accuracy. Returns (alpha, level, holdout MAE,
+    baseline MAE) arrays, where level is the forecast for the next day after
+    all the data and the baseline forecasts the mean of the training days.
+    """
+    series = np.asarray(series, dtype='float64')
+    count, days = series.shape
+    fit_days = days - holdout
+
+    level = np.repeat(series[:, :min(7, fit_days)].mean(axis=1)[:, None], len(alphas), axis=1)
+    fit_error = np.zeros_like(level)
+    holdout_error = np.zeros_like(level)
+    for day in range(days):
+        error = series[:, day, None] - level
+        if day < fit_days:
+            fit_error += np.abs(error)
+        else:
+            holdout_error += np.abs(error)
+        level += alphas * error
+
+    best = fit_error.argmin(axis=1)
+    rows = np.arange(count)
+    baseline = np.abs(series[:, fit_days:] - series[:, :fit_days].mean(axis=1, keepdims=True)).mean(axis=1)
+    return alphas[best], level[rows, best], holdout_error[rows, best] / holdout, baseline
+
+
+def _daily_sales(start):
+    """Units sold through completed interactions per provider, food type and day"""
+    rows = InteractionItem.objects.filter(
+        interaction__status='completed',
+        interaction__created_at__gte=start
+    ).annotate(
+        day=TruncDate('interaction__created_at')
+    ).values(
+        'day',
+        provider_id=F('food_listing__provider_id'),
+        food_type=F('food_listing__food_type'),
+    ).annotate(units=Sum('quantity'))
+    return pd.DataFrame.from_records(list(rows), columns=['day', 'provider_id', 'food_type', 'units'])
+
+
+def _listings(start):
+    """Listings created since ``start`` with their sell-through and discount"""
+    rows = FoodListing.objects.filter(created_at__gte=start).annotate(
+        day=TruncDate('created_at')
+    ).values_list(
+        'provider_id', 'food_type', 'day', 'quantity', 'quantity_available', 'original_price', 'discounted_price'
+    )
+    frame = pd.DataFrame.from_records(
+        list(rows),
+        columns=['provider_id', 'food_type', 'day', 'quantity', 'quantity_available', 'original_price', 'discounted_price']
+    )
+    quantity = frame['quantity'].to_numpy(dtype='float64')
+    available = frame['quantity_available'].to_numpy(dtype='float64')
+    original = frame['original_price'].to_numpy(dtype='float64')
+    discounted = frame['discounted_price'].to_numpy(dtype='float64')
+    frame['sell_through'] = np.divide(quantity - available, quantity, out=np.zeros(len(frame)), where=quantity > 0)
+    frame['discount_percent'] = np.divide(
+        original - discounted, original, out=np.full(len(frame), np.nan), where=original > 0
+    ) * 100
+    return frame
+
+
+def _listing_profile(listings, keys):
+    """Listings per active day and the median discount of well-selling listings per group"""
+    grouped = listings.groupby(keys)
+    profile = pd.DataFrame({
+        'listings': grouped.size(),
+        'listings_per_day': grouped.size() / grouped['day'].nunique(),
+    })
+    selling = listings[listings['sell_through'] >= SELL_THROUGH_TARGET]
+    profile['discount_percent'] = selling.groupby(keys)['discount_percent'].median()
+    return profile
+
+
+def _series_matrix(sales, keys, index, days):
+    """Daily units sold as a (len(index), len(days)) array, zero on days without sales"""
+    if sales.empty:
+        return np.zeros((len(index), len(days)))
+    matrix = sales.pivot_table(index=keys, columns='day', values='units', aggfunc='sum', fill_value=0)
+    return matrix.reindex(index=index, columns=days, fill_value=0).to_numpy(dtype='float64')
+
+
+def _forecast_rows(profile, series, provider_ids, food_types, sample_days, holdout):
+    alphas, levels, maes, baselines = smooth(series, holdout=holdout)
+    rows = []
+    for i, (provider_id, food_type) in enumerate(zip(provider_ids, food_types)):
+        listings_per_day = float(profile['listings_per_day'].iloc[i])
+        discount = profile['discount_percent'].iloc[i]
+        rows.append(DemandForecast(
+            provider_id=provider_id,
+            food_type=food_type,
+            alpha=float(alphas[i]),
+            daily_demand=float(levels[i]),
+            listings_per_day=listings_per_day,
+            suggested_quantity=max(1, math.ceil(levels[i] / listings_per_day)),
+            suggested_discount_percent=None if pd.isna(discount) else round(float(discount), 1),
+            mae=float(maes[i]),
+            baseline_mae=float(baselines[i]),
+            sample_days=sample_days,
+        ))
+    return rows
+
+
+def train_forecasts(history_days=HISTORY_DAYS, holdout=HOLDOUT_DAYS):
+    """
+    Fit demand models from the last ``history_days`` days of listings and
+    sales: one per provider and food type with at least MIN_PROVIDER_LISTINGS
+    listings, and one per food type across all providers. Replaces every
+    stored forecast and returns a summary of the fit.
+    """
+    if not 0 < holdout < history_days:
+        raise ValueError("holdout must be between 1 and history_days - 1 days")
+
+    today = timezone.now().date()
+    start = timezone.now() - timedelta(days=history_days)
+    days = [today - timedelta(days=offset) for offset in range(history_days - 1, -1, -1)]
+
+    sales = _daily_sales(start)
+    listings = _listings(start)
+    forecasts = []
+
+    if not listings.empty:
+        provider_profile = _listing_profile(listings, ['provider_id', 'food_type'])
+        provider_profile = provider_profile[provider_profile['listings'] >= MIN_PROVIDER_LISTINGS]
+        if not provider_profile.empty:
+            forecasts += _forecast_rows(
+                provider_profile,
+                _series_matrix(sales, ['provider_id', 'food_type'], provider_profile.index, days),
+                provider_profile.index.get_level_values('provider_id'),
+                provider_profile.index.get_level_values('food_type'),
+                history_days,
+                holdout,
+            )
+
+        category_profile = _listing_profile(listings, ['food_type'])
+        forecasts += _forecast_rows(
+            category_profile,
+            _series_matrix(sales, ['food_type'], category_profile.index, days),
+            [None] * len(category_profile),
+            category_profile.index,
+            history_days,
+            holdout,
+        )
+
+    with transaction.atomic():
+        DemandForecast.objects.all().delete()
+        DemandForecast.objects.bulk_create(forecasts)
+
+    return {
+        'provider_models': sum(1 for forecast in forecasts if forecast.provider_id is not None),
+        'category_models': sum(1 for forecast in forecasts if forecast.provider_id is None),
+        'mean_mae': round(float(np.mean([f.mae for f in forecasts])), 3) if forecasts else None,
+        'mean_baseline_mae': round(float(np.mean([f.baseline_mae for f in forecasts])), 3) if forecasts else None,
+    }
+
+
+def get_suggestions(provider, food_types=FOOD_TYPES):
+    """
+    Suggested quantity and discount per food type for a provider's next
+    listing, from the provider's own model or else the category model.
+    One indexed lookup; food types without any model map to None.
+    """
+    forecasts = DemandForecast.objects.filter(
+        Q(provider=provider) | Q(provider__isnull=True),
+        food_type__in=list(food_types)
+    ).order_by(F('provider').asc(nulls_first=True))
+
+    suggestions = dict.fromkeys(food_types)
+    # Provider rows come last and win over the category rows
+    for forecast in forecasts:
+        suggestions[forecast.food_type] = {
+            'suggestedQuantity': forecast.suggested_quantity,
+            'suggestedDiscountPercent': forecast.suggested_discount_percent,
+            'basedOn': 'provider' if forecast.provider_id else 'category',
+            'trainedAt': forecast.trained_at.isoformat(),
+        }
+    return suggestions
+
+
+def benchmark(provider=None, iterations=1000):
+    """
+    Accuracy of the stored forecasts against the training-mean baseline and
+    the serving latency of get_suggestions over ``iterations`` calls.
+    """
+    accuracy = {}
+    for level, forecasts in (
+        ('provider', DemandForecast.objects.filter(provider__isnull=False)),
+        ('category', DemandForecast.objects.filter(provider__isnull=True)),
+    ):
+        figures = list(forecasts.values_list('mae', 'baseline_mae'))
+        accuracy[level] = {
+            'models': len(figures),
+            'mean_mae': round(float(np.mean([mae for mae, _ in figures])), 3) if figures else None,
+            'mean_baseline_mae': round(float(np.mean([baseline for _, baseline in figures])), 3) if figures else None,
+        }
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        get_suggestions(provider)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return {
+        'accuracy': accuracy,
+        'latency_ms': {
+            'p50': round(float(np.percentile(timings, 50)), 3),
+            'p95': round(float(np.percentile(timings, 95)), 3),
+            'max': round(float(np.max(timings)), 3),
+        } if timings else None,
+    }
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from analytics.rollups import backfill_business_rollups
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily per-business analytics rollups from orders and follows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=str,
+            help='First day to rebuild as YYYY-MM-DD (defaults to all history)'
+        )
+        parser.add_argument(
+            '--until',
+            type=str,
+            help='Day to stop before as YYYY-MM-DD (defaults to tomorrow)'
+        )
+
+    def _parse_day(self, value, option):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+        except ValueError:
+            raise CommandError(f'{option} must be in YYYY-MM-DD format')
+
+    def handle(self, *args, **options):
+        since = self._parse_day(options['since'], '--since')
+        until = self._parse_day(options['until'], '--until')
+
+        result = backfill_business_rollups(since, until)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {result['days_written']} business-day rollup rows")
+        )
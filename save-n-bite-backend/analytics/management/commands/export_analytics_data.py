@@ -0,0 +1,63 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from analytics.exports import DATASETS, EXPORT_CHUNK_SIZE, export_datasets
+from analytics.offline import run_offline_analysis
+
+class Command(BaseCommand):
+    help = 'Export analytics datasets to monthly Parquet partitions and optionally run the offline reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--datasets',
+            type=str,
+            help=f"Comma-separated datasets to export (default: all of {', '.join(DATASETS)})"
+        )
+        parser.add_argument(
+            '--since',
+            type=str,
+            help='Only re-export months from YYYY-MM on (default: full export)'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Export directory (default: settings.ANALYTICS_EXPORT_DIR)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help='Rows fetched from the database per chunk'
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Run the offline reports over the exported files afterwards'
+        )
+
+    def handle(self, *args, **options):
+        names = None
+        if options['datasets']:
+            names = [name.strip() for name in options['datasets'].split(',') if name.strip()]
+            unknown = set(names) - set(DATASETS)
+            if unknown:
+                raise CommandError(f"Unknown datasets: {', '.join(sorted(unknown))}")
+
+        since = None
+        if options['since']:
+            try:
+                since = timezone.make_aware(datetime.strptime(options['since'], '%Y-%m'))
+            except ValueError:
+                raise CommandError('--since must be in YYYY-MM format')
+
+        counts = export_datasets(names, root=options['output'], since=since, chunk_size=options['chunk_size'])
+        for name, count in counts.items():
+            self.stdout.write(f'{name}: {count} rows')
+
+        if options['analyze']:
+            reports = run_offline_analysis(root=options['output'])
+            for name, report in reports.items():
+                self.stdout.write(f'{name}: {len(report)} rows')
+
+        self.stdout.write(self.style.SUCCESS('Analytics export completed'))
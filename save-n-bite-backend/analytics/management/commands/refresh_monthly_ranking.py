@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from analytics.rankings import refresh_monthly_ranking
+
+class Command(BaseCommand):
+    help = 'Rebuild the monthly business ranking used for the top saver badge percentile'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--month',
+            type=str,
+            help='Month to rebuild as YYYY-MM (defaults to the current month)'
+        )
+
+    def handle(self, *args, **options):
+        month = None
+        if options['month']:
+            try:
+                month = datetime.strptime(options['month'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('--month must be in YYYY-MM format')
+
+        result = refresh_monthly_ranking(month)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Ranked {result['businesses_ranked']} businesses for {result['month']:%Y-%m}"
+            )
+        )
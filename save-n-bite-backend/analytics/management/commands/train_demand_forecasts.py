@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from analytics.forecasting import HISTORY_DAYS, HOLDOUT_DAYS, benchmark, train_forecasts
+
+class Command(BaseCommand):
+    help = 'Retrain the per-provider and per-category demand forecasts used to suggest listing quantities'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=HISTORY_DAYS,
+            help='Days of history to train on'
+        )
+        parser.add_argument(
+            '--holdout',
+            type=int,
+            default=HOLDOUT_DAYS,
+            help='Most recent days held out to measure accuracy'
+        )
+        parser.add_argument(
+            '--benchmark',
+            action='store_true',
+            help='Report accuracy against the baseline and suggestion latency after training'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=1000,
+            help='Suggestion lookups timed by --benchmark'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            summary = train_forecasts(options['days'], options['holdout'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Trained {summary['provider_models']} provider and {summary['category_models']} category models "
+                f"(holdout MAE {summary['mean_mae']}, baseline {summary['mean_baseline_mae']})"
+            )
+        )
+
+        if options['benchmark']:
+            result = benchmark(iterations=options['iterations'])
+            for level, figures in result['accuracy'].items():
+                self.stdout.write(
+                    f"{level}: {figures['models']} models, MAE {figures['mean_mae']} "
+                    f"vs baseline {figures['mean_baseline_mae']} units/day"
+                )
+            latency = result['latency_ms']
+            if latency:
+                self.stdout.write(
+                    f"suggestion latency: p50 {latency['p50']} ms, p95 {latency['p95']} ms, max {latency['max']} ms"
+                )
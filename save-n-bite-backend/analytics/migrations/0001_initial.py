@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('authentication', '0007_business_tag_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusinessMonthlyRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('completed_orders', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rankings', to='authentication.foodproviderprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month', '-completed_orders'], name='ranking_month_orders_idx')],
+                'constraints': [models.UniqueConstraint(fields=('business', 'month'), name='unique_business_month_ranking')],
+            },
+        ),
+    ]
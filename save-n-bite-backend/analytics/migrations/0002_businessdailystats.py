@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('authentication', '0007_business_tag_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusinessDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('orders_created', models.PositiveIntegerField(default=0)),
+                ('completed_purchases', models.PositiveIntegerField(default=0)),
+                ('completed_donations', models.PositiveIntegerField(default=0)),
+                ('cancelled_orders', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('followers_gained', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='authentication.foodproviderprofile')),
+            ],
+            options={
+                'ordering': ['business', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('business', 'date'), name='unique_business_daily_stats')],
+            },
+        ),
+    ]
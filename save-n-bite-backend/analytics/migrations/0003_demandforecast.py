@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_businessdailystats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('food_type', models.CharField(choices=[('ready_to_eat', 'Ready to Eat'), ('ingredients', 'Ingredients'), ('baked_goods', 'Baked Goods')], max_length=20)),
+                ('alpha', models.FloatField(help_text='Exponential smoothing factor')),
+                ('daily_demand', models.FloatField(help_text='Smoothed units sold per day')),
+                ('listings_per_day', models.FloatField()),
+                ('suggested_quantity', models.PositiveIntegerField()),
+                ('suggested_discount_percent', models.FloatField(blank=True, null=True)),
+                ('mae', models.FloatField(help_text='Mean absolute error of one-day-ahead forecasts over the holdout days')),
+                ('baseline_mae', models.FloatField(help_text='Mean absolute error of forecasting the training mean over the holdout days')),
+                ('sample_days', models.PositiveIntegerField()),
+                ('trained_at', models.DateTimeField(auto_now=True)),
+                ('provider', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='demand_forecasts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('provider', 'food_type'), name='unique_provider_demand_forecast'), models.UniqueConstraint(condition=models.Q(('provider__isnull', True)), fields=('food_type',), name='unique_category_demand_forecast')],
+            },
+        ),
+    ]
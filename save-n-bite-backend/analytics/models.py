@@ -1,3 +1,103 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+from authentication.models import FoodProviderProfile
+from food_listings.models import FoodListing
+
+
+class BusinessMonthlyRanking(models.Model):
+    """
+    Completed orders per business per month, used to rank businesses for the
+    top saver badge. Rows are rebuilt for a month with a single GROUP BY and
+    kept current as orders complete (see analytics.rankings); businesses
+    without completed orders in a month have no row.
+    """
+    business = models.ForeignKey(
+        FoodProviderProfile,
+        on_delete=models.CASCADE,
+        related_name='monthly_rankings'
+    )
+    month = models.DateField(help_text="First day of the month")
+    completed_orders = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['business', 'month'], name='unique_business_month_ranking'),
+        ]
+        indexes = [
+            models.Index(fields=['month', '-completed_orders'], name='ranking_month_orders_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.business_id} {self.month:%Y-%m}: {self.completed_orders}"
+
+
+class BusinessDailyStats(models.Model):
+    """
+    Per-business daily rollup of orders and follows, read by the analytics
+    dashboard instead of scanning orders. Kept current by order and follow
+    events (see analytics.rollups) and backfilled with the
+    backfill_business_rollups command.
+    """
+    business = models.ForeignKey(
+        FoodProviderProfile,
+        on_delete=models.CASCADE,
+        related_name='daily_stats'
+    )
+    date = models.DateField()
+    orders_created = models.PositiveIntegerField(default=0)
+    completed_purchases = models.PositiveIntegerField(default=0)
+    completed_donations = models.PositiveIntegerField(default=0)
+    cancelled_orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    followers_gained = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['business', 'date'], name='unique_business_daily_stats'),
+        ]
+        ordering = ['business', 'date']
+
+    def __str__(self):
+        return f"{self.business_id} {self.date}"
+
+
+class DemandForecast(models.Model):
+    """
+    Fitted demand model for a provider's listings of one food type, or for the
+    whole category when provider is null (the fallback for providers without
+    enough history). Written by train_demand_forecasts (see analytics.forecasting)
+    and read when a provider creates a listing.
+    """
+    provider = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='demand_forecasts'
+    )
+    food_type = models.CharField(max_length=20, choices=FoodListing.FOOD_TYPE_CHOICES)
+    alpha = models.FloatField(help_text="Exponential smoothing factor")
+    daily_demand = models.FloatField(help_text="Smoothed units sold per day")
+    listings_per_day = models.FloatField()
+    suggested_quantity = models.PositiveIntegerField()
+    suggested_discount_percent = models.FloatField(null=True, blank=True)
+    mae = models.FloatField(help_text="Mean absolute error of one-day-ahead forecasts over the holdout days")
+    baseline_mae = models.FloatField(help_text="Mean absolute error of forecasting the training mean over the holdout days")
+    sample_days = models.PositiveIntegerField()
+    trained_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'food_type'], name='unique_provider_demand_forecast'),
+            models.UniqueConstraint(
+                fields=['food_type'],
+                condition=models.Q(provider__isnull=True),
+                name='unique_category_demand_forecast'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.provider_id or 'all providers'} {self.food_type}: {self.suggested_quantity}"
@@ -0,0 +1,124 @@
+# analytics/offline.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from authentication.profile_summary import CO2_PER_MEAL_KG
+
+from .exports import export_root, load_dataset
+
+# Litres of water saved per rescued meal, as on the business dashboard
+WATER_PER_MEAL_LITRES = 500
+
+
+def _month_index(timestamps):
+    """Months since year 0 for a datetime Series, for vectorized month arithmetic"""
+    return timestamps.dt.year.to_numpy() * 12 + timestamps.dt.month.to_numpy() - 1
+
+
+def _month_label(index):
+    return f'{index // 12:04d}-{index % 12 + 1:02d}'
+
+
+def cohort_retention(orders):
+    """
+    Share of each monthly customer cohort (month of first completed order)
+    that completed an order again 0, 1, 2, ... months later. Rows are cohorts
+    ('YYYY-MM'), columns are month offsets; column 0 is always 1.0.
+    """
+    completed = orders.loc[orders['status'] == 'completed', ['user_id', 'created_at']]
+    if completed.empty:
+        return pd.DataFrame(dtype='float64')
+
+    month = pd.Series(_month_index(completed['created_at']), index=completed.index)
+    cohort = month.groupby(completed['user_id']).transform('min')
+    activity = pd.DataFrame({
+        'cohort': cohort,
+        'offset': month - cohort,
+        'user_id': completed['user_id'],
+    })
+
+    customers = activity.groupby(['cohort', 'offset'])['user_id'].nunique().unstack(fill_value=0)
+    retention = customers.div(customers[0], axis=0)
+    retention.index = [_month_label(index) for index in retention.index]
+    retention.index.name = 'cohort'
+    return retention
+
+
+def waste_saved_curve(interactions, freq='MS'):
+    """
+    Meals rescued by completed interactions per period (default monthly) with
+    running totals of meals, CO2 prevented and water saved.
+    """
+    completed = interactions.loc[interactions['status'] == 'completed', ['created_at', 'quantity']]
+    meals = completed.set_index('created_at')['quantity'].astype('int64').resample(freq).sum()
+
+    cumulative = meals.cumsum()
+    curve = pd.DataFrame({
+        'meals_saved': meals,
+        'cumulative_meals_saved': cumulative,
+        'cumulative_co2_prevented_kg': (cumulative * CO2_PER_MEAL_KG).round(1),
+        'cumulative_water_saved_litres': cumulative * WATER_PER_MEAL_LITRES,
+    })
+    curve.index.name = 'period'
+    return curve
+
+
+def provider_sell_through(food_listings, interaction_items, interactions):
+    """
+    Quantity listed and quantity sold through completed interactions per
+    provider, with the sell-through rate (sold / listed).
+    """
+    completed_ids = interactions.loc[interactions['status'] == 'completed', 'id']
+    sold_items = interaction_items.loc[
+        interaction_items['interaction_id'].isin(completed_ids),
+        ['food_listing_id', 'quantity']
+    ].merge(
+        food_listings[['id', 'provider_id']],
+        left_on='food_listing_id',
+        right_on='id'
+    )
+
+    listed = food_listings.groupby('provider_id')['quantity'].sum().astype('int64')
+    sold = sold_items.groupby('provider_id')['quantity'].sum().astype('int64')
+
+    frame = pd.DataFrame({'quantity_listed': listed, 'quantity_sold': sold}).fillna(0).astype('int64')
+    listed_values = frame['quantity_listed'].to_numpy()
+    frame['sell_through'] = np.divide(
+        frame['quantity_sold'].to_numpy(),
+        listed_values,
+        out=np.zeros(len(frame)),
+        where=listed_values > 0
+    ).round(4)
+    frame.index.name = 'provider_id'
+    return frame.sort_values('sell_through', ascending=False)
+
+
+def run_offline_analysis(root=None, since=None, output_dir=None):
+    """
+    Compute every offline report from the exported datasets (no database
+    access) and write each one to <output_dir>/<report>.csv, by default
+    <root>/reports. Returns the reports as DataFrames.
+    """
+    root = root or export_root()
+    orders = load_dataset('orders', root, since)
+    interactions = load_dataset('interactions', root, since)
+
+    reports = {
+        'cohort_retention': cohort_retention(orders),
+        'waste_saved_curve': waste_saved_curve(interactions),
+        'provider_sell_through': provider_sell_through(
+            load_dataset('food_listings', root, since),
+            load_dataset('interaction_items', root, since),
+            interactions,
+        ),
+    }
+
+    output_dir = output_dir or os.path.join(root, 'reports')
+    os.makedirs(output_dir, exist_ok=True)
+    for name, report in reports.items():
+        report.to_csv(os.path.join(output_dir, f'{name}.csv'))
+
+    return reports
@@ -0,0 +1,127 @@
+# analytics/rankings.py
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from authentication.models import FoodProviderProfile
+from interactions.models import Interaction, Order
+
+from .models import BusinessMonthlyRanking
+
+
+def month_of(value=None):
+    """First day of the month containing ``value`` (a datetime, default now)"""
+    value = value or timezone.now()
+    return value.date().replace(day=1)
+
+
+def _month_bounds(month):
+    start = timezone.now().replace(
+        year=month.year, month=month.month, day=1,
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    return start, start + relativedelta(months=1)
+
+
+def _completed_orders(month):
+    start, end = _month_bounds(month)
+    return Order.objects.filter(
+        status=Order.Status.COMPLETED,
+        created_at__gte=start,
+        created_at__lt=end
+    )
+
+
+def refresh_monthly_ranking(month=None):
+    """Rebuild a month's ranking rows from one GROUP BY over its completed orders"""
+    month = month or month_of()
+    counts = _completed_orders(month).values('interaction__business').annotate(
+        completed=Count('id')
+    )
+
+    rows = [
+        BusinessMonthlyRanking(business_id=entry['interaction__business'], month=month, completed_orders=entry['completed'])
+        for entry in counts if entry['interaction__business'] is not None
+    ]
+    with transaction.atomic():
+        BusinessMonthlyRanking.objects.filter(month=month).delete()
+        BusinessMonthlyRanking.objects.bulk_create(rows)
+
+    return {'month': month, 'businesses_ranked': len(rows)}
+
+
+def apply_ranking_delta(business_id, month, delta):
+    """
+    Move one business's completed orders for a month by ``delta`` with an F()
+    expression; rows that drop to zero are removed, as businesses without
+    completed orders have no row
+    """
+    if delta > 0:
+        BusinessMonthlyRanking.objects.get_or_create(business_id=business_id, month=month)
+    rows = BusinessMonthlyRanking.objects.filter(business_id=business_id, month=month)
+    rows.update(completed_orders=Greatest(F('completed_orders') + delta, Value(0)), updated_at=timezone.now())
+    if delta < 0:
+        rows.filter(completed_orders=0).delete()
+
+
+def top_percent(business_id, month=None):
+    """
+    Percentile of a business among all businesses by completed orders in a
+    month: its rank (1 = most orders, ties share the best rank) over the number
+    of businesses, times 100. Businesses without orders rank last.
+    """
+    month = month or month_of()
+    total = FoodProviderProfile.objects.count()
+    if not total:
+        return 100.0
+
+    completed = BusinessMonthlyRanking.objects.filter(
+        business_id=business_id, month=month
+    ).values_list('completed_orders', flat=True).first() or 0
+    ranked_above = BusinessMonthlyRanking.objects.filter(
+        month=month, completed_orders__gt=completed
+    ).count()
+
+    return round(((ranked_above + 1) / total) * 100, 2)
+
+
+def order_business_id(order):
+    """Business of an order, read without loading its interaction when not already cached"""
+    if Order.interaction.is_cached(order):
+        return order.interaction.business_id
+    return Interaction.objects.filter(pk=order.interaction_id).values_list('business_id', flat=True).first()
+
+
+def stored_order_status(order):
+    """Status an order was last loaded or saved with"""
+    if order.is_tracked:
+        return order.get_previous('status')
+    return order.status
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, **kwargs):
+    # Orders saved without being loaded carry no known transition, the periodic refresh corrects them
+    if not created and not instance.is_tracked:
+        return
+    was_completed = not created and instance.get_previous('status') == Order.Status.COMPLETED
+    is_completed = instance.status == Order.Status.COMPLETED
+    if was_completed == is_completed:
+        return
+    business_id = order_business_id(instance)
+    if business_id is not None:
+        apply_ranking_delta(business_id, month_of(instance.created_at), 1 if is_completed else -1)
+
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    if stored_order_status(instance) != Order.Status.COMPLETED:
+        return
+    business_id = order_business_id(instance)
+    if business_id is not None:
+        apply_ranking_delta(business_id, month_of(instance.created_at), -1)
@@ -0,0 +1,208 @@
+# analytics/rollups.py
+
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Greatest, TruncDate
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from interactions.models import Interaction, Order
+from notifications.models import BusinessFollower
+
+from .models import BusinessDailyStats
+from .rankings import stored_order_status
+
+COMPLETED = Q(status=Order.Status.COMPLETED)
+
+ORDER_AGGREGATES = {
+    'orders_created': Count('id'),
+    'completed_purchases': Count('id', filter=COMPLETED & Q(interaction__interaction_type='Purchase')),
+    'completed_donations': Count('id', filter=COMPLETED & Q(interaction__interaction_type='Donation')),
+    'cancelled_orders': Count('id', filter=Q(status=Order.Status.CANCELLED)),
+    'revenue': Sum('interaction__total_amount', filter=COMPLETED),
+}
+
+ROLLUP_FIELDS = list(ORDER_AGGREGATES) + ['followers_gained']
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _day_bounds(day):
+    # Days are UTC days, like the dashboard's month boundaries
+    start = datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def _day_of(value):
+    return value.astimezone(dt_timezone.utc).date()
+
+
+def apply_business_day_deltas(business_id, day, deltas, create=True):
+    """
+    Add ``deltas`` (rollup field -> change) to a business's row for a day
+    with F() expressions, never going below zero. With create=False an
+    existing row is updated but a missing one is not inserted, so handlers
+    running inside a cascading delete never add rows for a business being
+    deleted.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    if create:
+        BusinessDailyStats.objects.get_or_create(business_id=business_id, date=day)
+    BusinessDailyStats.objects.filter(business_id=business_id, date=day).update(
+        updated_at=timezone.now(),
+        **{
+            field: Greatest(F(field) + delta, Value(Decimal(0) if field == 'revenue' else 0))
+            for field, delta in deltas.items()
+        }
+    )
+
+
+def _status_bucket(status):
+    """Status-dependent rollup counter an order in ``status`` counts towards, if any"""
+    if status == Order.Status.COMPLETED:
+        return 'completed'
+    if status == Order.Status.CANCELLED:
+        return 'cancelled'
+    return None
+
+
+def _order_deltas(interaction, status, sign):
+    """Rollup changes of adding (sign 1) or removing (sign -1) an order in ``status`` to its day"""
+    bucket = _status_bucket(status)
+    interaction_type, amount = interaction
+    deltas = Counter()
+    if bucket == 'completed':
+        if interaction_type == Interaction.InteractionType.PURCHASE:
+            deltas['completed_purchases'] += sign
+        elif interaction_type == Interaction.InteractionType.DONATION:
+            deltas['completed_donations'] += sign
+        # Unsaved interactions may still hold the float they were created with
+        deltas['revenue'] += sign * Decimal(str(amount or 0))
+    elif bucket == 'cancelled':
+        deltas['cancelled_orders'] += sign
+    return deltas
+
+
+def _order_interaction(order):
+    """(business id, interaction type, total amount) of an order's interaction, or None"""
+    if Order.interaction.is_cached(order):
+        interaction = order.interaction
+        return interaction.business_id, interaction.interaction_type, interaction.total_amount
+    return Interaction.objects.filter(pk=order.interaction_id).values_list(
+        'business_id', 'interaction_type', 'total_amount'
+    ).first()
+
+
+def backfill_business_rollups(since=None, until=None):
+    """
+    Rebuild the rollup rows for [since, until) (default: all history up to
+    and including today) from one GROUP BY over orders and one over follows.
+    """
+    until = until or _day_of(timezone.now()) + timedelta(days=1)
+    orders = Order.objects.filter(created_at__lt=_day_bounds(until)[0])
+    follows = BusinessFollower.objects.filter(created_at__lt=_day_bounds(until)[0])
+    rows = BusinessDailyStats.objects.filter(date__lt=until)
+    if since:
+        orders = orders.filter(created_at__gte=_day_bounds(since)[0])
+        follows = follows.filter(created_at__gte=_day_bounds(since)[0])
+        rows = rows.filter(date__gte=since)
+
+    figures = {}
+    order_days = orders.annotate(day=TruncDate('created_at', tzinfo=dt_timezone.utc)).values(
+        'interaction__business', 'day'
+    ).annotate(**ORDER_AGGREGATES)
+    for entry in order_days:
+        key = (entry.pop('interaction__business'), entry.pop('day'))
+        entry['revenue'] = entry['revenue'] or 0
+        figures[key] = entry
+
+    follow_days = follows.annotate(day=TruncDate('created_at', tzinfo=dt_timezone.utc)).values(
+        'business', 'day'
+    ).annotate(followers_gained=Count('id'))
+    for entry in follow_days:
+        figures.setdefault((entry['business'], entry['day']), {})['followers_gained'] = entry['followers_gained']
+
+    with transaction.atomic():
+        rows.delete()
+        BusinessDailyStats.objects.bulk_create(
+            [
+                BusinessDailyStats(business_id=business_id, date=day, **values)
+                for (business_id, day), values in figures.items()
+                if business_id is not None
+            ],
+            batch_size=BACKFILL_BATCH_SIZE
+        )
+
+    return {'days_written': len(figures)}
+
+
+def range_totals(business_id, since=None, until=None):
+    """Rollup figures for a business summed over the days in [since, until)"""
+    rows = BusinessDailyStats.objects.filter(business_id=business_id)
+    if since:
+        rows = rows.filter(date__gte=since)
+    if until:
+        rows = rows.filter(date__lt=until)
+    totals = rows.aggregate(**{field: Sum(field) for field in ROLLUP_FIELDS})
+    return {field: value or 0 for field, value in totals.items()}
+
+
+def monthly_totals(business_id, since):
+    """Rollup figures for a business per month from ``since``, keyed by the first day of the month"""
+    months = defaultdict(Counter)
+    rows = BusinessDailyStats.objects.filter(business_id=business_id, date__gte=since).values('date', *ROLLUP_FIELDS)
+    for row in rows:
+        months[row.pop('date').replace(day=1)].update(row)
+    return months
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, **kwargs):
+    # Orders saved without being loaded carry no known transition, the backfill corrects them
+    if not created and not instance.is_tracked:
+        return
+    previous_status = None if created else instance.get_previous('status')
+    if not created and _status_bucket(previous_status) == _status_bucket(instance.status):
+        return
+
+    row = _order_interaction(instance)
+    if row is None or row[0] is None:
+        return
+    business_id, interaction = row[0], row[1:]
+    deltas = _order_deltas(interaction, instance.status, 1)
+    if created:
+        deltas['orders_created'] += 1
+    else:
+        deltas.update(_order_deltas(interaction, previous_status, -1))
+    apply_business_day_deltas(business_id, _day_of(instance.created_at), deltas)
+
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    row = _order_interaction(instance)
+    if row is None or row[0] is None:
+        return
+    business_id, interaction = row[0], row[1:]
+    deltas = _order_deltas(interaction, stored_order_status(instance), -1)
+    deltas['orders_created'] -= 1
+    apply_business_day_deltas(business_id, _day_of(instance.created_at), deltas, create=False)
+
+
+@receiver(post_save, sender=BusinessFollower)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        apply_business_day_deltas(instance.business_id, _day_of(instance.created_at), {'followers_gained': 1})
+
+
+@receiver(post_delete, sender=BusinessFollower)
+def follow_deleted(sender, instance, **kwargs):
+    apply_business_day_deltas(
+        instance.business_id, _day_of(instance.created_at), {'followers_gained': -1}, create=False
+    )
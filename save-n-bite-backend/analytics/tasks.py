@@ -0,0 +1,23 @@
+from celery import shared_task
+from dateutil.relativedelta import relativedelta
+from django.utils import timezone
+from . import exports, forecasting, offline, rankings
+
+@shared_task
+def refresh_monthly_ranking():
+    """Rebuild this month's business ranking from the orders table (run hourly or so)"""
+    result = rankings.refresh_monthly_ranking()
+    return {'month': result['month'].isoformat(), 'businesses_ranked': result['businesses_ranked']}
+
+@shared_task
+def export_analytics_data():
+    """Re-export the current and previous month to Parquet and rebuild the offline reports (run nightly)"""
+    since = timezone.now().replace(day=1) - relativedelta(months=1)
+    counts = exports.export_datasets(since=since)
+    offline.run_offline_analysis()
+    return counts
+
+@shared_task
+def train_demand_forecasts():
+    """Refit the listing demand forecasts (run weekly)"""
+    return forecasting.train_forecasts()
@@ -1,14 +1,25 @@
-from django.test import TestCase, TransactionTestCase
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
 from django.utils import timezone
 from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
 from dateutil.relativedelta import relativedelta
 from rest_framework.test import APIClient
 from rest_framework import status
 
 from authentication.models import User, FoodProviderProfile
-from interactions.models import Interaction, Order
+from food_listings.models import FoodListing
+from interactions.models import Interaction, InteractionItem, Order
 from notifications.models import BusinessFollower
 from analytics.views import BusinessAnalyticsView
+from analytics.models import BusinessDailyStats, BusinessMonthlyRanking, DemandForecast
+from analytics import exports, forecasting, offline, rankings, rollups
 from .serializers import AnalyticsResponseSerializer, MonthlyCountSerializer
 
 class BusinessAnalyticsViewTests(TransactionTestCase):
@@ -537,6 +548,400 @@ class BusinessAnalyticsViewTests(TransactionTestCase):
 
         # Add this to your tests.py
 
+class MonthlyRankingTests(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username='rankcus', email='rankcustomer@test.com', password='testpass123', user_type='customer'
+        )
+        self.businesses = []
+        for i in range(4):
+            user = User.objects.create_user(
+                username=f'rankbus{i}', email=f'rankbusiness{i}@test.com',
+                password='testpass123', user_type='food_provider'
+            )
+            self.businesses.append(FoodProviderProfile.objects.create(user=user, business_name=f"Rank Business {i}"))
+
+    def create_orders(self, business, count, status='completed'):
+        orders = []
+        for i in range(count):
+            interaction = Interaction.objects.create(
+                business=business,
+                user=self.customer,
+                total_amount=10.00,
+                interaction_type='Purchase',
+                status=status,
+                quantity=1
+            )
+            orders.append(Order.objects.create(
+                interaction=interaction,
+                status=status,
+                pickup_window='10am-12pm',
+                pickup_code=f'R{business.id}{i}'[:20]
+            ))
+        return orders
+
+    def test_completed_orders_update_ranking(self):
+        """Completing and deleting orders keeps the business's row current"""
+        self.create_orders(self.businesses[0], 2)
+        self.create_orders(self.businesses[1], 1, status='pending')
+
+        ranking = BusinessMonthlyRanking.objects.get(business=self.businesses[0], month=rankings.month_of())
+        self.assertEqual(ranking.completed_orders, 2)
+        self.assertFalse(BusinessMonthlyRanking.objects.filter(business=self.businesses[1]).exists())
+
+        Order.objects.filter(interaction__business=self.businesses[0]).first().delete()
+        ranking.refresh_from_db()
+        self.assertEqual(ranking.completed_orders, 1)
+
+    def test_completion_moves_ranking_without_recounting(self):
+        """Orders completing after creation increment the row instead of recounting the month"""
+        order = Order.objects.get(pk=self.create_orders(self.businesses[0], 1, status='pending')[0].pk)
+        order.status = 'completed'
+
+        with patch('analytics.rankings._completed_orders', side_effect=AssertionError('recounted')):
+            order.save()
+            order.save()
+
+        ranking = BusinessMonthlyRanking.objects.get(business=self.businesses[0], month=rankings.month_of())
+        self.assertEqual(ranking.completed_orders, 1)
+
+        order.delete()
+        self.assertFalse(BusinessMonthlyRanking.objects.filter(business=self.businesses[0]).exists())
+
+    def test_top_percent(self):
+        """Rank over all businesses, ties share the best rank and businesses without orders rank last"""
+        self.create_orders(self.businesses[0], 3)
+        self.create_orders(self.businesses[1], 1)
+        self.create_orders(self.businesses[2], 1)
+
+        with self.assertNumQueries(3):
+            self.assertEqual(rankings.top_percent(self.businesses[0].id), 25.0)
+        self.assertEqual(rankings.top_percent(self.businesses[1].id), 50.0)
+        self.assertEqual(rankings.top_percent(self.businesses[2].id), 50.0)
+        self.assertEqual(rankings.top_percent(self.businesses[3].id), 100.0)
+
+    def test_refresh_rebuilds_month_with_one_group_by(self):
+        """The periodic refresh corrects drift from updates that bypass signals"""
+        self.create_orders(self.businesses[0], 2)
+        self.create_orders(self.businesses[1], 1)
+        Order.objects.filter(interaction__business=self.businesses[1]).update(status='cancelled')
+        BusinessMonthlyRanking.objects.filter(business=self.businesses[0]).update(completed_orders=9)
+
+        result = rankings.refresh_monthly_ranking()
+
+        self.assertEqual(result['businesses_ranked'], 1)
+        self.assertEqual(
+            list(BusinessMonthlyRanking.objects.values_list('business_id', 'completed_orders')),
+            [(self.businesses[0].id, 2)]
+        )
+
+    def test_analytics_view_uses_ranking(self):
+        """The dashboard's rank lookup does not grow with the number of businesses"""
+        self.create_orders(self.businesses[1], 2)
+        client = APIClient()
+        client.force_authenticate(user=self.businesses[1].user)
+
+        response = client.get('/api/business/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['top_saver_badge_percent'], 25.0)
+
+
+class BusinessRollupTests(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username='rollcus', email='rollcustomer@test.com', password='testpass123', user_type='customer'
+        )
+        self.business_user = User.objects.create_user(
+            username='rollbus', email='rollbusiness@test.com', password='testpass123', user_type='food_provider'
+        )
+        self.business = FoodProviderProfile.objects.create(user=self.business_user, business_name="Rollup Business")
+        self.today = timezone.now().date()
+
+    def create_order(self, interaction_type='Purchase', status='completed', amount=10.00, code='ROLL'):
+        interaction = Interaction.objects.create(
+            business=self.business,
+            user=self.customer,
+            total_amount=amount,
+            interaction_type=interaction_type,
+            status=status,
+            quantity=1
+        )
+        return Order.objects.create(
+            interaction=interaction,
+            status=status,
+            pickup_window='10am-12pm',
+            pickup_code=code
+        )
+
+    def test_events_keep_daily_rollup_current(self):
+        """Order and follow events move the business's row for the day"""
+        self.create_order(amount=20.00, code='ROLL1')
+        self.create_order(interaction_type='Donation', amount=0, code='ROLL2')
+        order = self.create_order(status='pending', code='ROLL3')
+        BusinessFollower.objects.create(business=self.business, user=self.customer)
+
+        row = BusinessDailyStats.objects.get(business=self.business, date=self.today)
+        self.assertEqual(row.orders_created, 3)
+        self.assertEqual(row.completed_purchases, 1)
+        self.assertEqual(row.completed_donations, 1)
+        self.assertEqual(row.revenue, Decimal('20.00'))
+        self.assertEqual(row.followers_gained, 1)
+
+        order.status = 'cancelled'
+        order.save()
+        BusinessFollower.objects.filter(business=self.business).delete()
+
+        row.refresh_from_db()
+        self.assertEqual(row.cancelled_orders, 1)
+        self.assertEqual(row.followers_gained, 0)
+
+    def test_events_apply_deltas_without_recounting(self):
+        """Status changes move only their counters and deleted orders are taken back out"""
+        completed = self.create_order(amount=20.00, code='ROLL1')
+        pending = Order.objects.get(pk=self.create_order(status='pending', code='ROLL2').pk)
+        row = BusinessDailyStats.objects.get(business=self.business, date=self.today)
+        updated_at = row.updated_at
+
+        # Moves between statuses without a counter of their own leave the row alone
+        pending.status = 'confirmed'
+        pending.save()
+        row.refresh_from_db()
+        self.assertEqual(row.updated_at, updated_at)
+
+        Order.objects.get(pk=completed.pk).delete()
+        row.refresh_from_db()
+        self.assertEqual(row.orders_created, 1)
+        self.assertEqual(row.completed_purchases, 0)
+        self.assertEqual(row.revenue, Decimal('0.00'))
+
+    def test_backfill_rebuilds_rollups(self):
+        """The backfill corrects drift from updates that bypass signals"""
+        self.create_order(code='ROLL1')
+        self.create_order(code='ROLL2')
+        Order.objects.filter(pickup_code='ROLL2').update(status='cancelled')
+        BusinessDailyStats.objects.all().delete()
+
+        result = rollups.backfill_business_rollups()
+
+        self.assertEqual(result['days_written'], 1)
+        self.assertEqual(rollups.range_totals(self.business.id), {
+            'orders_created': 2,
+            'completed_purchases': 1,
+            'completed_donations': 0,
+            'cancelled_orders': 1,
+            'revenue': Decimal('10.00'),
+            'followers_gained': 0,
+        })
+        self.assertEqual(rollups.range_totals(self.business.id, since=self.today + timedelta(days=1))['orders_created'], 0)
+
+    def test_analytics_view_reads_rollups(self):
+        """The dashboard's query count does not depend on the number of orders"""
+        for i in range(5):
+            self.create_order(code=f'ROLL{i}')
+        client = APIClient()
+        client.force_authenticate(user=self.business_user)
+
+        with self.assertNumQueries(6):
+            response = client.get('/api/business/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_orders_fulfilled'], 5)
+        self.assertEqual(response.data['orders_per_month'][-1]['count'], 5)
+        self.assertEqual(response.data['sales_vs_donations'], {'sales': 5, 'donations': 0})
+
+
+class OfflineAnalysisTests(SimpleTestCase):
+    def timestamp(self, value):
+        return pd.Timestamp(value, tz='UTC')
+
+    def test_cohort_retention(self):
+        """Customers are grouped by first completed order month and followed month by month"""
+        orders = pd.DataFrame({
+            'user_id': ['a', 'a', 'b', 'c', 'b'],
+            'status': ['completed', 'completed', 'completed', 'completed', 'cancelled'],
+            'created_at': [self.timestamp(value) for value in
+                           ['2025-01-03', '2025-02-05', '2025-01-09', '2025-02-01', '2025-03-01']],
+        })
+
+        retention = offline.cohort_retention(orders)
+
+        self.assertEqual(list(retention.index), ['2025-01', '2025-02'])
+        self.assertEqual(retention.loc['2025-01'].tolist(), [1.0, 0.5])
+        self.assertEqual(retention.loc['2025-02'].tolist(), [1.0, 0.0])
+
+    def test_waste_saved_curve(self):
+        """Months without completed interactions keep the running totals flat"""
+        interactions = pd.DataFrame({
+            'status': ['completed', 'completed', 'pending'],
+            'quantity': [2, 3, 1],
+            'created_at': [self.timestamp(value) for value in ['2025-01-03', '2025-03-05', '2025-03-06']],
+        })
+
+        curve = offline.waste_saved_curve(interactions)
+
+        self.assertEqual(curve['meals_saved'].tolist(), [2, 0, 3])
+        self.assertEqual(curve['cumulative_meals_saved'].tolist(), [2, 2, 5])
+        self.assertEqual(curve['cumulative_water_saved_litres'].tolist(), [1000, 1000, 2500])
+
+    def test_provider_sell_through(self):
+        """Only items from completed interactions count as sold"""
+        listings = pd.DataFrame({'id': ['f1', 'f2', 'f3'], 'provider_id': ['p1', 'p1', 'p2'], 'quantity': [10, 10, 0]})
+        items = pd.DataFrame({
+            'interaction_id': ['i1', 'i2', 'i3'],
+            'food_listing_id': ['f1', 'f2', 'f1'],
+            'quantity': [2, 3, 1],
+        })
+        interactions = pd.DataFrame({'id': ['i1', 'i2', 'i3'], 'status': ['completed', 'completed', 'pending']})
+
+        report = offline.provider_sell_through(listings, items, interactions)
+
+        self.assertEqual(report.loc['p1'].tolist(), [20, 5, 0.25])
+        self.assertEqual(report.loc['p2'].tolist(), [0, 0, 0.0])
+
+
+class AnalyticsExportTests(TestCase):
+    def setUp(self):
+        self.export_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.export_dir, ignore_errors=True)
+        customer = User.objects.create_user(
+            username='expcus', email='exportcustomer@test.com', password='testpass123', user_type='customer'
+        )
+        business_user = User.objects.create_user(
+            username='expbus', email='exportbusiness@test.com', password='testpass123', user_type='food_provider'
+        )
+        business = FoodProviderProfile.objects.create(user=business_user, business_name="Export Business")
+        for i in range(3):
+            interaction = Interaction.objects.create(
+                business=business,
+                user=customer,
+                total_amount=12.50,
+                interaction_type='Purchase',
+                status='completed',
+                quantity=2
+            )
+            Order.objects.create(
+                interaction=interaction,
+                status='completed',
+                pickup_window='10am-12pm',
+                pickup_code=f'EXP{i}'
+            )
+
+    def test_export_partitions_by_month_in_chunks(self):
+        """Rows stream out in chunks into the current month's partition and load back typed"""
+        counts = exports.export_datasets(['orders', 'interactions'], root=self.export_dir, chunk_size=2)
+        self.assertEqual(counts, {'orders': 3, 'interactions': 3})
+
+        month = timezone.now().strftime('%Y-%m')
+        self.assertEqual(list(exports.month_dirs('orders', self.export_dir)), [month])
+        self.assertEqual(len(os.listdir(exports.month_dirs('orders', self.export_dir)[month])), 2)
+
+        orders = exports.load_dataset('orders', self.export_dir)
+        self.assertEqual(len(orders), 3)
+        self.assertEqual(orders['total_amount'].sum(), 37.5)
+
+        # Re-exporting a month replaces it rather than appending to it
+        exports.export_datasets(['orders'], root=self.export_dir, since=timezone.now())
+        self.assertEqual(len(exports.load_dataset('orders', self.export_dir)), 3)
+
+    def test_offline_analysis_reads_exports_only(self):
+        exports.export_datasets(root=self.export_dir)
+
+        with self.assertNumQueries(0):
+            reports = offline.run_offline_analysis(root=self.export_dir)
+
+        self.assertEqual(reports['waste_saved_curve']['cumulative_meals_saved'].iloc[-1], 6)
+        self.assertTrue(os.path.exists(os.path.join(self.export_dir, 'reports', 'cohort_retention.csv')))
+
+
+class ExponentialSmoothingTests(SimpleTestCase):
+    def test_smooth_fits_many_series_at_once(self):
+        """A flat series is forecast exactly; a trend prefers a fast-reacting alpha"""
+        series = np.array([[5.0] * 30, list(range(30))])
+
+        alphas, levels, maes, baselines = forecasting.smooth(series, holdout=7)
+
+        self.assertAlmostEqual(levels[0], 5.0)
+        self.assertEqual(maes[0], 0.0)
+        self.assertEqual(alphas[1], forecasting.ALPHAS.max())
+        self.assertLess(maes[1], baselines[1])
+
+
+class DemandForecastTests(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username='fccus', email='forecastcustomer@test.com', password='testpass123', user_type='customer'
+        )
+        self.provider = User.objects.create_user(
+            username='fcbus', email='forecastprovider@test.com', password='testpass123', user_type='provider'
+        )
+        # The provider's profile may already exist, created by the User post_save signal
+        self.business, _ = FoodProviderProfile.objects.update_or_create(
+            user=self.provider, defaults={'business_name': "Forecast Bakery"}
+        )
+        self.newcomer = User.objects.create_user(
+            username='fcnew', email='forecastnew@test.com', password='testpass123', user_type='provider'
+        )
+
+        # Six bread listings of 10, each selling 8 at 30% off
+        for i in range(6):
+            listing = FoodListing.objects.create(
+                name=f'Bread {i}',
+                description='Day old bread',
+                food_type='baked_goods',
+                original_price=Decimal('10.00'),
+                discounted_price=Decimal('7.00'),
+                quantity=10,
+                quantity_available=2,
+                expiry_date=timezone.now().date() + timedelta(days=1),
+                pickup_window='17:00-19:00',
+                provider=self.provider
+            )
+            interaction = Interaction.objects.create(
+                business=self.business,
+                user=self.customer,
+                total_amount=Decimal('56.00'),
+                interaction_type='Purchase',
+                status='completed',
+                quantity=8
+            )
+            InteractionItem.objects.create(
+                interaction=interaction,
+                food_listing=listing,
+                name=listing.name,
+                quantity=8,
+                price_per_item=Decimal('7.00'),
+                expiry_date=listing.expiry_date
+            )
+
+    def test_train_and_suggest(self):
+        summary = forecasting.train_forecasts(history_days=30, holdout=7)
+
+        self.assertEqual(summary['provider_models'], 1)
+        self.assertEqual(summary['category_models'], 1)
+
+        forecast = DemandForecast.objects.get(provider=self.provider, food_type='baked_goods')
+        self.assertEqual(forecast.listings_per_day, 6.0)
+        self.assertEqual(forecast.suggested_discount_percent, 30.0)
+        self.assertGreaterEqual(forecast.suggested_quantity, 1)
+
+        with self.assertNumQueries(1):
+            suggestions = forecasting.get_suggestions(self.provider)
+        self.assertEqual(suggestions['baked_goods']['basedOn'], 'provider')
+        self.assertEqual(suggestions['baked_goods']['suggestedQuantity'], forecast.suggested_quantity)
+        self.assertIsNone(suggestions['ready_to_eat'])
+
+        # Providers without enough history get the category model
+        self.assertEqual(forecasting.get_suggestions(self.newcomer)['baked_goods']['basedOn'], 'category')
+
+    def test_benchmark_reports_accuracy_and_latency(self):
+        forecasting.train_forecasts(history_days=30, holdout=7)
+
+        result = forecasting.benchmark(self.provider, iterations=50)
+
+        self.assertEqual(result['accuracy']['provider']['models'], 1)
+        self.assertIsNotNone(result['accuracy']['category']['mean_baseline_mae'])
+        self.assertLess(result['latency_ms']['p95'], 50)
+
+
 class SerializerTests(TestCase):
     def test_monthly_count_serializer(self):
         """Test MonthlyCountSerializer validation"""
@@ -211,13 +211,13 @@ class FoodProviderProfileAdmin(admin.ModelAdmin):
 
     def verify_providers(self, request, queryset):
         """Admin action to verify multiple providers"""
-        updated = queryset.filter(status='pending_verification').update(status='verified')
+        updated = FoodProviderProfile.bulk_set_status(queryset.filter(status='pending_verification'), 'verified')
         self.message_user(request, f"{updated} providers verified successfully.")
     verify_providers.short_description = "Verify selected providers"
 
     def reject_providers(self, request, queryset):
         """Admin action to reject multiple providers"""
-        updated = queryset.filter(status='pending_verification').update(status='rejected')
+        updated = FoodProviderProfile.bulk_set_status(queryset.filter(status='pending_verification'), 'rejected')
         self.message_user(request, f"{updated} providers rejected.")
     reject_providers.short_description = "Reject selected providers"
 
@@ -7,3 +7,5 @@ class AuthenticationConfig(AppConfig):
     
     def ready(self):
         import authentication.models  # This ensures signals are loaded
+        import authentication.profile_summary  # Profile summary invalidation
+        import authentication.platform_stats  # Platform stats counters
@@ -1,87 +1,135 @@
 # authentication/jwt_auth.py - Enhanced version
 
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed, TokenError
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
 from rest_framework_simplejwt.settings import api_settings
-from rest_framework_simplejwt.tokens import UntypedToken
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
+from .user_cache import get_cached_user
+from collections import Counter, OrderedDict
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Validated access tokens kept per process, so a token reused across requests is decoded once
+VALIDATED_TOKEN_CACHE_SIZE = 2048
+
+# At most one failure log line per reason in this many seconds
+FAILURE_LOG_INTERVAL = 60
+
+_validated_tokens = OrderedDict()
+_validated_tokens_lock = threading.Lock()
+
+_failure_counts = Counter()
+_failure_last_logged = {}
+_failure_lock = threading.Lock()
+
+
+def record_auth_failure(reason, detail=''):
+    """
+    Count an authentication failure and log it, sampled per reason.
+    A burst of bad tokens produces one WARNING line per FAILURE_LOG_INTERVAL
+    carrying the number of failures that were not logged individually.
+    """
+    now = time.monotonic()
+    with _failure_lock:
+        _failure_counts[reason] += 1
+        total = _failure_counts[reason]
+        last_logged = _failure_last_logged.get(reason)
+        if last_logged is not None and now - last_logged[0] < FAILURE_LOG_INTERVAL:
+            return
+        _failure_last_logged[reason] = (now, total)
+
+    suppressed = total - last_logged[1] - 1 if last_logged else 0
+    logger.warning(
+        "JWT authentication failed (%s): %s [%d similar failures since last report]",
+        reason, detail, suppressed
+    )
+
+
+def get_auth_failure_counts():
+    """Authentication failures per reason counted by this process"""
+    with _failure_lock:
+        return dict(_failure_counts)
+
+
+def reset_auth_failure_counts():
+    with _failure_lock:
+        _failure_counts.clear()
+        _failure_last_logged.clear()
+
+
+def clear_validated_tokens():
+    with _validated_tokens_lock:
+        _validated_tokens.clear()
+
+
 class CustomJWTAuthentication(JWTAuthentication):
     """
-    Custom JWT Authentication to handle UserID field properly
+    Custom JWT Authentication to handle UserID field properly.
+    Invalid, expired and non-access tokens are rejected with a 401 instead of
+    falling back to an anonymous request.
     """
-    
+
     def get_validated_token(self, raw_token):
         """
-        Validates an encoded JSON web token and returns a validated token
-        wrapper object. Also adds additional debugging.
+        Validates an encoded JSON web token against AUTH_TOKEN_CLASSES (access
+        tokens only) and returns a validated token wrapper object. Tokens seen
+        before are served from a per-process cache until they expire.
         """
+        with _validated_tokens_lock:
+            validated_token = _validated_tokens.get(raw_token)
+            if validated_token is not None:
+                _validated_tokens.move_to_end(raw_token)
+
+        if validated_token is not None:
+            if validated_token.payload.get('exp', 0) > time.time():
+                return validated_token
+            with _validated_tokens_lock:
+                _validated_tokens.pop(raw_token, None)
+
         try:
-            return UntypedToken(raw_token)
-        except TokenError as e:
-            logger.error(f"Token validation failed: {str(e)}")
-            raise InvalidToken({
-                'detail': _('Given token not valid for any token type'),
-                'messages': [
-                    {
-                        'token_class': UntypedToken.__name__,
-                        'token_type': UntypedToken.token_type,
-                        'message': str(e),
-                    }
-                ],
-            })
+            validated_token = super().get_validated_token(raw_token)
+        except InvalidToken as e:
+            messages = e.detail.get('messages') or [{}]
+            record_auth_failure('invalid_token', messages[0].get('message', ''))
+            raise
+
+        with _validated_tokens_lock:
+            _validated_tokens[raw_token] = validated_token
+            while len(_validated_tokens) > VALIDATED_TOKEN_CACHE_SIZE:
+                _validated_tokens.popitem(last=False)
+
+        return validated_token
 
     def get_user(self, validated_token):
         """
         Attempts to find and return a user using the given validated token.
-        Uses UserID field instead of default id for user lookup.
+        Uses UserID field instead of default id for user lookup. The user and
+        their profile come from the user cache, so most requests skip the DB.
         """
         try:
             user_id = validated_token[api_settings.USER_ID_CLAIM]
         except KeyError:
+            record_auth_failure('no_user_claim')
             raise InvalidToken(_("Token contained no recognizable user identification"))
 
+        # Convert to string if it's not already (handles UUID conversion)
+        user_id_str = str(user_id)
+
         try:
-            # Convert to string if it's not already (handles UUID conversion)
-            user_id_str = str(user_id)
-            
             # Use UserID instead of the default 'id' field
-            user = User.objects.get(UserID=user_id_str)
-            
-        except User.DoesNotExist:
-            logger.error(f"User not found with UserID: {user_id_str}")
+            user = get_cached_user(user_id_str)
+        except (User.DoesNotExist, ValidationError):
+            record_auth_failure('user_not_found', f"UserID {user_id_str}")
             raise AuthenticationFailed(_("User not found"), code="user_not_found")
-        except Exception as e:
-            logger.error(f"Unexpected error during user lookup: {str(e)}")
-            raise AuthenticationFailed(_("Authentication failed"), code="auth_error")
 
         if not user.is_active:
-            logger.warning(f"Inactive user attempted authentication: {user.email}")
+            record_auth_failure('user_inactive', f"UserID {user_id_str}")
             raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
 
         return user
-    
-    def authenticate(self, request):
-        """
-        Enhanced authenticate method with better error handling
-        """
-        header = self.get_header(request)
-        if header is None:
-            return None
-
-        raw_token = self.get_raw_token(header)
-        if raw_token is None:
-            return None
-
-        try:
-            validated_token = self.get_validated_token(raw_token)
-            user = self.get_user(validated_token)
-            return (user, validated_token)
-        except Exception as e:
-            logger.error(f"Authentication failed: {str(e)}")
-            return None
\ No newline at end of file
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from authentication.throttling import LoginThrottle
+
+class Command(BaseCommand):
+    help = 'Apply cached failed login counts to user accounts and lock accounts over the threshold'
+
+    def handle(self, *args, **options):
+        if not LoginThrottle.is_enabled():
+            self.stderr.write(self.style.WARNING(
+                'The default cache is per-process, so login throttling is disabled and failed logins '
+                'are written to the accounts as they happen. Set REDIS_URL to share the cache.'
+            ))
+
+        results = LoginThrottle.flush_failures()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Flushed {results["failures_flushed"]} failed logins to '
+                f'{results["accounts_updated"]} accounts, locked {results["accounts_locked"]}'
+            )
+        )
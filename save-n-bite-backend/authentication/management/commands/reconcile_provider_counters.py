@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from authentication.models import FoodProviderProfile, BusinessTagCount
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized provider counters (followers, active listings) and business tag counts'
+
+    def handle(self, *args, **options):
+        corrected = FoodProviderProfile.reconcile_counters()
+        tag_count = BusinessTagCount.rebuild()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Reconciled provider counters: {corrected} profiles corrected')
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt business tag counts: {tag_count} tags')
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from authentication.platform_stats import refresh_platform_stats
+
+class Command(BaseCommand):
+    help = 'Recompute the cached platform stats shown on the public home page'
+
+    def handle(self, *args, **options):
+        stats = refresh_platform_stats()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Refreshed platform stats: ' + ', '.join(f'{name}={value}' for name, value in stats.items())
+            )
+        )
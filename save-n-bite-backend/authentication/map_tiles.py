@@ -0,0 +1,175 @@
+# authentication/map_tiles.py
+
+import math
+import time
+from django.core.cache import cache, caches
+from django.db.models import Avg, Count, F, FloatField, Sum, Value
+from django.db.models.functions import Cast, Floor, Least
+
+from .models import FoodProviderProfile
+from .user_cache import is_shared_cache
+
+# At this zoom and above individual providers are returned instead of clusters
+CLUSTER_MAX_ZOOM = 13
+MAX_ZOOM = 20
+
+# Each tile is split into a GRID_SIZE x GRID_SIZE grid for clustering (~32px cells on 256px tiles)
+GRID_SIZE = 8
+
+TILE_CACHE_TIMEOUT = 60 * 10
+# With a per-process cache an invalidation only reaches the worker that made
+# it, so tiles and their version stamps last as long as the response max-age
+LOCAL_TILE_CACHE_TIMEOUT = 60
+
+# Web Mercator stops short of the poles
+MAX_LATITUDE = 85.0511287798
+
+
+def tile_bounds(z, x, y):
+    """Return (north, south, east, west) of a Web Mercator (slippy map) tile"""
+    n = 2 ** z
+
+    def tile_lat(tile_y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return tile_lat(y), tile_lat(y + 1), (x + 1) / n * 360.0 - 180.0, x / n * 360.0 - 180.0
+
+
+def tile_containing(latitude, longitude, z):
+    """(x, y) of the tile at zoom ``z`` whose bounds include the given coordinates"""
+    n = 2 ** z
+    lat = math.radians(max(-MAX_LATITUDE, min(MAX_LATITUDE, float(latitude))))
+    x = math.floor((float(longitude) + 180.0) / 360.0 * n)
+    y = math.floor((1 - math.asinh(math.tan(lat)) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def _tile_version_key(z, x, y):
+    return f'provider_tile_version:{z}:{x}:{y}'
+
+
+def _cache_timeouts():
+    """(tile timeout, version stamp timeout) for the configured cache"""
+    if is_shared_cache(caches['default']):
+        return TILE_CACHE_TIMEOUT, None
+    return LOCAL_TILE_CACHE_TIMEOUT, LOCAL_TILE_CACHE_TIMEOUT
+
+
+def get_tile_cache_version(z, x, y):
+    """
+    Version stamp of one tile. Stamps are creation times rather than
+    counters, so a stamp evicted from the cache never comes back with the
+    value an older cached tile was stored under. With a per-process cache
+    stamps expire with the tiles, so every worker picks up changes made in
+    another one within LOCAL_TILE_CACHE_TIMEOUT.
+    """
+    key = _tile_version_key(z, x, y)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        cache.add(key, version, _cache_timeouts()[1])
+        version = cache.get(key, version)
+    return version
+
+
+def invalidate_provider_tiles(*positions):
+    """
+    Invalidate the cached tiles containing any of the given (latitude,
+    longitude) positions at every zoom level; positions without
+    coordinates are not on the map and are skipped.
+    """
+    keys = {
+        _tile_version_key(z, *tile_containing(latitude, longitude, z))
+        for latitude, longitude in positions
+        if latitude is not None and longitude is not None
+        for z in range(MAX_ZOOM + 1)
+    }
+    if keys:
+        version = time.time_ns()
+        cache.set_many({key: version for key in keys}, _cache_timeouts()[1])
+
+
+def _providers_in_bounds(north, south, east, west):
+    return FoodProviderProfile.objects.filter(
+        status='verified',
+        user__is_active=True,
+        latitude__isnull=False,
+        longitude__isnull=False,
+        latitude__lte=north,
+        latitude__gt=south,
+        longitude__gte=west,
+        longitude__lt=east
+    )
+
+
+def _clusters(providers, north, south, east, west):
+    """Aggregate providers into grid cells with counts and centroids in one GROUP BY"""
+    cell_width = (east - west) / GRID_SIZE
+    cell_height = (north - south) / GRID_SIZE
+    last_cell = Value(GRID_SIZE - 1, output_field=FloatField())
+
+    cells = providers.annotate(
+        cell_x=Least(Floor((Cast('longitude', FloatField()) - west) / cell_width), last_cell),
+        cell_y=Least(Floor((north - Cast('latitude', FloatField())) / cell_height), last_cell),
+    ).values('cell_x', 'cell_y').annotate(
+        count=Count('id'),
+        lat=Avg(Cast('latitude', FloatField())),
+        lng=Avg(Cast('longitude', FloatField())),
+        active_listings_count=Sum('active_listing_count'),
+    ).order_by('cell_y', 'cell_x')
+
+    return [
+        {
+            'count': cell['count'],
+            'coordinates': {'lat': cell['lat'], 'lng': cell['lng']},
+            'active_listings_count': cell['active_listings_count'] or 0,
+        }
+        for cell in cells
+    ]
+
+
+def _markers(providers):
+    """Individual provider markers, read in one query without touching model properties"""
+    logo_storage = FoodProviderProfile._meta.get_field('logo').storage
+    rows = providers.annotate(provider_id=F('user_id')).values(
+        'provider_id', 'business_name', 'latitude', 'longitude', 'active_listing_count', 'logo'
+    ).order_by('business_name')
+
+    return [
+        {
+            'id': str(row['provider_id']),
+            'business_name': row['business_name'],
+            'coordinates': {'lat': float(row['latitude']), 'lng': float(row['longitude'])},
+            'active_listings_count': row['active_listing_count'],
+            'logo': logo_storage.url(row['logo']) if row['logo'] else None,
+        }
+        for row in rows
+    ]
+
+
+def get_tile_etag(z, x, y):
+    return f'"{get_tile_cache_version(z, x, y)}-{z}-{x}-{y}"'
+
+
+def get_provider_tile(z, x, y):
+    """Clusters (low zoom) or markers (high zoom) for one tile, cached per tile and cache version"""
+    cache_key = f'provider_tile:{get_tile_cache_version(z, x, y)}:{z}:{x}:{y}'
+    tile = cache.get(cache_key)
+    if tile is not None:
+        return tile
+
+    north, south, east, west = tile_bounds(z, x, y)
+    providers = _providers_in_bounds(north, south, east, west)
+    clustered = z < CLUSTER_MAX_ZOOM
+
+    tile = {
+        'z': z,
+        'x': x,
+        'y': y,
+        'bounds': {'north': north, 'south': south, 'east': east, 'west': west},
+        'clustered': clustered,
+        'clusters': _clusters(providers, north, south, east, west) if clustered else [],
+        'providers': [] if clustered else _markers(providers),
+    }
+    cache.set(cache_key, tile, _cache_timeouts()[0])
+    return tile
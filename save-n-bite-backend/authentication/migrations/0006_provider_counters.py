@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:07
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    FoodProviderProfile = apps.get_model('authentication', 'FoodProviderProfile')
+    FoodListing = apps.get_model('food_listings', 'FoodListing')
+    BusinessFollower = apps.get_model('notifications', 'BusinessFollower')
+
+    FoodProviderProfile.objects.update(
+        follower_count=Coalesce(Subquery(
+            BusinessFollower.objects.filter(business=OuterRef('pk'))
+            .order_by().values('business').annotate(count=Count('id')).values('count')
+        ), 0),
+        active_listing_count=Coalesce(Subquery(
+            FoodListing.objects.filter(provider=OuterRef('user'), status='active')
+            .order_by().values('provider').annotate(count=Count('id')).values('count')
+        ), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0005_alter_customerprofile_profile_image_and_more'),
+        ('food_listings', '0002_foodlisting_admin_flagged_and_more'),
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodproviderprofile',
+            name='active_listing_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='foodproviderprofile',
+            name='follower_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
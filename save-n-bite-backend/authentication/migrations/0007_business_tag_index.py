@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:19
+
+import django.contrib.postgres.indexes
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def normalize_and_count_tags(apps, schema_editor):
+    FoodProviderProfile = apps.get_model('authentication', 'FoodProviderProfile')
+    BusinessTagCount = apps.get_model('authentication', 'BusinessTagCount')
+
+    counts = Counter()
+    for profile_id, tags, status in FoodProviderProfile.objects.values_list('id', 'business_tags', 'status'):
+        normalized = []
+        for tag in tags if isinstance(tags, list) else []:
+            if isinstance(tag, str):
+                tag = tag.strip().title()
+                if tag and tag not in normalized:
+                    normalized.append(tag)
+        if normalized != tags:
+            FoodProviderProfile.objects.filter(id=profile_id).update(business_tags=normalized)
+        if status == 'verified':
+            counts.update(normalized)
+
+    BusinessTagCount.objects.bulk_create([
+        BusinessTagCount(tag=tag, provider_count=count) for tag, count in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0006_provider_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusinessTagCount',
+            fields=[
+                ('tag', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('provider_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='foodproviderprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['business_tags'], name='provider_tags_gin', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='businesstagcount',
+            index=models.Index(fields=['-provider_count', 'tag'], name='tag_count_popularity_idx'),
+        ),
+        migrations.RunPython(normalize_and_count_tags, migrations.RunPython.noop),
+    ]
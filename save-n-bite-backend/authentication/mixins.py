@@ -0,0 +1,118 @@
+# authentication/mixins.py
+
+import copy
+from django.db.models import FileField
+
+
+class FieldTrackingMixin:
+    """Model mixin remembering the values an instance was loaded with.
+
+    Instances loaded from the database snapshot their field values in
+    ``from_db``, so save hooks and signals can ask what changed without
+    fetching the row again. ``TRACKED_FIELDS`` limits the snapshot to the
+    named fields; by default every concrete field is tracked.
+
+    The snapshot is refreshed after every save, so inside ``pre_save`` and
+    ``post_save`` receivers ``get_previous`` still returns the stored value.
+    """
+
+    TRACKED_FIELDS = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_fields()
+        return instance
+
+    def _tracked_fields(self):
+        return [
+            field for field in self._meta.concrete_fields
+            if not field.primary_key and (self.TRACKED_FIELDS is None or field.name in self.TRACKED_FIELDS)
+        ]
+
+    def _tracked_value(self, field):
+        if isinstance(field, FileField):
+            # Compare stored file names, the descriptor wraps raw values in a FieldFile
+            return getattr(self, field.attname).name or None
+        value = self.__dict__[field.attname]
+        if isinstance(value, (dict, list)):
+            # JSON values may be mutated in place
+            return copy.deepcopy(value)
+        return value
+
+    def _snapshot_fields(self, field_names=None):
+        """Record the current value of the given (default: all loaded) fields as stored"""
+        if not hasattr(self, '_loaded_values'):
+            self._loaded_values = {}
+        for field in self._tracked_fields():
+            if field_names is not None and field.name not in field_names and field.attname not in field_names:
+                continue
+            if field.attname in self.__dict__:
+                self._loaded_values[field.attname] = self._tracked_value(field)
+
+    @property
+    def is_tracked(self):
+        """True if this instance has stored values to compare against"""
+        return hasattr(self, '_loaded_values') and not self._state.adding
+
+    def get_dirty_fields(self):
+        """Names of loaded fields whose value differs from the stored one"""
+        if not self.is_tracked:
+            return [field.name for field in self._tracked_fields()]
+        return [
+            field.name for field in self._tracked_fields()
+            if field.attname in self.__dict__ and (
+                field.attname not in self._loaded_values
+                or self._tracked_value(field) != self._loaded_values[field.attname]
+            )
+        ]
+
+    def has_changed(self, field_name):
+        return field_name in self.get_dirty_fields()
+
+    def get_previous(self, field_name):
+        """Stored value of a field, or None if the instance was not loaded from the database"""
+        if not self.is_tracked:
+            return None
+        return self._loaded_values.get(self._meta.get_field(field_name).attname)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._snapshot_fields(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._snapshot_fields(fields)
+
+
+class ChangeTrackingMixin(FieldTrackingMixin):
+    """Field tracking that also limits saves to the changed columns.
+
+    Saving an existing instance without explicit ``update_fields`` only
+    writes the changed columns (plus ``auto_now`` fields). Fields listed in
+    ``SAVE_EXCLUDED_FIELDS`` are never written by such a save. If nothing
+    changed, every other column is written, so ``auto_now`` fields move and
+    the save signals are sent as for any explicit ``save()``.
+    """
+
+    SAVE_EXCLUDED_FIELDS = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            self.is_tracked
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+            and not args
+        ):
+            writable_fields = [
+                field.name for field in self._tracked_fields()
+                if field.name not in self.SAVE_EXCLUDED_FIELDS
+            ]
+            auto_now_fields = [
+                field.name for field in self._tracked_fields()
+                if getattr(field, 'auto_now', False)
+            ]
+            dirty_fields = [name for name in self.get_dirty_fields() if name in writable_fields]
+            kwargs['update_fields'] = dirty_fields + auto_now_fields if dirty_fields else writable_fields
+
+        super().save(*args, **kwargs)
@@ -3,8 +3,9 @@
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
 
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.contrib.postgres.indexes import GinIndex
 from django.dispatch import receiver
 import uuid
 from blob_storage import (
@@ -13,6 +14,7 @@ from blob_storage import (
     customer_profile_image_path, ngo_document_path, ngo_logo_path,
     provider_cipc_path, provider_logo_path, provider_banner_path
 )
+from .mixins import ChangeTrackingMixin
 
 class User(AbstractUser):
     USER_TYPE_CHOICES = [
@@ -168,7 +170,7 @@ class CustomerProfile(models.Model):
         return f"Customer: {self.full_name}"
 
 
-class NGOProfile(models.Model):
+class NGOProfile(ChangeTrackingMixin, models.Model):
     STATUS_CHOICES = [
         ('pending_verification', 'Pending Verification'),
         ('verified', 'Verified'),
@@ -214,7 +216,7 @@ class NGOProfile(models.Model):
         return f"NGO: {self.organisation_name}"
 
 
-class FoodProviderProfile(models.Model):
+class FoodProviderProfile(ChangeTrackingMixin, models.Model):
     STATUS_CHOICES = [
         ('pending_verification', 'Pending Verification'),
         ('verified', 'Verified'),
@@ -283,8 +285,23 @@ class FoodProviderProfile(models.Model):
     description_updated_at = models.DateTimeField(null=True, blank=True)
     tags_updated_at = models.DateTimeField(null=True, blank=True)
     
+    # Denormalized counters, maintained with F() updates (see adjust_counters)
+    follower_count = models.PositiveIntegerField(default=0)
+    active_listing_count = models.PositiveIntegerField(default=0)
+    
+    COUNTER_FIELDS = ('follower_count', 'active_listing_count')
+    
+    # Never write back in-memory counters, they may be stale
+    SAVE_EXCLUDED_FIELDS = COUNTER_FIELDS
+    
+    MAP_MARKER_FIELDS = ('latitude', 'longitude', 'status', 'business_name', 'logo')
+    
     class Meta:
         db_table = 'authentication_foodproviderprofile'
+        indexes = [
+            # Serves business_tags__contains (jsonb @>) tag filters
+            GinIndex(fields=['business_tags'], name='provider_tags_gin', opclasses=['jsonb_path_ops']),
+        ]
     
     def __str__(self):
         return f"Provider: {self.business_name}"
@@ -292,25 +309,25 @@ class FoodProviderProfile(models.Model):
     def save(self, *args, **kwargs):
         from django.utils import timezone
         
-        # Track when new features are updated
-        if self.pk:  # Only for existing instances
-            try:
-                old_instance = FoodProviderProfile.objects.get(pk=self.pk)
-                
-                # Check if banner was updated
-                if old_instance.banner != self.banner:
-                    self.banner_updated_at = timezone.now()
-                
-                # Check if description was updated
-                if old_instance.business_description != self.business_description:
-                    self.description_updated_at = timezone.now()
-                
-                # Check if tags were updated
-                if old_instance.business_tags != self.business_tags:
-                    self.tags_updated_at = timezone.now()
-                    
-            except FoodProviderProfile.DoesNotExist:
-                pass
+        # Tags are stored normalized so containment queries match exactly
+        self.business_tags = normalize_business_tags(self.business_tags)
+        
+        # Track when new features are updated (compared against the values loaded from the database)
+        previous_counted_tags = set()
+        if self.is_tracked:
+            previous_counted_tags = self._counted_tags(
+                self.get_previous('status'), self.get_previous('business_tags')
+            )
+            dirty_fields = self.get_dirty_fields()
+            
+            if 'banner' in dirty_fields:
+                self.banner_updated_at = timezone.now()
+            
+            if 'business_description' in dirty_fields:
+                self.description_updated_at = timezone.now()
+            
+            if 'business_tags' in dirty_fields:
+                self.tags_updated_at = timezone.now()
         
         # Auto-geocode address when saving if coordinates are missing (guarded by setting)
         if (
@@ -320,7 +337,33 @@ class FoodProviderProfile(models.Model):
         ):
             self.geocode_address()
         
-        super().save(*args, **kwargs)
+        # Cached map tiles show this provider's position, status, name and logo
+        map_marker_changed = not self.is_tracked or any(
+            field in self.MAP_MARKER_FIELDS for field in self.get_dirty_fields()
+        )
+        previous_position = (self.get_previous('latitude'), self.get_previous('longitude'))
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            
+            counted_tags = self._counted_tags()
+            if counted_tags != previous_counted_tags:
+                BusinessTagCount.apply_changes(
+                    added=counted_tags - previous_counted_tags,
+                    removed=previous_counted_tags - counted_tags
+                )
+        
+        if map_marker_changed:
+            from .map_tiles import invalidate_provider_tiles
+            invalidate_provider_tiles(previous_position, (self.latitude, self.longitude))
+    
+    def _counted_tags(self, status=None, business_tags=None):
+        """Tags this profile (or the given status and tags) contributes to BusinessTagCount (verified providers only)"""
+        if status is None:
+            status, business_tags = self.status, self.business_tags
+        if status != 'verified' or not isinstance(business_tags, list):
+            return set()
+        return set(business_tags)
     
     def geocode_address(self):
         """
@@ -428,22 +471,105 @@ class FoodProviderProfile(models.Model):
         return [tag.strip().title() for tag in self.business_tags if tag.strip()]
     
     @classmethod
-    def get_popular_tags(cls, limit=20):
-        """Get most popular business tags across all providers"""
-        from django.db.models import Q
+    def adjust_counters(cls, follower_delta=0, active_listing_delta=0, **lookup):
+        """Atomically shift the denormalized counters of the provider matching ``lookup``"""
+        from django.db.models import F, Value
+        from django.db.models.functions import Greatest
+        
+        updates = {}
+        if follower_delta:
+            updates['follower_count'] = Greatest(F('follower_count') + follower_delta, Value(0))
+        if active_listing_delta:
+            updates['active_listing_count'] = Greatest(F('active_listing_count') + active_listing_delta, Value(0))
+        if updates:
+            cls.objects.filter(**lookup).update(**updates)
+        
+        # Cached map tiles show active listing counts
+        if active_listing_delta:
+            from .map_tiles import invalidate_provider_tiles
+            invalidate_provider_tiles(*cls.objects.filter(**lookup).values_list('latitude', 'longitude'))
+    
+    @classmethod
+    def bulk_set_status(cls, queryset, status):
+        """
+        Set the status of every profile in ``queryset`` with one UPDATE,
+        keeping tag counts and cached map tiles in step as save() would.
+        Returns the number of profiles updated.
+        """
         from collections import Counter
+        from .map_tiles import invalidate_provider_tiles
         
-        # Get all tags from verified providers
-        providers = cls.objects.filter(status='verified').exclude(business_tags__isnull=True)
+        with transaction.atomic():
+            profiles = list(
+                cls.objects.select_for_update().filter(pk__in=queryset.values('pk')).only(
+                    'id', 'status', 'business_tags', 'latitude', 'longitude'
+                )
+            )
+            added, removed = Counter(), Counter()
+            for profile in profiles:
+                before, after = profile._counted_tags(), profile._counted_tags(status, profile.business_tags)
+                added.update(after - before)
+                removed.update(before - after)
+            
+            updated = cls.objects.filter(pk__in=[profile.pk for profile in profiles]).update(status=status)
+            BusinessTagCount.apply_changes(added=added, removed=removed)
         
-        all_tags = []
-        for provider in providers:
-            if isinstance(provider.business_tags, list):
-                all_tags.extend([tag.strip().title() for tag in provider.business_tags if tag.strip()])
+        invalidate_provider_tiles(*((profile.latitude, profile.longitude) for profile in profiles))
+        return updated
+    
+    @classmethod
+    def reconcile_counters(cls):
+        """Recompute every provider's counters from the source tables; returns rows corrected"""
+        from django.db.models import Count, OuterRef, Q, Subquery
+        from django.db.models.functions import Coalesce
+        from food_listings.models import FoodListing
+        from notifications.models import BusinessFollower
         
-        # Count and return most popular
-        tag_counts = Counter(all_tags)
-        return [{'tag': tag, 'count': count} for tag, count in tag_counts.most_common(limit)]
+        followers = Coalesce(Subquery(
+            BusinessFollower.objects.filter(business=OuterRef('pk'))
+            .order_by().values('business').annotate(count=Count('id')).values('count')
+        ), 0)
+        active_listings = Coalesce(Subquery(
+            FoodListing.objects.filter(provider=OuterRef('user'), status='active')
+            .order_by().values('provider').annotate(count=Count('id')).values('count')
+        ), 0)
+        
+        drifted = cls.objects.annotate(
+            actual_followers=followers,
+            actual_active_listings=active_listings
+        ).filter(
+            ~Q(follower_count=models.F('actual_followers')) |
+            ~Q(active_listing_count=models.F('actual_active_listings'))
+        ).values_list('pk', flat=True)
+        
+        return cls.objects.filter(pk__in=list(drifted)).update(
+            follower_count=followers,
+            active_listing_count=active_listings
+        )
+    
+    @classmethod
+    def get_popular_tags(cls, limit=20):
+        """Get most popular business tags across all verified providers"""
+        return [
+            {'tag': tag, 'count': count}
+            for tag, count in BusinessTagCount.objects.filter(
+                provider_count__gt=0
+            ).order_by('-provider_count', 'tag').values_list('tag', 'provider_count')[:limit]
+        ]
+    
+    @staticmethod
+    def tags_filter(tags, match='all', prefix=''):
+        """Q object matching profiles tagged with all (or any) of ``tags`` via the GIN index"""
+        from django.db.models import Q
+        
+        tags = normalize_business_tags(tags)
+        lookup = f'{prefix}business_tags__contains'
+        if match == 'any':
+            query = Q()
+            for tag in tags:
+                query |= Q(**{lookup: [tag]})
+            return query
+        return Q(**{lookup: tags})
     
     def has_complete_profile(self):
         """Check if business profile is complete with new fields"""
@@ -464,6 +590,82 @@ class FoodProviderProfile(models.Model):
         
         return has_description or has_tags  # At least one should be filled for a "complete" profile
 
+def normalize_business_tags(tags):
+    """Strip and title-case tags, dropping blanks and duplicates while keeping order"""
+    if not isinstance(tags, list):
+        return []
+    
+    normalized = []
+    for tag in tags:
+        if isinstance(tag, str):
+            tag = tag.strip().title()
+            if tag and tag not in normalized:
+                normalized.append(tag)
+    return normalized
+
+
+class BusinessTagCount(models.Model):
+    """Number of verified providers using each business tag, kept in step by FoodProviderProfile.save"""
+    tag = models.CharField(max_length=255, primary_key=True)
+    provider_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-provider_count', 'tag'], name='tag_count_popularity_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.tag}: {self.provider_count}"
+    
+    @classmethod
+    def apply_changes(cls, added=(), removed=()):
+        """Increment the counts of ``added`` tags and decrement those of ``removed`` tags, once per occurrence"""
+        from collections import Counter
+        from django.db.models import F, Value
+        from django.db.models.functions import Greatest
+        
+        deltas = Counter(added)
+        deltas.subtract(removed)
+        
+        created = [tag for tag, delta in deltas.items() if delta > 0]
+        if created:
+            cls.objects.bulk_create([cls(tag=tag) for tag in created], ignore_conflicts=True)
+        
+        # One UPDATE per distinct delta (a single one for per-profile changes)
+        tags_by_delta = {}
+        for tag, delta in deltas.items():
+            if delta:
+                tags_by_delta.setdefault(delta, []).append(tag)
+        for delta, tags in tags_by_delta.items():
+            cls.objects.filter(tag__in=tags).update(
+                provider_count=Greatest(F('provider_count') + delta, Value(0))
+            )
+    
+    @classmethod
+    def rebuild(cls):
+        """Recompute every tag count from the provider profiles with one GROUP BY"""
+        from django.db.models import Count, Func, F
+        
+        counts = FoodProviderProfile.objects.filter(status='verified').annotate(
+            tag=Func(F('business_tags'), function='jsonb_array_elements_text')
+        ).values('tag').annotate(provider_count=Count('id', distinct=True)).values_list('tag', 'provider_count')
+        
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create([
+                cls(tag=tag, provider_count=count) for tag, count in counts if tag
+            ])
+        return cls.objects.count()
+
+
+@receiver(post_delete, sender=FoodProviderProfile)
+def provider_profile_deleted(sender, instance, **kwargs):
+    """Release the deleted provider's tags from BusinessTagCount"""
+    counted_tags = instance._counted_tags()
+    if counted_tags:
+        BusinessTagCount.apply_changes(removed=counted_tags)
+
+
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
@@ -472,4 +674,13 @@ def create_user_profile(sender, instance, created, **kwargs):
         elif instance.user_type == 'ngo':
             NGOProfile.objects.create(user=instance)
         elif instance.user_type == 'provider':
-            FoodProviderProfile.objects.create(user=instance)
\ No newline at end of file
+            FoodProviderProfile.objects.create(user=instance)
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=CustomerProfile)
+@receiver([post_save, post_delete], sender=NGOProfile)
+@receiver([post_save, post_delete], sender=FoodProviderProfile)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Bump the user's cache version so authentication stops serving the old copy"""
+    from .user_cache import invalidate_user
+    invalidate_user(instance.pk if sender is User else instance.user_id)
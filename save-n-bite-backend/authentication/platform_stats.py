@@ -0,0 +1,135 @@
+# authentication/platform_stats.py
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from interactions.models import Interaction, Order
+
+User = get_user_model()
+
+STAT_KEY = 'platform_stats:{}'
+LAST_AGGREGATES_KEY = 'platform_stats:last_aggregates'
+AGGREGATE_LOCK_KEY = 'platform_stats:aggregate_lock'
+
+# Cached stats expire and are recomputed on the next read, so every worker
+# converges on the tables even with a per-process cache or no refresh job
+PLATFORM_STATS_TIMEOUT = 10 * 60
+
+# Longest a request may hold the aggregate lock before another may recompute
+AGGREGATE_LOCK_TIMEOUT = 60
+
+# Kept current by create/delete signals between refreshes
+COUNTED_MODELS = {
+    'total_users': User,
+    'total_orders': Order,
+}
+
+# Recomputed with one aggregate query when missing
+AGGREGATE_STATS = ('meals_saved', 'total_donations')
+
+
+def estimated_row_count(model):
+    """
+    Planner estimate of a table's row count (pg_class.reltuples), which
+    costs no scan. Falls back to COUNT(*) on other databases and on tables
+    Postgres has not analyzed yet (or reports as empty, where a count is cheap).
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return row[0]
+    return model.objects.count()
+
+
+def compute_aggregate_stats():
+    """Meals saved and donations, from one aggregate over completed interactions"""
+    completed = Interaction.objects.filter(status='completed').aggregate(
+        meals_saved=Sum('quantity'),
+        total_donations=Count('id', filter=Q(interaction_type='Donation')),
+    )
+    return {
+        'meals_saved': completed['meals_saved'] or 0,
+        'total_donations': completed['total_donations'],
+    }
+
+
+def compute_platform_stats():
+    """Exact platform stats, scanning the tables (refresh job only)"""
+    return {
+        'total_users': User.objects.count(),
+        'total_orders': Order.objects.count(),
+        **compute_aggregate_stats(),
+    }
+
+
+def _cache_stats(stats):
+    cache.set_many({STAT_KEY.format(name): value for name, value in stats.items()}, PLATFORM_STATS_TIMEOUT)
+    # Kept without expiry, served while the aggregates are being recomputed
+    cache.set(LAST_AGGREGATES_KEY, {name: stats[name] for name in AGGREGATE_STATS if name in stats}, None)
+
+
+def refresh_platform_stats():
+    stats = compute_platform_stats()
+    _cache_stats(stats)
+    return stats
+
+
+def get_platform_stats():
+    """
+    Platform stats for the home page, mostly without scanning any table.
+    Cached values last PLATFORM_STATS_TIMEOUT. Counts missing from the cache
+    are seeded from planner estimates. Missing aggregate stats are recomputed
+    by the one request that takes AGGREGATE_LOCK_KEY, while concurrent
+    requests serve the last computed values (zeros before the first one).
+    """
+    names = list(COUNTED_MODELS) + list(AGGREGATE_STATS)
+    cached = cache.get_many([STAT_KEY.format(name) for name in names])
+    stats = {name: cached.get(STAT_KEY.format(name)) for name in names}
+
+    for name, model in COUNTED_MODELS.items():
+        if stats[name] is None:
+            stats[name] = estimated_row_count(model)
+            cache.add(STAT_KEY.format(name), stats[name], PLATFORM_STATS_TIMEOUT)
+
+    if any(stats[name] is None for name in AGGREGATE_STATS):
+        if cache.add(AGGREGATE_LOCK_KEY, 1, AGGREGATE_LOCK_TIMEOUT):
+            try:
+                aggregates = compute_aggregate_stats()
+                _cache_stats(aggregates)
+            finally:
+                cache.delete(AGGREGATE_LOCK_KEY)
+        else:
+            aggregates = cache.get(LAST_AGGREGATES_KEY) or {}
+        stats.update({name: aggregates.get(name, 0) for name in AGGREGATE_STATS})
+
+    return stats
+
+
+def _adjust_stat(name, delta):
+    try:
+        cache.incr(STAT_KEY.format(name), delta)
+    except ValueError:
+        # Not cached yet, the next read seeds it
+        pass
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Order)
+def count_created(sender, instance, created, **kwargs):
+    if created:
+        _adjust_stat('total_users' if sender is User else 'total_orders', 1)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Order)
+def count_deleted(sender, instance, **kwargs):
+    _adjust_stat('total_users' if sender is User else 'total_orders', -1)
@@ -0,0 +1,112 @@
+# authentication/profile_summary.py
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from interactions.models import Interaction, Order
+from notifications.models import BusinessFollower
+from reviews.models import Review
+
+# Events below invalidate a summary, the timeout only bounds drift from bulk updates
+PROFILE_SUMMARY_TIMEOUT = 60 * 15
+
+# kg of CO2 prevented per rescued meal
+CO2_PER_MEAL_KG = 1.3
+
+
+def _month_start():
+    return timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _summary_key(user_id):
+    # Monthly figures roll over with the key
+    return f'profile_summary:{user_id}:{_month_start():%Y-%m}'
+
+
+def compute_profile_summary(user):
+    """Order, impact, review and follow figures for a user in three aggregate queries"""
+    completed = Q(status='completed')
+    completed_this_month = completed & Q(interaction__created_at__gte=_month_start())
+
+    orders = Order.objects.filter(interaction__user=user).aggregate(
+        completed_orders=Count('id', filter=completed),
+        cancelled_orders=Count('id', filter=Q(status='cancelled')),
+        missed_pickups=Count('id', filter=Q(status='missed')),
+        meals_this_month=Sum('interaction__quantity', filter=completed_this_month),
+        money_saved_this_month=Sum('interaction__total_amount', filter=completed_this_month),
+        total_meals=Sum('interaction__quantity', filter=completed),
+    )
+    reviews = Review.objects.filter(
+        reviewer=user,
+        status__in=['active', 'flagged']
+    ).aggregate(
+        total_reviews=Count('id'),
+        average_rating_given=Avg('general_rating'),
+    )
+    followed_count = BusinessFollower.objects.filter(user=user).count()
+
+    meals_this_month = orders['meals_this_month'] or 0
+    total_meals = orders['total_meals'] or 0
+
+    return {
+        'order_statistics': {
+            'completed_orders': orders['completed_orders'],
+            'cancelled_orders': orders['cancelled_orders'],
+            'missed_pickups': orders['missed_pickups'],
+            'total_orders': orders['completed_orders'] + orders['cancelled_orders'] + orders['missed_pickups'],
+        },
+        'impact_statistics': {
+            'meals_rescued_this_month': meals_this_month,
+            'co2_emissions_prevented_kg': round(meals_this_month * CO2_PER_MEAL_KG, 1),
+            'total_meals_rescued': total_meals,
+            'total_co2_prevented_kg': round(total_meals * CO2_PER_MEAL_KG, 1),
+            'money_saved_this_month': round(float(orders['money_saved_this_month'] or 0), 2),
+        },
+        'review_statistics': {
+            'total_reviews': reviews['total_reviews'],
+            'average_rating_given': round(float(reviews['average_rating_given'] or 0), 2),
+        },
+        'followed_businesses_count': followed_count,
+    }
+
+
+def get_profile_summary(user):
+    """Cached profile summary, recomputed after the user's orders, reviews or follows change"""
+    key = _summary_key(user.pk)
+    summary = cache.get(key)
+    if summary is None:
+        summary = compute_profile_summary(user)
+        cache.set(key, summary, PROFILE_SUMMARY_TIMEOUT)
+    return summary
+
+
+def invalidate_profile_summary(user_id):
+    if user_id is not None:
+        cache.delete(_summary_key(user_id))
+
+
+@receiver([post_save, post_delete], sender=Interaction)
+def interaction_changed(sender, instance, **kwargs):
+    invalidate_profile_summary(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Order)
+def order_changed(sender, instance, **kwargs):
+    if Order.interaction.is_cached(instance):
+        user_id = instance.interaction.user_id
+    else:
+        user_id = Interaction.objects.filter(pk=instance.interaction_id).values_list('user_id', flat=True).first()
+    invalidate_profile_summary(user_id)
+
+
+@receiver([post_save, post_delete], sender=Review)
+def review_changed(sender, instance, **kwargs):
+    invalidate_profile_summary(instance.reviewer_id)
+
+
+@receiver([post_save, post_delete], sender=BusinessFollower)
+def follow_changed(sender, instance, **kwargs):
+    invalidate_profile_summary(instance.user_id)
@@ -0,0 +1,19 @@
+import logging
+
+from celery import shared_task
+from .throttling import LoginThrottle
+from . import platform_stats
+
+logger = logging.getLogger(__name__)
+
+@shared_task
+def flush_login_failures():
+    """Apply cached failed login counts to user accounts (run every minute or so)"""
+    if not LoginThrottle.is_enabled():
+        logger.warning("Login throttling is disabled without a shared cache, set REDIS_URL to enable it")
+    return LoginThrottle.flush_failures()
+
+@shared_task
+def refresh_platform_stats():
+    """Recompute the cached home page stats from the tables (run every few minutes)"""
+    return platform_stats.refresh_platform_stats()
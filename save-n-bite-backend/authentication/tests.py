@@ -1,17 +1,21 @@
 
 
+import io
 import json
 import uuid
 from decimal import Decimal
 from datetime import datetime, timedelta
+from functools import partial
 from unittest.mock import patch, Mock, MagicMock
 
-from django.test import TestCase, TransactionTestCase
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
+from django.db.models.signals import post_save
+from django.dispatch import Signal
 from django.urls import reverse
 
 from rest_framework.test import APITestCase, APIClient
@@ -1523,6 +1527,123 @@ class ViewTest(APITestCase):
         # Check for actual response fields
         self.assertIn('providers', response.data)
         
+    def _tile_for(self, lat, lng, z):
+        import math
+        n = 2 ** z
+        x = int((lng + 180.0) / 360.0 * n)
+        y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+        return x, y
+        
+    def _verified_provider_at(self, email, lat, lng):
+        # conftest patches post_save.send out, let the profile receiver create the provider profile
+        with patch.object(post_save, 'send', partial(Signal.send, post_save)):
+            user = User.objects.create_user(
+                email=email,
+                username=email,
+                password='TestPass123!',
+                user_type='provider'
+            )
+        profile = user.provider_profile
+        profile.business_name = email
+        profile.status = 'verified'
+        profile.latitude = Decimal(str(lat))
+        profile.longitude = Decimal(str(lng))
+        profile.save()
+        return user
+        
+    def test_get_food_provider_tile_clusters_low_zoom(self):
+        """Test low zoom tiles aggregate nearby providers into one cluster"""
+        from django.core.cache import cache
+        
+        cache.clear()
+        self._verified_provider_at('one@test.com', -33.9249, 18.4241)
+        self._verified_provider_at('two@test.com', -33.9300, 18.4300)
+        
+        x, y = self._tile_for(-33.9249, 18.4241, 3)
+        response = self.client.get(f'/auth/providers/tiles/3/{x}/{y}/')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['clustered'])
+        self.assertEqual(len(response.data['clusters']), 1)
+        self.assertEqual(response.data['clusters'][0]['count'], 2)
+        self.assertAlmostEqual(response.data['clusters'][0]['coordinates']['lat'], -33.92745, places=4)
+        
+        # Unchanged tiles revalidate with their ETag
+        response = self.client.get(f'/auth/providers/tiles/3/{x}/{y}/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        
+    def test_get_food_provider_tile_markers_high_zoom(self):
+        """Test high zoom tiles return markers and are invalidated when a provider moves"""
+        from django.core.cache import cache
+        
+        cache.clear()
+        provider = self._verified_provider_at('marker@test.com', -33.9249, 18.4241)
+        x, y = self._tile_for(-33.9249, 18.4241, 15)
+        url = f'/auth/providers/tiles/15/{x}/{y}/'
+        
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['clustered'])
+        self.assertEqual(response.data['providers'][0]['id'], str(provider.UserID))
+        etag = response['ETag']
+        
+        profile = provider.provider_profile
+        profile.latitude = Decimal('-26.2041')
+        profile.longitude = Decimal('28.0473')
+        profile.save()
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['providers'], [])
+        
+    def test_listing_count_change_invalidates_only_the_providers_tiles(self):
+        """Test active listing changes only invalidate tiles containing the provider"""
+        from django.core.cache import cache
+
+        cache.clear()
+        provider = self._verified_provider_at('cape@test.com', -33.9249, 18.4241)
+        self._verified_provider_at('joburg@test.com', -26.2041, 28.0473)
+        urls = {
+            name: '/auth/providers/tiles/15/{}/{}/'.format(*self._tile_for(lat, lng, 15))
+            for name, lat, lng in (('cape', -33.9249, 18.4241), ('joburg', -26.2041, 28.0473))
+        }
+        etags = {name: self.client.get(url)['ETag'] for name, url in urls.items()}
+
+        FoodProviderProfile.adjust_counters(active_listing_delta=1, user_id=provider.UserID)
+
+        response = self.client.get(urls['cape'], HTTP_IF_NONE_MATCH=etags['cape'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['providers'][0]['active_listings_count'], 1)
+        response = self.client.get(urls['joburg'], HTTP_IF_NONE_MATCH=etags['joburg'])
+        self.assertEqual(response.status_code, 304)
+
+    @patch('authentication.map_tiles.is_shared_cache', return_value=False)
+    def test_per_process_tile_cache_expires_with_max_age(self, mock_shared_cache):
+        """Test a change invalidated in another worker shows up once the local tile and stamp expire"""
+        import time
+        from django.core.cache import cache
+        from .map_tiles import LOCAL_TILE_CACHE_TIMEOUT
+
+        cache.clear()
+        provider = self._verified_provider_at('local@test.com', -33.9249, 18.4241)
+        url = '/auth/providers/tiles/15/{}/{}/'.format(*self._tile_for(-33.9249, 18.4241, 15))
+        etag = self.client.get(url)['ETag']
+
+        # Changed in another worker, whose invalidation never reaches this cache
+        FoodProviderProfile.objects.filter(user=provider).update(active_listing_count=3)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        expired = time.time() + LOCAL_TILE_CACHE_TIMEOUT + 1
+        with patch('django.core.cache.backends.locmem.time.time', return_value=expired):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['providers'][0]['active_listings_count'], 3)
+
+    def test_get_food_provider_tile_invalid(self):
+        """Test tile coordinates outside the zoom level are rejected"""
+        response = self.client.get('/auth/providers/tiles/2/4/0/')
+        self.assertEqual(response.status_code, 400)
+        
     def test_get_food_provider_by_id_not_found(self):
         """Test get food provider by ID when not found"""
         import uuid
@@ -1709,6 +1830,41 @@ class AdvancedViewTest(APITestCase):
         response = self.client.get('/auth/providers/?tags=vegan')
         self.assertEqual(response.status_code, 200)
         
+    def test_get_food_providers_complete_profiles_page(self):
+        """Test completeness filter runs before pagination and stats are annotated"""
+        from notifications.services import NotificationService
+        from django.core.cache import cache
+        
+        cache.clear()
+        self.provider_profile.business_email = 'provider@test.com'
+        self.provider_profile.business_contact = '+27123456789'
+        self.provider_profile.save()
+        NotificationService.follow_business(self.customer_user, self.provider_user.UserID)
+        
+        incomplete_user = User.objects.create_user(
+            email='incomplete@test.com',
+            username='incomplete',
+            password='TestPass123!',
+            user_type='provider'
+        )
+        incomplete_profile = incomplete_user.provider_profile
+        incomplete_profile.business_name = 'Incomplete Bakery'
+        incomplete_profile.status = 'verified'
+        incomplete_profile.save()
+        
+        self.client.force_authenticate(user=self.customer_user)
+        response = self.client.get('/auth/providers/?complete_profiles=true&page_size=1')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['pagination']['total_count'], 1)
+        provider = response.data['providers'][0]
+        self.assertEqual(provider['id'], str(self.provider_user.UserID))
+        self.assertEqual(provider['follower_count'], 1)
+        self.assertEqual(provider['active_listings_count'], 0)
+        self.assertTrue(provider['is_following'])
+        self.assertEqual(response.data['summary']['total_verified_providers'], 2)
+        self.assertEqual(response.data['summary']['providers_with_tags'], 1)
+        
     def test_get_food_provider_by_id_success(self):
         """Test getting food provider by ID successfully"""
         # Ensure provider has complete profile
@@ -1989,6 +2145,825 @@ class ManagementCommandTest(TestCase):
         self.assertTrue('geocoding complete' in output or 'No businesses need geocoding' in output)
 
 
+class ProviderCounterTest(TestCase):
+    """Test denormalized follower and active listing counters"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.customer_user = User.objects.create_user(
+            email='customer@test.com',
+            username='customer',
+            password='TestPass123!',
+            user_type='customer'
+        )
+        # conftest patches post_save.send out, let the profile receiver create the provider profile
+        with patch.object(post_save, 'send', partial(Signal.send, post_save)):
+            self.provider_user = User.objects.create_user(
+                email='provider@test.com',
+                username='provider',
+                password='TestPass123!',
+                user_type='provider'
+            )
+        self.provider_profile = self.provider_user.provider_profile
+        self.provider_profile.business_name = 'Test Restaurant'
+        self.provider_profile.status = 'verified'
+        self.provider_profile.save()
+        
+    def _create_listing(self, **kwargs):
+        from food_listings.models import FoodListing
+        
+        defaults = {
+            'name': 'Test Bread',
+            'description': 'Fresh bread',
+            'food_type': 'baked_goods',
+            'original_price': Decimal('20.00'),
+            'discounted_price': Decimal('10.00'),
+            'quantity': 5,
+            'quantity_available': 5,
+            'expiry_date': timezone.now().date() + timedelta(days=1),
+            'pickup_window': '17:00-19:00',
+            'provider': self.provider_user,
+        }
+        defaults.update(kwargs)
+        return FoodListing.objects.create(**defaults)
+        
+    def test_follow_and_unfollow_update_follower_count(self):
+        """Test follow/unfollow keep follower_count in step"""
+        from notifications.services import NotificationService
+        
+        NotificationService.follow_business(self.customer_user, self.provider_user.UserID)
+        NotificationService.follow_business(self.customer_user, self.provider_user.UserID)
+        self.provider_profile.refresh_from_db()
+        self.assertEqual(self.provider_profile.follower_count, 1)
+        
+        NotificationService.unfollow_business(self.customer_user, self.provider_user.UserID)
+        self.provider_profile.refresh_from_db()
+        self.assertEqual(self.provider_profile.follower_count, 0)
+        
+    def test_listing_status_transitions_update_active_count(self):
+        """Test listing create, status change and delete keep active_listing_count in step"""
+        from food_listings.models import FoodListing
+        
+        listing = self._create_listing()
+        self._create_listing(name='Inactive Bread', status='inactive')
+        self.provider_profile.refresh_from_db()
+        self.assertEqual(self.provider_profile.active_listing_count, 1)
+        
+        listing = FoodListing.objects.get(pk=listing.pk)
+        listing.status = 'removed'
+        listing.save()
+        self.provider_profile.refresh_from_db()
+        self.assertEqual(self.provider_profile.active_listing_count, 0)
+        
+        listing.admin_restore()
+        self.provider_profile.refresh_from_db()
+        self.assertEqual(self.provider_profile.active_listing_count, 1)
+        
+        listing.delete()
+        self.provider_profile.refresh_from_db()
+        self.assertEqual(self.provider_profile.active_listing_count, 0)
+        
+    def test_profile_save_does_not_overwrite_counters(self):
+        """Test saving a stale profile instance leaves counters alone"""
+        stale_profile = FoodProviderProfile.objects.get(pk=self.provider_profile.pk)
+        self._create_listing()
+        
+        stale_profile.business_hours = 'Mon-Fri: 9AM-6PM'
+        stale_profile.save()
+        
+        self.provider_profile.refresh_from_db()
+        self.assertEqual(self.provider_profile.active_listing_count, 1)
+        self.assertEqual(self.provider_profile.business_hours, 'Mon-Fri: 9AM-6PM')
+        
+    def test_reconcile_command_fixes_drift(self):
+        """Test reconcile_provider_counters recomputes counters from source tables"""
+        from django.core.management import call_command
+        from io import StringIO
+        from notifications.models import BusinessFollower
+        
+        self._create_listing()
+        BusinessFollower.objects.create(user=self.customer_user, business=self.provider_profile)
+        FoodProviderProfile.objects.filter(pk=self.provider_profile.pk).update(
+            follower_count=7, active_listing_count=0
+        )
+        
+        out = StringIO()
+        call_command('reconcile_provider_counters', stdout=out)
+        
+        self.assertIn('1 profiles corrected', out.getvalue())
+        self.provider_profile.refresh_from_db()
+        self.assertEqual(self.provider_profile.follower_count, 1)
+        self.assertEqual(self.provider_profile.active_listing_count, 1)
+
+
+class BusinessTagIndexTest(APITestCase):
+    """Test normalized tag storage, tag counts and containment-based tag search"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.bakery = self._provider('bakery@test.com', 'Corner Bakery', [' vegan ', 'Bakery', 'vegan'])
+        self.cafe = self._provider('cafe@test.com', 'Green Cafe', ['Vegan Options', 'Organic'])
+        self.deli = self._provider('deli@test.com', 'Deli', ['Organic', 'Bakery'])
+        
+    def _provider(self, email, name, tags):
+        # conftest patches post_save.send out, let the profile receiver create the provider profile
+        with patch.object(post_save, 'send', partial(Signal.send, post_save)):
+            user = User.objects.create_user(
+                email=email,
+                username=email,
+                password='TestPass123!',
+                user_type='provider'
+            )
+        profile = user.provider_profile
+        profile.business_name = name
+        profile.business_tags = tags
+        profile.status = 'verified'
+        profile.save()
+        return user
+        
+    def test_tags_normalized_and_counted(self):
+        """Test tags are stored normalized and counted per verified provider"""
+        from authentication.models import BusinessTagCount
+        
+        self.assertEqual(self.bakery.provider_profile.business_tags, ['Vegan', 'Bakery'])
+        self.assertEqual(
+            FoodProviderProfile.get_popular_tags(limit=2),
+            [{'tag': 'Bakery', 'count': 2}, {'tag': 'Organic', 'count': 2}]
+        )
+        
+        profile = self.deli.provider_profile
+        profile.status = 'rejected'
+        profile.save()
+        self.assertEqual(BusinessTagCount.objects.get(tag='Bakery').provider_count, 1)
+        
+        self.cafe.delete()
+        self.assertEqual(BusinessTagCount.objects.get(tag='Organic').provider_count, 0)
+        self.assertNotIn('Organic', [entry['tag'] for entry in FoodProviderProfile.get_popular_tags()])
+        
+    def test_admin_bulk_status_actions_keep_tag_counts(self):
+        """Test bulk verify and reject in the admin update tag counts like save() does"""
+        from django.contrib.admin.sites import AdminSite
+        from authentication.admin import FoodProviderProfileAdmin
+        from authentication.models import BusinessTagCount
+        
+        for user in (self.bakery, self.deli):
+            profile = user.provider_profile
+            profile.status = 'pending_verification'
+            profile.save()
+        self.assertEqual(BusinessTagCount.objects.get(tag='Bakery').provider_count, 0)
+        
+        provider_admin = FoodProviderProfileAdmin(FoodProviderProfile, AdminSite())
+        with patch.object(provider_admin, 'message_user'):
+            provider_admin.verify_providers(None, FoodProviderProfile.objects.filter(user=self.bakery))
+            provider_admin.reject_providers(None, FoodProviderProfile.objects.filter(user=self.deli))
+        
+        self.assertEqual(BusinessTagCount.objects.get(tag='Bakery').provider_count, 1)
+        self.assertEqual(BusinessTagCount.objects.get(tag='Vegan').provider_count, 1)
+        self.assertEqual(BusinessTagCount.objects.get(tag='Organic').provider_count, 1)
+        
+    def test_search_providers_by_tags_match_modes(self):
+        """Test tag search matches whole tags with AND/OR semantics"""
+        response = self.client.get('/auth/providers/search/tags/?tags=vegan')
+        self.assertEqual(response.status_code, 200)
+        # 'Vegan' no longer matches 'Vegan Options' as a substring
+        self.assertEqual([p['business_name'] for p in response.data['providers']], ['Corner Bakery'])
+        
+        response = self.client.get('/auth/providers/search/tags/?tags=bakery,organic')
+        self.assertEqual([p['business_name'] for p in response.data['providers']], ['Deli'])
+        
+        response = self.client.get('/auth/providers/search/tags/?tags=vegan,organic&match=any')
+        self.assertEqual(
+            sorted(p['business_name'] for p in response.data['providers']),
+            ['Corner Bakery', 'Deli', 'Green Cafe']
+        )
+        
+    def test_rebuild_tag_counts(self):
+        """Test the reconcile command rebuilds tag counts from profiles"""
+        from django.core.management import call_command
+        from io import StringIO
+        from authentication.models import BusinessTagCount
+        
+        BusinessTagCount.objects.all().delete()
+        out = StringIO()
+        call_command('reconcile_provider_counters', stdout=out)
+        
+        self.assertIn('Rebuilt business tag counts: 4 tags', out.getvalue())
+        self.assertEqual(BusinessTagCount.objects.get(tag='Bakery').provider_count, 2)
+
+
+class ProfileChangeTrackingTest(TestCase):
+    """Test profiles compare against loaded values instead of re-reading the row on save"""
+    
+    def setUp(self):
+        """Set up test data"""
+        # conftest patches post_save.send out, the profile creation and notification receivers must run here
+        signals = patch.object(post_save, 'send', partial(Signal.send, post_save))
+        signals.start()
+        self.addCleanup(signals.stop)
+        user = User.objects.create_user(
+            email='tracked@test.com',
+            username='tracked@test.com',
+            password='TestPass123!',
+            user_type='provider'
+        )
+        self.profile_id = user.provider_profile.pk
+        
+    def test_save_writes_only_changed_columns(self):
+        """Test saving a loaded profile skips the SELECT and updates only dirty columns"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        profile = FoodProviderProfile.objects.get(pk=self.profile_id)
+        profile.business_description = 'Fresh bread daily'
+        
+        with CaptureQueriesContext(connection) as queries:
+            profile.save()
+        
+        sql = [query['sql'] for query in queries.captured_queries]
+        self.assertFalse([statement for statement in sql if statement.startswith('SELECT')])
+        update = next(statement for statement in sql if statement.startswith('UPDATE'))
+        self.assertIn('"business_description"', update)
+        self.assertIn('"description_updated_at"', update)
+        self.assertNotIn('"business_name"', update)
+        self.assertNotIn('"follower_count"', update)
+        
+        self.assertEqual(profile.get_dirty_fields(), [])
+        
+    def test_unchanged_save_still_writes_and_sends_signals(self):
+        """Test an explicit save without changes writes every column but the counters and sends post_save"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        profile = FoodProviderProfile.objects.get(pk=self.profile_id)
+        receiver = Mock()
+        post_save.connect(receiver, sender=FoodProviderProfile)
+        self.addCleanup(post_save.disconnect, receiver, sender=FoodProviderProfile)
+        
+        with CaptureQueriesContext(connection) as queries:
+            profile.save()
+        
+        update = next(query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE'))
+        self.assertIn('"business_name"', update)
+        self.assertNotIn('"follower_count"', update)
+        receiver.assert_called_once()
+        
+    def test_previous_values_and_timestamps(self):
+        """Test previous values are kept until save and only changed fields get timestamps"""
+        profile = FoodProviderProfile.objects.get(pk=self.profile_id)
+        profile.business_tags.append('Bakery')
+        
+        self.assertTrue(profile.has_changed('business_tags'))
+        self.assertEqual(profile.get_previous('business_tags'), [])
+        
+        profile.save()
+        profile.refresh_from_db()
+        self.assertIsNotNone(profile.tags_updated_at)
+        self.assertIsNone(profile.description_updated_at)
+        self.assertEqual(profile.get_previous('business_tags'), ['Bakery'])
+        
+    def test_counters_never_written_by_save(self):
+        """Test a stale in-memory counter does not overwrite the stored one"""
+        profile = FoodProviderProfile.objects.get(pk=self.profile_id)
+        FoodProviderProfile.adjust_counters(follower_delta=3, pk=self.profile_id)
+        
+        profile.follower_count = 0
+        profile.business_name = 'Renamed'
+        profile.save()
+        
+        self.assertEqual(FoodProviderProfile.objects.get(pk=self.profile_id).follower_count, 3)
+        
+    @patch('notifications.services.NotificationService.send_verification_status_notification')
+    def test_verification_notification_uses_loaded_status(self, mock_notify):
+        """Test status change notifications still fire for both profile types"""
+        profile = FoodProviderProfile.objects.get(pk=self.profile_id)
+        profile.status = 'verified'
+        profile.save()
+        
+        ngo_user = User.objects.create_user(
+            email='ngo-tracked@test.com',
+            username='ngo-tracked@test.com',
+            password='TestPass123!',
+            user_type='ngo'
+        )
+        ngo = NGOProfile.objects.get(user=ngo_user)
+        ngo.status = 'rejected'
+        ngo.save()
+        
+        # Saving again without a status change does not notify twice
+        profile.save()
+        
+        self.assertEqual(
+            [(call.kwargs['status'], call.kwargs['user_type']) for call in mock_notify.call_args_list],
+            [('verified', 'provider'), ('rejected', 'ngo')]
+        )
+
+
+@override_settings(AUTH_USER_CACHE_TIMEOUT=30)
+class CachedJWTUserTest(TestCase):
+    """Test JWT authentication resolves users and profiles from the user cache"""
+    
+    def setUp(self):
+        """Set up test data"""
+        from .jwt_auth import CustomJWTAuthentication
+        from .user_cache import clear_local_user_cache
+        from rest_framework_simplejwt.tokens import AccessToken
+        
+        clear_local_user_cache()
+        # The tests run in one process, where the per-process test cache behaves as a shared one
+        shared_cache = patch('authentication.user_cache.is_shared_cache', return_value=True)
+        shared_cache.start()
+        self.addCleanup(shared_cache.stop)
+        # conftest patches post_save.send out, the profile creation and invalidation receivers must run here
+        signals = patch.object(post_save, 'send', partial(Signal.send, post_save))
+        signals.start()
+        self.addCleanup(signals.stop)
+        self.user = User.objects.create_user(
+            email='cached@test.com',
+            username='cached@test.com',
+            password='TestPass123!',
+            user_type='provider'
+        )
+        self.auth = CustomJWTAuthentication()
+        self.token = AccessToken.for_user(self.user)
+        
+    def test_repeated_lookups_skip_the_database(self):
+        """Test the user and profile are served without queries once cached"""
+        self.auth.get_user(self.token)
+        
+        with self.assertNumQueries(0):
+            user = self.auth.get_user(self.token)
+            business_name = user.provider_profile.business_name
+        
+        self.assertEqual(user.UserID, self.user.UserID)
+        self.assertEqual(business_name, self.user.provider_profile.business_name)
+        
+        # Each request gets its own instance
+        self.assertIsNot(self.auth.get_user(self.token), user)
+        
+    def test_profile_update_invalidates_cached_user(self):
+        """Test a saved profile change is visible on the next request"""
+        self.auth.get_user(self.token)
+        
+        profile = FoodProviderProfile.objects.get(user=self.user)
+        profile.business_name = 'Renamed Bakery'
+        profile.save()
+        
+        user = self.auth.get_user(self.token)
+        self.assertEqual(user.provider_profile.business_name, 'Renamed Bakery')
+        
+    def test_deactivation_and_password_change_invalidate_cached_user(self):
+        """Test deactivated users are rejected and password changes are picked up"""
+        from rest_framework_simplejwt.exceptions import AuthenticationFailed
+        
+        self.auth.get_user(self.token)
+        
+        self.user.set_temporary_password('TempPass123!')
+        self.assertTrue(self.auth.get_user(self.token).password_must_change)
+        
+        self.user.deactivate_account(admin_user=None, reason='Test')
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.get_user(self.token)
+        
+    def test_per_process_cache_reads_the_database(self):
+        """Test users are not cached when invalidations cannot reach other workers"""
+        self.auth.get_user(self.token)
+        
+        with patch('authentication.user_cache.is_shared_cache', return_value=False):
+            with self.assertNumQueries(1):
+                self.auth.get_user(self.token)
+
+
+@override_settings(AUTH_USER_CACHE_TIMEOUT=30)
+class JWTAuthenticationFailureTest(TestCase):
+    """Test invalid tokens are rejected, counted and logged sparingly"""
+    
+    def setUp(self):
+        """Set up test data"""
+        from django.test import RequestFactory
+        from .jwt_auth import CustomJWTAuthentication, clear_validated_tokens, reset_auth_failure_counts
+        
+        clear_validated_tokens()
+        reset_auth_failure_counts()
+        shared_cache = patch('authentication.user_cache.is_shared_cache', return_value=True)
+        shared_cache.start()
+        self.addCleanup(shared_cache.stop)
+        self.user = User.objects.create_user(
+            email='jwtfail@test.com',
+            username='jwtfail@test.com',
+            password='TestPass123!',
+            user_type='customer'
+        )
+        self.auth = CustomJWTAuthentication()
+        self.factory = RequestFactory()
+        
+    def _authenticate(self, token):
+        return self.auth.authenticate(self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {token}'))
+        
+    def test_refresh_and_expired_tokens_are_rejected(self):
+        """Test non-access and expired tokens raise instead of authenticating anonymously"""
+        from rest_framework_simplejwt.exceptions import InvalidToken
+        from rest_framework_simplejwt.tokens import AccessToken
+        
+        refresh = RefreshToken.for_user(self.user)
+        with self.assertRaises(InvalidToken):
+            self._authenticate(str(refresh))
+        
+        expired = AccessToken.for_user(self.user)
+        expired.set_exp(lifetime=-timedelta(minutes=1))
+        with self.assertRaises(InvalidToken):
+            self._authenticate(str(expired))
+        
+        user, _ = self._authenticate(str(refresh.access_token))
+        self.assertEqual(user.UserID, self.user.UserID)
+        
+    def test_failures_are_counted_and_logging_is_sampled(self):
+        """Test a burst of bad tokens increments the counter but logs once"""
+        from rest_framework_simplejwt.exceptions import InvalidToken
+        from .jwt_auth import get_auth_failure_counts
+        
+        with self.assertLogs('authentication.jwt_auth', level='WARNING') as logs:
+            for _ in range(50):
+                with self.assertRaises(InvalidToken):
+                    self._authenticate('not-a-token')
+        
+        self.assertEqual(get_auth_failure_counts(), {'invalid_token': 50})
+        self.assertEqual(len(logs.records), 1)
+        
+    def test_warm_authentication_skips_the_database(self):
+        """Test repeated authentication with a warm token and user cache runs no queries"""
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {get_tokens_for_user(self.user)["token"]}')
+        self.auth.authenticate(request)
+        
+        with self.assertNumQueries(0):
+            for _ in range(10):
+                user, _ = self.auth.authenticate(request)
+        self.assertEqual(user.UserID, self.user.UserID)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'login-throttle-tests'}})
+class LoginThrottleTest(APITestCase):
+    """Test cache-backed login throttling and deferred failure counters"""
+    
+    def setUp(self):
+        """Set up test data"""
+        from django.core.cache import cache
+        
+        cache.clear()
+        # The tests run in one process, where the per-process test cache behaves as a shared one
+        shared_cache = patch('authentication.throttling.is_shared_cache', return_value=True)
+        shared_cache.start()
+        self.addCleanup(shared_cache.stop)
+        self.user = User.objects.create_user(
+            email='throttled@test.com',
+            username='throttled@test.com',
+            password='TestPass123!',
+            user_type='customer'
+        )
+        
+    def _login(self, email='throttled@test.com', password='WrongPass123!', ip='10.0.0.1'):
+        return self.client.post('/auth/login/', {'email': email, 'password': password}, REMOTE_ADDR=ip)
+        
+    def test_account_throttled_before_password_hashing(self):
+        """Test repeated failures for one account get 429 without checking the password"""
+        from .throttling import LoginThrottle
+        
+        for _ in range(LoginThrottle.ACCOUNT_LIMIT):
+            self.assertEqual(self._login().status_code, status.HTTP_401_UNAUTHORIZED)
+        
+        with patch('authentication.views.authenticate') as mock_authenticate:
+            response = self._login(password='TestPass123!')
+        
+        mock_authenticate.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response.data['error']['code'], 'TOO_MANY_ATTEMPTS')
+        self.assertIn('Retry-After', response)
+        
+        # Other accounts from another IP are unaffected
+        self.assertEqual(self._login(email='other@test.com', ip='10.0.0.2').status_code, status.HTTP_401_UNAUTHORIZED)
+        
+    def test_ip_throttled_across_accounts(self):
+        """Test one IP cycling through accounts is throttled"""
+        from .throttling import LoginThrottle
+        
+        for number in range(LoginThrottle.IP_LIMIT):
+            self._login(email=f'stuffed{number}@test.com')
+        
+        self.assertEqual(self._login(email='fresh@test.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self._login(email='fresh@test.com', ip='10.0.0.3').status_code, status.HTTP_401_UNAUTHORIZED)
+        
+    def test_failures_flushed_to_accounts_in_bulk(self):
+        """Test failed attempts leave the user row alone until flushed, then lock the account"""
+        from django.core.management import call_command
+        from .throttling import LoginThrottle
+        
+        for _ in range(LoginThrottle.LOCKOUT_THRESHOLD):
+            self._login()
+        
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.failed_login_attempts, 0)
+        
+        call_command('flush_login_failures', stdout=io.StringIO())
+        
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.failed_login_attempts, LoginThrottle.LOCKOUT_THRESHOLD)
+        self.assertIsNotNone(self.user.account_locked_until)
+        
+        # Already flushed failures are not applied twice
+        self.assertEqual(LoginThrottle.flush_failures()['failures_flushed'], 0)
+        
+    def test_account_locked_at_threshold_without_flush(self):
+        """Test the failure that reaches the threshold locks the account straight away"""
+        from .throttling import LoginThrottle
+        
+        for _ in range(LoginThrottle.LOCKOUT_THRESHOLD - 1):
+            LoginThrottle.record_failure('10.0.0.1', 'throttled@test.com')
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.account_locked_until)
+        
+        LoginThrottle.record_failure('10.0.0.1', ' Throttled@Test.com ')
+        
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.account_locked_until)
+        self.assertFalse(self.user.can_login()[0])
+        
+    def test_flush_matches_emails_case_insensitively(self):
+        """Test failures logged with differently written emails count towards the account"""
+        from .throttling import LoginThrottle
+        
+        LoginThrottle.record_failure('10.0.0.1', 'Throttled@Test.com')
+        LoginThrottle.record_failure('10.0.0.2', ' throttled@test.com')
+        
+        self.assertEqual(LoginThrottle.flush_failures()['accounts_updated'], 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.failed_login_attempts, 2)
+        
+    def test_flush_waits_for_entries_still_being_written(self):
+        """Test a failure whose log entry is not written yet is flushed by a later run"""
+        import time
+        from django.core.cache import cache
+        from .throttling import LoginThrottle
+        
+        LoginThrottle.record_failure('10.0.0.1', 'throttled@test.com')
+        # Sequence number claimed, entry not yet written
+        seq = cache.incr(LoginThrottle.FAILURE_SEQ_KEY)
+        
+        self.assertEqual(LoginThrottle.flush_failures()['failures_flushed'], 1)
+        
+        cache.set(f'login_failure:{seq}', (time.time(), '10.0.0.1', 'throttled@test.com'), LoginThrottle.FAILURE_LOG_TIMEOUT)
+        self.assertEqual(LoginThrottle.flush_failures()['failures_flushed'], 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.failed_login_attempts, 2)
+        
+    def test_flush_resumes_after_sequence_restarts(self):
+        """Test failures logged after the sequence key was evicted are still flushed"""
+        from django.core.cache import cache
+        from .throttling import LoginThrottle
+        
+        for _ in range(3):
+            LoginThrottle.record_failure('10.0.0.1', 'throttled@test.com')
+        self.assertEqual(LoginThrottle.flush_failures()['failures_flushed'], 3)
+        
+        cache.delete(LoginThrottle.FAILURE_SEQ_KEY)
+        LoginThrottle.record_failure('10.0.0.1', 'throttled@test.com')
+        self.assertEqual(LoginThrottle.flush_failures()['failures_flushed'], 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.failed_login_attempts, 4)
+        
+    def test_per_process_cache_disables_throttle(self):
+        """Test without a shared cache logins are not throttled and failures reach the account at once"""
+        from .throttling import LoginThrottle
+        
+        with patch('authentication.throttling.is_shared_cache', return_value=False):
+            for _ in range(LoginThrottle.ACCOUNT_LIMIT):
+                self.assertEqual(self._login().status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(self._login(email='other@test.com').status_code, status.HTTP_401_UNAUTHORIZED)
+            
+            self.user.refresh_from_db()
+            self.assertEqual(self.user.failed_login_attempts, LoginThrottle.ACCOUNT_LIMIT)
+            self.assertIsNotNone(self.user.account_locked_until)
+            self.assertEqual(LoginThrottle.flush_failures()['failures_flushed'], 0)
+        
+    def test_anomaly_detection_reads_failure_counters(self):
+        """Test suspicious IPs are detected from the throttle's failure counters"""
+        from admin_system.services import AnomalyDetectionService
+        
+        for _ in range(6):
+            self._login(email='someone@test.com', ip='10.9.9.9')
+        
+        with patch('admin_system.services.AnomalyDetectionService.send_critical_anomaly_notifications'):
+            anomalies = AnomalyDetectionService.detect_anomalies()
+        
+        self.assertTrue(any(
+            anomaly['type'] == 'Suspicious Login Activity' and '10.9.9.9' in anomaly['description']
+            for anomaly in anomalies
+        ))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'profile-summary-tests'}})
+class ProfileSummaryTest(APITestCase):
+    """Test get_my_profile reads counts from the cached profile summary"""
+    
+    def setUp(self):
+        """Set up test data"""
+        from django.core.cache import cache
+        
+        cache.clear()
+        # conftest patches post_save.send out, the profile creation and summary receivers must run here
+        signals = patch.object(post_save, 'send', partial(Signal.send, post_save))
+        signals.start()
+        self.addCleanup(signals.stop)
+        self.customer_user = User.objects.create_user(
+            email='summary@test.com',
+            username='summary@test.com',
+            password='TestPass123!',
+            user_type='customer'
+        )
+        self.providers = []
+        for number in range(12):
+            provider_user = User.objects.create_user(
+                email=f'summary-provider{number}@test.com',
+                username=f'summary-provider{number}@test.com',
+                password='TestPass123!',
+                user_type='provider'
+            )
+            self.providers.append(provider_user.provider_profile)
+        self.client.force_authenticate(user=self.customer_user)
+        
+    def _complete_order(self, quantity, amount):
+        from interactions.models import Interaction, Order
+        
+        interaction = Interaction.objects.create(
+            interaction_type='Purchase',
+            quantity=quantity,
+            total_amount=Decimal(amount),
+            status='completed',
+            user=self.customer_user,
+            business=self.providers[0]
+        )
+        return Order.objects.create(
+            interaction=interaction,
+            status='completed',
+            pickup_window='17:00-19:00',
+            pickup_code='ABC123'
+        )
+        
+    def test_summary_refreshed_by_order_and_follow_events(self):
+        """Test orders and follows invalidate the cached summary"""
+        from notifications.models import BusinessFollower
+        
+        response = self.client.get('/auth/profile/me/')
+        self.assertEqual(response.data['order_statistics']['completed_orders'], 0)
+        
+        self._complete_order(quantity=3, amount='45.00')
+        BusinessFollower.objects.create(user=self.customer_user, business=self.providers[1])
+        
+        response = self.client.get('/auth/profile/me/')
+        self.assertEqual(response.data['order_statistics']['completed_orders'], 1)
+        self.assertEqual(response.data['impact_statistics']['meals_rescued_this_month'], 3)
+        self.assertEqual(response.data['impact_statistics']['total_co2_prevented_kg'], 3.9)
+        self.assertEqual(response.data['impact_statistics']['money_saved_this_month'], 45.0)
+        self.assertEqual(response.data['followed_businesses']['count'], 1)
+        
+    def test_profile_queries_do_not_grow_with_history(self):
+        """Test a warm profile load runs the same queries however many follows and orders exist"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from notifications.models import BusinessFollower
+        
+        self.client.get('/auth/profile/me/')
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/auth/profile/me/')
+        
+        for provider in self.providers:
+            BusinessFollower.objects.create(user=self.customer_user, business=provider)
+        for _ in range(5):
+            self._complete_order(quantity=1, amount='10.00')
+        
+        self.client.get('/auth/profile/me/')
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/auth/profile/me/')
+        
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+        self.assertEqual(response.data['followed_businesses']['count'], 12)
+        self.assertEqual(len(response.data['followed_businesses']['businesses']), 10)
+        self.assertIsNotNone(response.data['followed_businesses']['next'])
+        
+        response = self.client.get('/auth/profile/me/following/', {'page': 2})
+        self.assertEqual(len(response.data['businesses']), 2)
+        self.assertEqual(response.data['pagination']['total_count'], 12)
+        
+    def test_followed_businesses_pagination_validated(self):
+        """Test non-numeric pagination is rejected and out of range values are clamped"""
+        from notifications.models import BusinessFollower
+        
+        for provider in self.providers[:3]:
+            BusinessFollower.objects.create(user=self.customer_user, business=provider)
+        
+        response = self.client.get('/auth/profile/me/following/', {'page': 'two'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error']['code'], 'INVALID_PARAMETERS')
+        
+        response = self.client.get('/auth/profile/me/following/', {'page': -1, 'limit': 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['pagination']['current_page'], 1)
+        self.assertEqual(response.data['pagination']['limit'], 1)
+        self.assertEqual(response.data['pagination']['total_pages'], 3)
+        self.assertEqual(len(response.data['businesses']), 1)
+        
+        response = self.client.get('/auth/profile/me/following/', {'limit': 1000})
+        self.assertEqual(response.data['pagination']['limit'], 100)
+        self.assertEqual(len(response.data['businesses']), 3)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'platform-stats-tests'}})
+class PlatformStatsTest(APITestCase):
+    """Test the home page stats are served from the stats cache"""
+    
+    def setUp(self):
+        """Set up test data"""
+        from django.core.cache import cache
+        
+        cache.clear()
+        for number in range(3):
+            User.objects.create_user(
+                email=f'stats{number}@test.com',
+                username=f'stats{number}@test.com',
+                password='TestPass123!',
+                user_type='customer'
+            )
+        
+    def test_refreshed_stats_served_without_queries(self):
+        """Test stats come from the cache and follow user creation"""
+        from django.core.management import call_command
+        
+        call_command('refresh_platform_stats', stdout=io.StringIO())
+        
+        with self.assertNumQueries(0):
+            response = self.client.get('/auth/stats/summary/')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_users'], 3)
+        self.assertEqual(response.data['total_orders'], 0)
+        self.assertEqual(response.data['meals_saved'], 0)
+        
+        # conftest patches post_save.send out, let the counting receiver run for this user
+        with patch.object(post_save, 'send', partial(Signal.send, post_save)):
+            User.objects.create_user(
+                email='stats-new@test.com',
+                username='stats-new@test.com',
+                password='TestPass123!',
+                user_type='customer'
+            )
+        
+        with self.assertNumQueries(0):
+            response = self.client.get('/auth/stats/summary/')
+        self.assertEqual(response.data['total_users'], 4)
+        
+    def test_cold_cache_seeds_stats_once(self):
+        """Test a cold cache is seeded from estimates and one aggregate, without waiting for a refresh"""
+        response = self.client.get('/auth/stats/summary/')
+        self.assertEqual(response.data['total_users'], 3)
+        self.assertEqual(response.data['meals_saved'], 0)
+        self.assertEqual(response.data['total_donations'], 0)
+        
+        with self.assertNumQueries(0):
+            self.client.get('/auth/stats/summary/')
+        
+    def test_concurrent_miss_serves_last_aggregates(self):
+        """Test requests missing the aggregates while another recomputes them serve the last values"""
+        from django.core.cache import cache
+        from django.core.management import call_command
+        from .platform_stats import AGGREGATE_LOCK_KEY, STAT_KEY
+        
+        call_command('refresh_platform_stats', stdout=io.StringIO())
+        cache.delete_many([STAT_KEY.format('meals_saved'), STAT_KEY.format('total_donations')])
+        cache.add(AGGREGATE_LOCK_KEY, 1)
+        
+        with self.assertNumQueries(0):
+            response = self.client.get('/auth/stats/summary/')
+        self.assertEqual(response.data['meals_saved'], 0)
+        self.assertEqual(response.data['total_donations'], 0)
+        
+        cache.delete(AGGREGATE_LOCK_KEY)
+        with self.assertNumQueries(1):
+            self.client.get('/auth/stats/summary/')
+        
+    def test_stats_recomputed_after_expiry(self):
+        """Test cached stats expire, so changes the signals missed show up without a refresh job"""
+        import time
+        from django.core.management import call_command
+        from .platform_stats import PLATFORM_STATS_TIMEOUT
+        
+        call_command('refresh_platform_stats', stdout=io.StringIO())
+        User.objects.bulk_create([User(email='bulk@test.com', username='bulk@test.com', user_type='customer')])
+        self.assertEqual(self.client.get('/auth/stats/summary/').data['total_users'], 3)
+        
+        expired = time.time() + PLATFORM_STATS_TIMEOUT + 1
+        with patch('django.core.cache.backends.locmem.time.time', return_value=expired):
+            response = self.client.get('/auth/stats/summary/')
+        self.assertEqual(response.data['total_users'], 4)
+
+
 class SerializerTest(TestCase):
     """Test serializers comprehensively"""
     
@@ -0,0 +1,256 @@
+# authentication/throttling.py
+
+import hashlib
+import time
+from collections import Counter
+from itertools import groupby
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .user_cache import is_shared_cache
+
+User = get_user_model()
+
+
+class LoginThrottle:
+    """
+    Cache-backed brute-force protection for the login endpoints.
+
+    Failed logins are counted per client IP and per account in a sliding
+    window (the current fixed window plus a weighted share of the previous
+    one), so a throttled request is rejected before any password hashing.
+    An account is locked as soon as its window count reaches
+    LOCKOUT_THRESHOLD. Each failure is also appended to a short-lived failure
+    log in the cache. flush_failures(), run every minute or so by the
+    flush_login_failures command or task, applies the log to
+    User.failed_login_attempts in a few bulk updates instead of one write per
+    failed attempt, and AnomalyDetectionService reads per-IP counts from it.
+
+    The counters and the log only work when every process sees them, so with
+    a per-process cache (no REDIS_URL) the throttle is disabled: check()
+    lets every attempt through and record_failure() writes each failure to
+    the account straight away, as User.increment_failed_login did.
+    """
+
+    WINDOW_SECONDS = 15 * 60
+    ACCOUNT_LIMIT = 5
+    IP_LIMIT = 20
+
+    # Matches User.increment_failed_login
+    LOCKOUT_THRESHOLD = 5
+    LOCKOUT_MINUTES = 30
+
+    FAILURE_LOG_TIMEOUT = 24 * 60 * 60
+    # Longest a failure may take between claiming its sequence number and writing its log entry
+    IN_FLIGHT_SECONDS = 60
+    FAILURE_LOG_MAX_SCAN = 10000
+    FLUSH_BATCH_SIZE = 500
+
+    FAILURE_SEQ_KEY = 'login_failure_seq'
+    FLUSHED_SEQ_KEY = 'login_failure_flushed_seq'
+
+    @staticmethod
+    def is_enabled():
+        """Whether the default cache is shared by every process, which the counters rely on"""
+        return is_shared_cache(caches['default'])
+
+    @staticmethod
+    def _normalize_email(email):
+        return (email or '').strip().lower()
+
+    @classmethod
+    def _counter_key(cls, scope, value, window):
+        digest = hashlib.sha1(value.encode()).hexdigest()
+        return f'login_throttle:{scope}:{digest}:{window}'
+
+    @classmethod
+    def _scopes(cls, ip, email):
+        scopes = [('account', cls._normalize_email(email), cls.ACCOUNT_LIMIT)]
+        if ip:
+            scopes.append(('ip', ip, cls.IP_LIMIT))
+        return scopes
+
+    @classmethod
+    def failure_count(cls, scope, value, now=None):
+        """Failures for an IP ('ip') or account ('account') within the sliding window"""
+        now = time.time() if now is None else now
+        window, offset = divmod(now, cls.WINDOW_SECONDS)
+        window = int(window)
+        counts = cache.get_many([
+            cls._counter_key(scope, value, window),
+            cls._counter_key(scope, value, window - 1),
+        ])
+        current = counts.get(cls._counter_key(scope, value, window), 0)
+        previous = counts.get(cls._counter_key(scope, value, window - 1), 0)
+        return current + previous * (1 - offset / cls.WINDOW_SECONDS)
+
+    @classmethod
+    def check(cls, ip, email):
+        """Seconds until another attempt is allowed, or 0 if the attempt may proceed"""
+        if not cls.is_enabled():
+            return 0
+        now = time.time()
+        for scope, value, limit in cls._scopes(ip, email):
+            if value and cls.failure_count(scope, value, now) >= limit:
+                return int(cls.WINDOW_SECONDS - now % cls.WINDOW_SECONDS) + 1
+        return 0
+
+    @classmethod
+    def record_failure(cls, ip, email):
+        """
+        Count a failed attempt for the IP and account, lock the account once it
+        reaches LOCKOUT_THRESHOLD and append the attempt to the failure log
+        """
+        email = cls._normalize_email(email)
+        if not cls.is_enabled():
+            if email:
+                cls._apply_failures({email: 1})
+            return
+
+        now = time.time()
+        window = int(now // cls.WINDOW_SECONDS)
+        for scope, value, limit in cls._scopes(ip, email):
+            if not value:
+                continue
+            key = cls._counter_key(scope, value, window)
+            if not cache.add(key, 1, cls.WINDOW_SECONDS * 2):
+                try:
+                    cache.incr(key)
+                except ValueError:
+                    cache.set(key, 1, cls.WINDOW_SECONDS * 2)
+
+        if email and cls.failure_count('account', email, now) >= cls.LOCKOUT_THRESHOLD:
+            cls.lock_account(email)
+
+        if not cache.add(cls.FAILURE_SEQ_KEY, 1, None):
+            try:
+                seq = cache.incr(cls.FAILURE_SEQ_KEY)
+            except ValueError:
+                cache.set(cls.FAILURE_SEQ_KEY, 1, None)
+                seq = 1
+        else:
+            seq = 1
+        if seq == 1:
+            # The sequence (re)started, so a flush position left from before is meaningless
+            cache.set(cls.FLUSHED_SEQ_KEY, 0, None)
+        cache.set(f'login_failure:{seq}', (now, ip, email), cls.FAILURE_LOG_TIMEOUT)
+
+    @classmethod
+    def _accounts(cls, emails):
+        return User.objects.annotate(normalized_email=Lower('email')).filter(normalized_email__in=emails)
+
+    @classmethod
+    def lock_account(cls, email):
+        """Lock an account for LOCKOUT_MINUTES unless it is already locked"""
+        now = timezone.now()
+        return cls._accounts([cls._normalize_email(email)]).filter(
+            Q(account_locked_until__isnull=True) | Q(account_locked_until__lte=now)
+        ).update(account_locked_until=now + timezone.timedelta(minutes=cls.LOCKOUT_MINUTES))
+
+    @classmethod
+    def reset_account(cls, email):
+        """Clear an account's window counters after a successful login"""
+        email = cls._normalize_email(email)
+        window = int(time.time() // cls.WINDOW_SECONDS)
+        cache.delete_many([
+            cls._counter_key('account', email, window),
+            cls._counter_key('account', email, window - 1),
+        ])
+
+    @classmethod
+    def _failure_entries(cls, first_seq, last_seq):
+        """Yield (seq, entry) for the logged failures in [first_seq, last_seq] still in the cache"""
+        for start in range(first_seq, last_seq + 1, cls.FLUSH_BATCH_SIZE):
+            keys = [f'login_failure:{seq}' for seq in range(start, min(start + cls.FLUSH_BATCH_SIZE, last_seq + 1))]
+            entries = cache.get_many(keys)
+            for key in keys:
+                if key in entries:
+                    yield int(key.rsplit(':', 1)[1]), entries[key]
+
+    @classmethod
+    def failures_by_ip(cls, since):
+        """Failed login counts per IP since the given datetime, read from the failure log"""
+        if not cls.is_enabled():
+            return Counter()
+        last_seq = cache.get(cls.FAILURE_SEQ_KEY, 0)
+        first_seq = max(1, last_seq - cls.FAILURE_LOG_MAX_SCAN + 1)
+        since_ts = since.timestamp()
+        return Counter(
+            ip for _, (timestamp, ip, email) in cls._failure_entries(first_seq, last_seq)
+            if ip and timestamp >= since_ts
+        )
+
+    @classmethod
+    def flush_failures(cls):
+        """
+        Apply logged failures to User.failed_login_attempts and lock accounts
+        that reached LOCKOUT_THRESHOLD. Does nothing when the throttle is
+        disabled, as failures are then applied when they happen.
+        """
+        nothing_flushed = {'failures_flushed': 0, 'accounts_updated': 0, 'accounts_locked': 0}
+        if not cls.is_enabled():
+            return nothing_flushed
+
+        last_seq = cache.get(cls.FAILURE_SEQ_KEY, 0)
+        flushed_seq = cache.get(cls.FLUSHED_SEQ_KEY, 0)
+        if flushed_seq > last_seq:
+            # The sequence was evicted and restarted before any failure reset the flush position
+            flushed_seq = 0
+        if last_seq <= flushed_seq:
+            return nothing_flushed
+
+        first_seq = max(flushed_seq + 1, last_seq - cls.FAILURE_LOG_MAX_SCAN + 1)
+        entries = dict(cls._failure_entries(first_seq, last_seq))
+
+        # A failure claims its sequence number before writing its entry. Stop
+        # before a missing entry that may still be written; one followed by an
+        # entry older than IN_FLIGHT_SECONDS has expired or been evicted instead.
+        cutoff = time.time() - cls.IN_FLIGHT_SECONDS
+        settled_seq = max((seq for seq, (timestamp, _, _) in entries.items() if timestamp < cutoff), default=0)
+        pending = [seq for seq in range(max(first_seq, settled_seq + 1), last_seq + 1) if seq not in entries]
+        if pending:
+            last_seq = pending[0] - 1
+
+        failures = Counter(
+            cls._normalize_email(email) for seq, (timestamp, ip, email) in entries.items()
+            if email and seq <= last_seq
+        )
+
+        accounts_updated, accounts_locked = cls._apply_failures(failures)
+        cache.set(cls.FLUSHED_SEQ_KEY, last_seq, None)
+
+        return {
+            'failures_flushed': sum(failures.values()),
+            'accounts_updated': accounts_updated,
+            'accounts_locked': accounts_locked,
+        }
+
+    @classmethod
+    def _apply_failures(cls, failures):
+        """
+        Add new failure counts (normalized email -> count) to the accounts and
+        lock those that reached LOCKOUT_THRESHOLD. Accounts with the same
+        number of new failures are updated together. Returns (accounts
+        updated, accounts locked).
+        """
+        accounts_updated = accounts_locked = 0
+        now = timezone.now()
+        with transaction.atomic():
+            by_count = sorted(failures.items(), key=lambda item: item[1])
+            for count, group in groupby(by_count, key=lambda item: item[1]):
+                accounts_updated += cls._accounts(
+                    [email for email, _ in group]
+                ).update(failed_login_attempts=F('failed_login_attempts') + count)
+
+            if failures:
+                accounts_locked = cls._accounts(list(failures)).filter(
+                    Q(account_locked_until__isnull=True) | Q(account_locked_until__lte=now),
+                    failed_login_attempts__gte=cls.LOCKOUT_THRESHOLD
+                ).update(account_locked_until=now + timezone.timedelta(minutes=cls.LOCKOUT_MINUTES))
+
+        return accounts_updated, accounts_locked
@@ -37,6 +37,7 @@ urlpatterns = [
     path('auth/profile/me/', views.get_my_profile, name='get_my_profile'),
     path('auth/profile/me/update/', views.update_my_profile, name='update_my_profile'),
     path('auth/profile/me/orders/', views.get_order_history, name='get_order_history'),
+    path('auth/profile/me/following/', views.get_my_followed_businesses, name='get_my_followed_businesses'),
 
     # Business profile endpoints (existing)
     path('auth/business/<uuid:business_id>/', views.get_business_profile, name='get_business_profile'),
@@ -63,6 +64,7 @@ urlpatterns = [
     path('auth/providers/', views.get_food_providers, name='get_food_providers'),
     path('auth/providers/<uuid:provider_id>/', views.get_food_provider_by_id, name='get_food_provider_by_id'),
     path('auth/providers/locations/', views.get_food_providers_locations, name='get_food_providers_locations'),
+    path('auth/providers/tiles/<int:z>/<int:x>/<int:y>/', views.get_food_provider_tile, name='get_food_provider_tile'),
 
     # NEW: Enhanced business profile management endpoints
     path('auth/business/profile/update/', views.update_business_profile, name='update_business_profile'),
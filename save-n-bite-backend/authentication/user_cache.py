@@ -0,0 +1,135 @@
+# authentication/user_cache.py
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+User = get_user_model()
+
+# The profile relations resolved together with the user, in one query
+PROFILE_RELATIONS = ('customer_profile', 'ngo_profile', 'provider_profile')
+
+USER_VERSION_KEY = 'auth_user_version:{}'
+USER_ENTRY_KEY = 'auth_user:{}:{}'
+
+
+def _timeout():
+    return getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 30)
+
+
+def _shared_cache():
+    return caches[getattr(settings, 'AUTH_USER_CACHE_ALIAS', 'default')]
+
+
+def is_shared_cache(cache):
+    """Whether a cache is seen by every process, unlike the per-process memory and dummy backends"""
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+class _LRUCache:
+    """Size-bounded, per-process LRU of pickled users with a TTL per entry"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            entry_version, expires_at, data = entry
+            if entry_version != version or expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return data
+
+    def set(self, user_id, version, data):
+        with self._lock:
+            self._entries[user_id] = (version, time.monotonic() + _timeout(), data)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > getattr(settings, 'AUTH_USER_CACHE_SIZE', 1024):
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_local_users = _LRUCache()
+
+
+def get_user_version(user_id):
+    """Current version stamp of a user, shared by every process through the cache"""
+    shared_cache = _shared_cache()
+    key = USER_VERSION_KEY.format(user_id)
+    version = shared_cache.get(key)
+    if version is None:
+        shared_cache.add(key, 1, None)
+        version = shared_cache.get(key, 1)
+    return version
+
+
+def invalidate_user(user_id):
+    """Drop every cached copy of a user by moving to a new version stamp"""
+    user_id = str(user_id)
+    _local_users.discard(user_id)
+    shared_cache = _shared_cache()
+    key = USER_VERSION_KEY.format(user_id)
+    try:
+        shared_cache.incr(key)
+    except ValueError:
+        shared_cache.set(key, 2, None)
+
+
+def _load_user(user_id):
+    return User.objects.select_related(*PROFILE_RELATIONS).get(UserID=user_id)
+
+
+def get_cached_user(user_id):
+    """
+    Return the user with their profile already resolved.
+
+    Users are kept pickled in a per-process LRU and in the configured cache.
+    Entries are keyed on the user's version stamp, which is bumped whenever
+    the user or their profile is saved, so a stale copy is never served after
+    a change; the TTL bounds staleness from queryset updates that bypass
+    signals. Version bumps only reach other workers through a shared cache
+    (REDIS_URL), so with a per-process cache every lookup reads the database,
+    and a deactivated user or a changed password takes effect at once.
+    Every call returns a fresh instance, so callers may modify it freely.
+    Raises User.DoesNotExist like a normal lookup.
+    """
+    user_id = str(user_id)
+    if _timeout() <= 0 or not is_shared_cache(_shared_cache()):
+        return _load_user(user_id)
+
+    version = get_user_version(user_id)
+    data = _local_users.get(user_id, version)
+
+    if data is None:
+        shared_cache = _shared_cache()
+        entry_key = USER_ENTRY_KEY.format(user_id, version)
+        data = shared_cache.get(entry_key)
+        if data is None:
+            data = pickle.dumps(_load_user(user_id), pickle.HIGHEST_PROTOCOL)
+            shared_cache.set(entry_key, data, _timeout())
+        _local_users.set(user_id, version, data)
+
+    return pickle.loads(data)
+
+
+def clear_local_user_cache():
+    _local_users.clear()
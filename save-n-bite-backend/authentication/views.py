@@ -11,7 +11,10 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth import authenticate, login
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Sum, Q, Avg
+from django.db.models import Count, Sum, Q, Avg, Exists, OuterRef, Value
+from django.core.cache import cache
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
 from django.utils import timezone
 from decimal import Decimal
 from rest_framework.response import Response
@@ -33,6 +36,9 @@ from .serializers import (
     DeleteAccountSerializer
 )
 from .models import User, FoodProviderProfile, CustomerProfile, NGOProfile
+from .throttling import LoginThrottle
+from .profile_summary import get_profile_summary
+from . import platform_stats
 from interactions.models import Interaction, Order
 from reviews.models import Review
 from notifications.models import BusinessFollower
@@ -192,6 +198,11 @@ def login_user(request):
             }
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    # Rejected before any password hashing
+    throttled = login_throttled_response(request, email)
+    if throttled:
+        return throttled
+    
     try:
         # Try to authenticate the user
         user = authenticate(request, username=email, password=password)
@@ -207,6 +218,8 @@ def login_user(request):
                     }
                 }, status=status.HTTP_401_UNAUTHORIZED)
             
+            LoginThrottle.reset_account(email)
+            
             # Generate tokens
             tokens = get_tokens_for_user(user)
             user_serializer = UserProfileSerializer(user)
@@ -220,6 +233,7 @@ def login_user(request):
         
         else:
             # Authentication failed - invalid credentials
+            LoginThrottle.record_failure(get_client_ip(request), email)
             return Response({
                 'error': {
                     'code': 'AUTHENTICATION_ERROR',
@@ -430,16 +444,12 @@ def get_business_profile(request, business_id):
         
         profile = business_user.provider_profile
         
-        # Get follower count and recent listings count
+        # Follower and active listing counts are maintained on the profile
+        follower_count = profile.follower_count
+        active_listings_count = profile.active_listing_count
+        
         try:
             from notifications.models import BusinessFollower
-            from food_listings.models import FoodListing
-            
-            follower_count = BusinessFollower.objects.filter(business=profile).count()
-            active_listings_count = FoodListing.objects.filter(
-                provider=business_user, 
-                status='active'
-            ).count()
             
             # Check if current user is following (if authenticated)
             is_following = False
@@ -450,8 +460,6 @@ def get_business_profile(request, business_id):
                 ).exists()
                 
         except:
-            follower_count = 0
-            active_listings_count = 0
             is_following = False
         
         business_data = {
@@ -507,20 +515,12 @@ def search_businesses(request):
         
         business_list = []
         for business in businesses:
-            try:
-                from notifications.models import BusinessFollower
-                follower_count = BusinessFollower.objects.filter(
-                    business=business.provider_profile
-                ).count()
-            except:
-                follower_count = 0
-                
             business_list.append({
                 'id': str(business.id),
                 'business_name': business.provider_profile.business_name,
                 'business_address': business.provider_profile.business_address,
                 'logo': business.provider_profile.logo.url if business.provider_profile.logo else None,
-                'follower_count': follower_count
+                'follower_count': business.provider_profile.follower_count
             })
         
         return Response({
@@ -542,18 +542,25 @@ def search_businesses(request):
 def get_platform_stats(request):
     """Return simple platform-wide stats for the Home page.
 
+    Served from the platform stats cache (see authentication.platform_stats),
+    so anonymous home page traffic scans a table at most once per cache
+    timeout, in a single request.
+
     Response format:
     {
         "total_users": <int>,
-        "total_orders": <int>
+        "total_orders": <int>,
+        "meals_saved": <int>,
+        "total_donations": <int>
     }
     """
     try:
-        total_users = User.objects.count()
-        total_orders = Order.objects.count()
+        stats = platform_stats.get_platform_stats()
         return Response({
-            'total_users': int(total_users),
-            'total_orders': int(total_orders),
+            'total_users': int(stats['total_users']),
+            'total_orders': int(stats['total_orders']),
+            'meals_saved': stats['meals_saved'],
+            'total_donations': stats['total_donations'],
         }, status=status.HTTP_200_OK)
     except Exception as e:
         #logger.error(f"Failed to compute platform stats: {e}")
@@ -575,6 +582,22 @@ def get_client_ip(request):
         ip = request.META.get('REMOTE_ADDR')
     return ip
 
+def login_throttled_response(request, email):
+    """429 response if the client IP or account has too many recent failed logins, else None"""
+    retry_after = LoginThrottle.check(get_client_ip(request), email)
+    if not retry_after:
+        return None
+    
+    response = Response({
+        'error': {
+            'code': 'TOO_MANY_ATTEMPTS',
+            'message': 'Too many failed login attempts. Please try again later.',
+            'retry_after': retry_after
+        }
+    }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(retry_after)
+    return response
+
 @api_view(['POST'])
 def login_view(request):
     """Enhanced login view with admin functionality support"""
@@ -589,6 +612,11 @@ def login_view(request):
             }
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    # Rejected before any password hashing
+    throttled = login_throttled_response(request, email)
+    if throttled:
+        return throttled
+    
     try:
         user = User.objects.get(email=email)
         
@@ -607,6 +635,7 @@ def login_view(request):
         
         if authenticated_user:
             # Reset failed login attempts
+            LoginThrottle.reset_account(email)
             user.reset_failed_login_attempts()
             
             # Update last login IP
@@ -639,8 +668,8 @@ def login_view(request):
             }, status=status.HTTP_200_OK)
         
         else:
-            # Increment failed login attempts
-            user.increment_failed_login()
+            # Counted in the cache, flushed to failed_login_attempts by flush_login_failures
+            LoginThrottle.record_failure(get_client_ip(request), email)
             
             return Response({
                 'error': {
@@ -650,6 +679,7 @@ def login_view(request):
             }, status=status.HTTP_401_UNAUTHORIZED)
     
     except User.DoesNotExist:
+        LoginThrottle.record_failure(get_client_ip(request), email)
         return Response({
             'error': {
                 'code': 'INVALID_CREDENTIALS',
@@ -877,6 +907,11 @@ def login_with_password_check(request):
             }
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    # Rejected before any password hashing
+    throttled = login_throttled_response(request, email)
+    if throttled:
+        return throttled
+    
     try:
         from django.contrib.auth import get_user_model
         User = get_user_model()
@@ -893,6 +928,8 @@ def login_with_password_check(request):
                     }
                 }, status=status.HTTP_401_UNAUTHORIZED)
             
+            LoginThrottle.reset_account(email)
+            
             # Check for temporary password
             must_change = getattr(user, 'password_must_change', False)
             has_temporary = getattr(user, 'has_temporary_password', False)
@@ -940,6 +977,7 @@ def login_with_password_check(request):
             return Response(response_data, status=status.HTTP_200_OK)
         
         else:
+            LoginThrottle.record_failure(get_client_ip(request), email)
             return Response({
                 'error': {
                     'code': 'INVALID_CREDENTIALS',
@@ -1495,16 +1533,6 @@ def get_food_providers_locations(request):
         for provider_user in providers:
             profile = provider_user.provider_profile
             
-            # Get active listings count for marker
-            try:
-                from food_listings.models import FoodListing
-                active_listings = FoodListing.objects.filter(
-                    provider=provider_user,
-                    status='active'
-                ).count()
-            except:
-                active_listings = 0
-            
             locations_data.append({
                 'id': str(provider_user.UserID),
                 'business_name': profile.business_name,
@@ -1515,7 +1543,7 @@ def get_food_providers_locations(request):
                 },
                 'business_hours': profile.business_hours,
                 'phone_number': profile.phone_number,
-                'active_listings_count': active_listings,
+                'active_listings_count': profile.active_listing_count,
                 'logo': profile.logo.url if profile.logo else None,
                 'openstreetmap_url': profile.openstreetmap_url
             })
@@ -1541,6 +1569,45 @@ def get_food_providers_locations(request):
             }
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_food_provider_tile(request, z, x, y):
+    """
+    Zoom-aware map tile of verified providers (Web Mercator z/x/y scheme).
+    Below CLUSTER_MAX_ZOOM providers are aggregated into grid clusters with
+    counts and centroids; from there on individual markers are returned.
+    """
+    from .map_tiles import MAX_ZOOM, get_provider_tile, get_tile_etag
+    
+    if z > MAX_ZOOM or x >= 2 ** z or y >= 2 ** z:
+        return Response({
+            'error': {
+                'code': 'INVALID_TILE',
+                'message': f'Tile coordinates must satisfy z <= {MAX_ZOOM} and x, y < 2^z'
+            }
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        etag = get_tile_etag(z, x, y)
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = Response(get_provider_tile(z, x, y), status=status.HTTP_200_OK)
+        
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=60)
+        return response
+        
+    except Exception as e:
+        #logger.error(f"Get food provider tile error: {str(e)}")
+        return Response({
+            'error': {
+                'code': 'TILE_FETCH_ERROR',
+                'message': 'Failed to fetch provider map tile',
+                'details': str(e)
+            }
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_my_profile(request):
@@ -1624,62 +1691,23 @@ def get_my_profile(request):
             **profile_data
         }
         
-        # Get order statistics
-        current_month = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        # Get all interactions for this user
-        user_interactions = Interaction.objects.filter(user=user)
-        user_orders = Order.objects.filter(interaction__user=user)
-        
-        # Order statistics
-        completed_orders = user_orders.filter(status='completed').count()
-        cancelled_orders = user_orders.filter(status='cancelled').count()
-        missed_pickups = user_orders.filter(status='missed').count()
-        
-        # This month's orders for impact calculation
-        this_month_orders = user_orders.filter(
-            interaction__created_at__gte=current_month,
-            status='completed'
-        )
-        
-        order_statistics = {
-            'completed_orders': completed_orders,
-            'cancelled_orders': cancelled_orders,
-            'missed_pickups': missed_pickups,
-            'total_orders': completed_orders + cancelled_orders + missed_pickups
-        }
+        # Counts and impact figures come from the cached profile summary
+        summary = get_profile_summary(user)
         
-        # Get businesses they follow (only for customers and NGOs)
+        # Only the first page of each list is embedded, the rest is paginated by its own endpoint
         followed_businesses = []
         if user.user_type in ['customer', 'ngo']:
-            try:
-                following_relationships = BusinessFollower.objects.filter(user=user).select_related(
-                    'business__user'
-                )
-                
-                for follow in following_relationships:
-                    business = follow.business
-                    followed_businesses.append({
-                        'id': str(business.user.UserID),
-                        'business_name': business.business_name,
-                        'business_email': business.business_email,
-                        'logo': business.logo.url if business.logo else None,
-                        'status': business.status,
-                        'followed_since': follow.created_at.strftime('%B %Y'),
-                        'business_address': business.business_address
-                    })
-            except Exception as e:
-                #logger.error(f"Error fetching followed businesses: {str(e)}")
-                followed_businesses = []
-        
-        # Get user's reviews - FIXED: Don't slice before using in other queries
-        all_user_reviews = Review.objects.filter(
+            following_relationships = BusinessFollower.objects.filter(user=user).select_related(
+                'business__user'
+            ).order_by('-created_at')[:PROFILE_LIST_PREVIEW_SIZE]
+            followed_businesses = [
+                serialize_followed_business(follow) for follow in following_relationships
+            ]
+        
+        recent_reviews = Review.objects.filter(
             reviewer=user,
             status__in=['active', 'flagged']
-        ).select_related('business')
-        
-        # Get latest 10 reviews for display
-        recent_reviews = all_user_reviews.order_by('-created_at')[:10]
+        ).select_related('business').order_by('-created_at')[:PROFILE_LIST_PREVIEW_SIZE]
         
         reviews_data = []
         for review in recent_reviews:
@@ -1694,70 +1722,22 @@ def get_my_profile(request):
                 'review_source': review.review_source
             })
         
-        # Calculate impact statistics - FIXED: Don't use sliced querysets in aggregations
-        try:
-            current_month = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            
-            # Get completed orders this month - separate count and sum queries
-            this_month_completed = Order.objects.filter(
-                interaction__user=user,
-                interaction__created_at__gte=current_month,
-                status='completed'
-            )
-            
-            meals_this_month = sum(order.interaction.quantity for order in this_month_completed)
-            money_saved = sum(float(order.interaction.total_amount) for order in this_month_completed)
-            
-            # Get total completed orders - separate query
-            all_completed = Order.objects.filter(
-                interaction__user=user,
-                status='completed'
-            )
-            
-            total_meals = sum(order.interaction.quantity for order in all_completed)
-            
-            impact_statistics = {
-                'meals_rescued_this_month': meals_this_month,
-                'co2_emissions_prevented_kg': round(meals_this_month * 1.3, 1),
-                'total_meals_rescued': total_meals,
-                'total_co2_prevented_kg': round(total_meals * 1.3, 1),
-                'money_saved_this_month': round(money_saved, 2)
-            }
-            
-        except Exception as e:
-            #logger.error(f"Error calculating impact: {str(e)}")
-            impact_statistics = {
-                'meals_rescued_this_month': 0,
-                'co2_emissions_prevented_kg': 0.0,
-                'total_meals_rescued': 0,
-                'total_co2_prevented_kg': 0.0,
-                'money_saved_this_month': 0.0
-            }
-        
-        # Review statistics - FIXED: Use count() instead of len() on sliced queryset
-        review_stats = {
-            'total_reviews': all_user_reviews.count(),
-            'average_rating_given': round(float(
-                all_user_reviews.filter(
-                    general_rating__isnull=False
-                ).aggregate(Avg('general_rating'))['general_rating__avg'] or 0
-            ), 2)
-        }
-        
         # Response data
         response_data = {
             'user_details': user_data,
-            'order_statistics': order_statistics,
+            'order_statistics': summary['order_statistics'],
             'followed_businesses': {
-                'count': len(followed_businesses),
-                'businesses': followed_businesses
+                'count': summary['followed_businesses_count'],
+                'businesses': followed_businesses,
+                'next': '/auth/profile/me/following/?page=2' if summary['followed_businesses_count'] > len(followed_businesses) else None
             },
             'reviews': {
-                'count': len(reviews_data),
+                'count': summary['review_statistics']['total_reviews'],
                 'recent_reviews': reviews_data,
-                'statistics': review_stats
+                'statistics': summary['review_statistics'],
+                'next': '/api/reviews/my-reviews/?page=2' if summary['review_statistics']['total_reviews'] > len(reviews_data) else None
             },
-            'impact_statistics': impact_statistics,
+            'impact_statistics': summary['impact_statistics'],
             'notification_preferences': get_user_notification_preferences(user)
         }
         
@@ -1794,6 +1774,70 @@ def get_user_notification_preferences(user):
         }
 
 
+# Items of each list embedded in get_my_profile
+PROFILE_LIST_PREVIEW_SIZE = 10
+FOLLOWED_BUSINESSES_MAX_LIMIT = 100
+
+
+def serialize_followed_business(follow):
+    """Followed business entry as shown on the profile page"""
+    business = follow.business
+    return {
+        'id': str(business.user.UserID),
+        'business_name': business.business_name,
+        'business_email': business.business_email,
+        'logo': business.logo.url if business.logo else None,
+        'status': business.status,
+        'followed_since': follow.created_at.strftime('%B %Y'),
+        'business_address': business.business_address
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_my_followed_businesses(request):
+    """
+    Get the businesses the current user follows, newest first
+    Supports pagination
+    """
+    user = request.user
+    
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+        limit = int(request.GET.get('limit', PROFILE_LIST_PREVIEW_SIZE))
+    except ValueError as e:
+        return Response({
+            'error': {
+                'code': 'INVALID_PARAMETERS',
+                'message': 'page and limit must be integers',
+                'details': str(e)
+            }
+        }, status=status.HTTP_400_BAD_REQUEST)
+    limit = min(max(limit, 1), FOLLOWED_BUSINESSES_MAX_LIMIT)  # Between 1 and 100
+    
+    follows_query = BusinessFollower.objects.filter(user=user).select_related(
+        'business__user'
+    ).order_by('-created_at')
+    
+    total_count = get_profile_summary(user)['followed_businesses_count']
+    offset = (page - 1) * limit
+    businesses = [serialize_followed_business(follow) for follow in follows_query[offset:offset + limit]]
+    
+    total_pages = (total_count + limit - 1) // limit
+    
+    return Response({
+        'businesses': businesses,
+        'pagination': {
+            'current_page': page,
+            'total_pages': total_pages,
+            'total_count': total_count,
+            'has_next': page < total_pages,
+            'has_previous': page > 1,
+            'limit': limit
+        }
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_order_history(request):
@@ -2054,7 +2098,33 @@ def update_my_profile(request):
                 'details': str(e)
             }
         }, status=status.HTTP_400_BAD_REQUEST)
-    
+
+
+PROVIDER_DIRECTORY_SUMMARY_CACHE_KEY = 'provider_directory_summary'
+PROVIDER_DIRECTORY_SUMMARY_TIMEOUT = 60  # seconds
+
+
+def get_provider_directory_summary():
+    """Summary counts for the provider directory, from one conditional aggregate cached briefly"""
+    summary = cache.get(PROVIDER_DIRECTORY_SUMMARY_CACHE_KEY)
+    if summary is None:
+        summary = User.objects.filter(
+            user_type='provider',
+            provider_profile__status='verified',
+            is_active=True
+        ).aggregate(
+            total_verified_providers=Count('pk'),
+            providers_with_coordinates=Count('pk', filter=Q(
+                provider_profile__latitude__isnull=False,
+                provider_profile__longitude__isnull=False
+            )),
+            providers_with_tags=Count('pk', filter=~Q(provider_profile__business_tags=[])),
+            providers_with_descriptions=Count('pk', filter=~Q(provider_profile__business_description='')),
+        )
+        cache.set(PROVIDER_DIRECTORY_SUMMARY_CACHE_KEY, summary, PROVIDER_DIRECTORY_SUMMARY_TIMEOUT)
+    return summary
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_food_providers(request):
@@ -2063,7 +2133,6 @@ def get_food_providers(request):
     Supports optional filtering and search parameters
     """
     try:
-        from django.db.models import Q, Count
         from django.core.paginator import Paginator
         
         # Start with all verified food providers
@@ -2087,12 +2156,11 @@ def get_food_providers(request):
         # NEW: Filter by business tags
         tags_filter = request.GET.get('tags')
         if tags_filter:
-            # Support multiple tags separated by commas
-            tag_list = [tag.strip().title() for tag in tags_filter.split(',') if tag.strip()]
-            for tag in tag_list:
-                providers_query = providers_query.filter(
-                    provider_profile__business_tags__icontains=tag
-                )
+            # Support multiple tags separated by commas; all must match (GIN-indexed containment)
+            tag_list = tags_filter.split(',')
+            providers_query = providers_query.filter(
+                FoodProviderProfile.tags_filter(tag_list, prefix='provider_profile__')
+            )
         
         # Optional status filter (though we're already filtering for verified)
         status_filter = request.GET.get('status')
@@ -2114,11 +2182,31 @@ def get_food_providers(request):
                 provider_profile__longitude__isnull=False
             )
         
-        # NEW: Filter by profile completeness
+        # NEW: Filter by profile completeness (same rules as has_complete_profile)
         complete_profiles_only = request.GET.get('complete_profiles')
         if complete_profiles_only and complete_profiles_only.lower() == 'true':
-            # This will be checked in the serialization since it's a computed property
-            pass
+            providers_query = providers_query.exclude(
+                Q(provider_profile__business_name='') |
+                Q(provider_profile__business_email='') |
+                Q(provider_profile__business_address='') |
+                Q(provider_profile__business_contact='')
+            ).filter(
+                Q(provider_profile__business_description__regex=r'\S') |
+                ~Q(provider_profile__business_tags=[])
+            )
+        
+        # Follower and active listing counts live on the profile; the rest is annotated
+        # so a page is fetched in one query
+        providers_query = providers_query.annotate(total_listings_count=Count('food_listings'))
+        if request.user.is_authenticated and request.user.user_type in ['customer', 'ngo']:
+            providers_query = providers_query.annotate(
+                is_following=Exists(
+                    BusinessFollower.objects.filter(user=request.user, business=OuterRef('provider_profile'))
+                )
+            )
+        else:
+            providers_query = providers_query.annotate(is_following=Value(False))
+        providers_query = providers_query.order_by('provider_profile__business_name', 'UserID')
         
         # Pagination
         page_size = min(int(request.GET.get('page_size', 50)), 200)  # Max 200 items
@@ -2131,31 +2219,6 @@ def get_food_providers(request):
         for provider_user in page_obj:
             profile = provider_user.provider_profile
             
-            # Skip incomplete profiles if requested
-            if complete_profiles_only and complete_profiles_only.lower() == 'true':
-                if not profile.has_complete_profile():
-                    continue
-            
-            # Get additional stats (follower count, active listings count)
-            try:
-                from notifications.models import BusinessFollower
-                follower_count = BusinessFollower.objects.filter(business=profile).count()
-            except:
-                follower_count = 0
-            
-            try:
-                from food_listings.models import FoodListing
-                active_listings_count = FoodListing.objects.filter(
-                    provider=provider_user,
-                    status='active'
-                ).count()
-                total_listings_count = FoodListing.objects.filter(
-                    provider=provider_user
-                ).count()
-            except:
-                active_listings_count = 0
-                total_listings_count = 0
-            
             # Build provider data - ENHANCED with new fields
             provider_data = {
                 'id': str(provider_user.UserID),
@@ -2184,30 +2247,18 @@ def get_food_providers(request):
                 'openstreetmap_url': profile.openstreetmap_url,
                 
                 # Stats
-                'follower_count': follower_count,
-                'active_listings_count': active_listings_count,
-                'total_listings_count': total_listings_count,
+                'follower_count': profile.follower_count,
+                'active_listings_count': profile.active_listing_count,
+                'total_listings_count': provider_user.total_listings_count,
                 
                 # Account info
                 'joined_date': provider_user.date_joined.isoformat() if hasattr(provider_user, 'date_joined') else None,
                 'last_login': provider_user.last_login.isoformat() if provider_user.last_login else None,
                 
                 # Check if current user is following (if authenticated)
-                'is_following': False  # Will be updated below if user is authenticated
+                'is_following': provider_user.is_following
             }
             
-            # Add follow status if user is authenticated
-            if request.user.is_authenticated and request.user.user_type in ['customer', 'ngo']:
-                try:
-                    from notifications.models import BusinessFollower
-                    is_following = BusinessFollower.objects.filter(
-                        user=request.user,
-                        business=profile
-                    ).exists()
-                    provider_data['is_following'] = is_following
-                except:
-                    pass
-            
             providers_list.append(provider_data)
         
         # Prepare response with pagination info
@@ -2232,33 +2283,7 @@ def get_food_providers(request):
         }
         
         # Add summary stats
-        total_verified_providers = User.objects.filter(
-            user_type='provider',
-            provider_profile__status='verified',
-            is_active=True
-        ).count()
-        
-        response_data['summary'] = {
-            'total_verified_providers': total_verified_providers,
-            'providers_with_coordinates': User.objects.filter(
-                user_type='provider',
-                provider_profile__status='verified',
-                is_active=True,
-                provider_profile__latitude__isnull=False,
-                provider_profile__longitude__isnull=False
-            ).count(),
-            # NEW: Add tag statistics
-            'providers_with_tags': User.objects.filter(
-                user_type='provider',
-                provider_profile__status='verified',
-                is_active=True
-            ).exclude(provider_profile__business_tags=[]).count(),
-            'providers_with_descriptions': User.objects.filter(
-                user_type='provider',
-                provider_profile__status='verified',
-                is_active=True
-            ).exclude(provider_profile__business_description='').count()
-        }
+        response_data['summary'] = get_provider_directory_summary()
         
         return Response(response_data, status=status.HTTP_200_OK)
         
@@ -2297,10 +2322,13 @@ def get_food_provider_by_id(request, provider_id):
         
         profile = provider_user.provider_profile
         
+        # Follower and active listing counts are maintained on the profile
+        follower_count = profile.follower_count
+        active_listings_count = profile.active_listing_count
+        
         # Get additional stats
         try:
             from notifications.models import BusinessFollower
-            follower_count = BusinessFollower.objects.filter(business=profile).count()
             
             # Get list of followers if requested
             include_followers = request.GET.get('include_followers', 'false').lower() == 'true'
@@ -2315,15 +2343,10 @@ def get_food_provider_by_id(request, provider_id):
                         'followed_since': follower.created_at.isoformat()
                     })
         except:
-            follower_count = 0
             followers_list = []
         
         try:
             from food_listings.models import FoodListing
-            active_listings_count = FoodListing.objects.filter(
-                provider=provider_user,
-                status='active'
-            ).count()
             total_listings_count = FoodListing.objects.filter(
                 provider=provider_user
             ).count()
@@ -2349,7 +2372,6 @@ def get_food_provider_by_id(request, provider_id):
                         'created_at': listing.created_at.isoformat()
                     })
         except:
-            active_listings_count = 0
             total_listings_count = 0
             recent_listings = []
         
@@ -2591,8 +2613,8 @@ def get_popular_business_tags(request):
             for tag_data in popular_tags:
                 tag = tag_data['tag']
                 providers_with_tag = FoodProviderProfile.objects.filter(
-                    status='verified',
-                    business_tags__icontains=tag
+                    FoodProviderProfile.tags_filter([tag]),
+                    status='verified'
                 ).values_list('business_name', flat=True)[:5]  # Limit to 5 examples
                 
                 tag_data['example_providers'] = list(providers_with_tag)
@@ -2618,8 +2640,10 @@ def get_popular_business_tags(request):
 def search_providers_by_tags(request):
     """
     Search food providers specifically by their business tags
+    match=all (default) requires every tag, match=any requires at least one
     """
     tags_param = request.GET.get('tags', '').strip()
+    match = 'any' if request.GET.get('match', 'all').lower() == 'any' else 'all'
     
     if not tags_param:
         return Response({
@@ -2640,19 +2664,14 @@ def search_providers_by_tags(request):
                 'total_count': 0
             }, status=status.HTTP_200_OK)
         
-        # Find providers with any of the specified tags
+        # Find providers with the specified tags (GIN-indexed containment)
         providers_query = User.objects.filter(
+            FoodProviderProfile.tags_filter(search_tags, match=match, prefix='provider_profile__'),
             user_type='provider',
             provider_profile__status='verified',
             is_active=True
         ).select_related('provider_profile')
         
-        # Filter by tags
-        for tag in search_tags:
-            providers_query = providers_query.filter(
-                provider_profile__business_tags__icontains=tag
-            )
-        
         # Limit results
         limit = min(int(request.GET.get('limit', 50)), 100)
         providers = providers_query[:limit]
@@ -2661,16 +2680,6 @@ def search_providers_by_tags(request):
         for provider_user in providers:
             profile = provider_user.provider_profile
             
-            # Get active listings count
-            try:
-                from food_listings.models import FoodListing
-                active_listings = FoodListing.objects.filter(
-                    provider=provider_user,
-                    status='active'
-                ).count()
-            except:
-                active_listings = 0
-            
             providers_list.append({
                 'id': str(provider_user.UserID),
                 'business_name': profile.business_name,
@@ -2680,13 +2689,14 @@ def search_providers_by_tags(request):
                 'logo': profile.logo.url if profile.logo else None,
                 'banner': profile.banner.url if profile.banner else None,
                 'coordinates': profile.coordinates,
-                'active_listings_count': active_listings,
+                'active_listings_count': profile.active_listing_count,
                 'matching_tags': [tag for tag in search_tags if tag in profile.get_tag_display()]
             })
         
         return Response({
             'providers': providers_list,
             'search_tags': search_tags,
+            'match': match,
             'total_count': len(providers_list)
         }, status=status.HTTP_200_OK)
         
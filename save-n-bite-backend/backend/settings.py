@@ -125,6 +125,28 @@ DATABASES = {
 }
 
 
+# Cache
+# Per-process memory by default; set REDIS_URL to share cached data (and
+# invalidations) between workers
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+
+# Authenticated users and their profiles are cached for this many seconds (0 disables).
+# Only with a shared cache, which carries their invalidations to every worker
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_CACHE_TIMEOUT', 30 if os.environ.get('REDIS_URL') else 0))
+AUTH_USER_CACHE_SIZE = 1024
+AUTH_USER_CACHE_ALIAS = 'default'
+
+# Monthly Parquet partitions written by export_analytics_data for offline analysis
+ANALYTICS_EXPORT_DIR = os.environ.get('ANALYTICS_EXPORT_DIR', os.path.join(BASE_DIR, 'analytics_exports'))
+
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -4,8 +4,11 @@ from django.contrib import admin
 from django.urls import reverse
 from django.utils.html import format_html
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Count, F
 from .models import BadgeType, ProviderBadge, BadgeLeaderboard, ProviderBadgeStats
+from .batch import rebuild_badge_stats
+from .registry import invalidate_badge_types
 
 
 @admin.register(BadgeType)
@@ -54,12 +57,15 @@ class BadgeTypeAdmin(admin.ModelAdmin):
     def activate_badges(self, request, queryset):
         """Activate selected badges"""
         updated = queryset.update(is_active=True)
+        # update() sends no signals, the badge type registry has to be told
+        transaction.on_commit(invalidate_badge_types)
         self.message_user(request, f'{updated} badges activated.')
     activate_badges.short_description = 'Activate selected badges'
     
     def deactivate_badges(self, request, queryset):
         """Deactivate selected badges"""
         updated = queryset.update(is_active=False)
+        transaction.on_commit(invalidate_badge_types)
         self.message_user(request, f'{updated} badges deactivated.')
     deactivate_badges.short_description = 'Deactivate selected badges'
 
@@ -164,12 +170,16 @@ class ProviderBadgeAdmin(admin.ModelAdmin):
                     badge.save()
                     updated += 1
         
+        # Pinning changes the badge profiles, whose ETags follow the stats
+        rebuild_badge_stats(list(queryset.values_list('provider', flat=True).distinct()))
         self.message_user(request, f'{updated} badges pinned.')
     pin_badges.short_description = 'Pin selected badges'
     
     def unpin_badges(self, request, queryset):
         """Unpin selected badges"""
+        provider_ids = list(queryset.values_list('provider', flat=True).distinct())
         updated = queryset.filter(is_pinned=True).update(is_pinned=False, pin_order=0)
+        rebuild_badge_stats(provider_ids)
         self.message_user(request, f'{updated} badges unpinned.')
     unpin_badges.short_description = 'Unpin selected badges'
 
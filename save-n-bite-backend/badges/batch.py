@@ -0,0 +1,292 @@
+# badges/batch.py
+
+import logging
+import multiprocessing
+from datetime import datetime, timezone as dt_timezone
+
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+
+from interactions.models import Order
+from notifications.models import Notification
+from reviews.models import Review
+
+from .caching import badge_stats_changed
+from .models import ProviderBadge, ProviderBadgeStats
+from .registry import active_badge_types
+from .services import (
+    EARLY_ADOPTER, EARLY_ADOPTER_CUTOFF, MILESTONES, MONTHLY_MIN_ORDERS, MONTHLY_MIN_RATING,
+    MONTHLY_MIN_REVIEWS, PROVIDER_OF_THE_MONTH, RATING_BADGES, badge_stats_aggregates,
+)
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+STATS_COLUMNS = ['total_reviews', 'average_rating', 'monthly_reviews', 'total_orders', 'total_revenue', 'monthly_orders']
+
+
+def month_bounds(year, month):
+    start = datetime(year, month, 1, tzinfo=dt_timezone.utc)
+    return start, start + relativedelta(months=1)
+
+
+def _grouped_frame(rows, columns):
+    return pd.DataFrame.from_records(list(rows), columns=columns).set_index('provider_id')
+
+
+def provider_stats_frame(start, end, provider_ids=None):
+    """
+    Badge statistics of every provider for the month [start, end) as a
+    DataFrame indexed by provider id: totals up to ``end`` and the month's
+    figures, from one query over providers, one GROUP BY over active reviews
+    and one over completed orders.
+    """
+    providers = User.objects.filter(user_type='provider', provider_profile__isnull=False)
+    reviews = Review.objects.filter(status='active', created_at__lt=end)
+    orders = Order.objects.filter(status='completed', interaction__created_at__lt=end)
+    if provider_ids is not None:
+        providers = providers.filter(UserID__in=provider_ids)
+        reviews = reviews.filter(business__user__in=provider_ids)
+        orders = orders.filter(interaction__business__user__in=provider_ids)
+
+    frame = _grouped_frame(providers.values_list('UserID', 'date_joined'), ['provider_id', 'date_joined'])
+    review_stats = _grouped_frame(
+        reviews.values('business__user').annotate(
+            total_reviews=Count('id'),
+            average_rating=Avg('general_rating'),
+            monthly_reviews=Count('id', filter=Q(created_at__gte=start)),
+        ).values_list('business__user', 'total_reviews', 'average_rating', 'monthly_reviews'),
+        ['provider_id', 'total_reviews', 'average_rating', 'monthly_reviews']
+    )
+    order_stats = _grouped_frame(
+        orders.values('interaction__business__user').annotate(
+            total_orders=Count('id'),
+            total_revenue=Sum('interaction__total_amount'),
+            monthly_orders=Count('id', filter=Q(interaction__created_at__gte=start)),
+        ).values_list('interaction__business__user', 'total_orders', 'total_revenue', 'monthly_orders'),
+        ['provider_id', 'total_orders', 'total_revenue', 'monthly_orders']
+    )
+
+    frame = frame.join(review_stats).join(order_stats)
+    frame[STATS_COLUMNS] = frame[STATS_COLUMNS].astype('float64').fillna(0)
+    for column in ('total_reviews', 'monthly_reviews', 'total_orders', 'monthly_orders'):
+        frame[column] = frame[column].astype('int64')
+    return frame
+
+
+def earned_badge_pairs(badge_types, year, month, provider_ids=None):
+    """
+    (provider id, badge type id) of the badges already held: one-time badges
+    whenever they were earned, Provider of the Month only for the given month
+    """
+    earned = ProviderBadge.objects.filter(badge_type__in=list(badge_types.values())).filter(
+        ~Q(badge_type__name=PROVIDER_OF_THE_MONTH) | Q(month=month, year=year)
+    )
+    if provider_ids is not None:
+        earned = earned.filter(provider__in=provider_ids)
+    return set(earned.values_list('provider_id', 'badge_type_id'))
+
+
+def evaluate_badge_rules(stats, badge_types, earned, year, month):
+    """
+    New ProviderBadge rows (unsaved) for every badge rule a provider meets on
+    the stats table, skipping inactive badge types and badges already earned.
+    Thresholds are compared as at least rather than exactly equal, so badges
+    missed by the signal handlers are caught up.
+    """
+    earned_on = timezone.now().isoformat()
+    awards = []
+
+    for name, milestone_type, column, threshold in MILESTONES:
+        convert = float if milestone_type == 'revenue' else int
+        for provider_id, value in stats.loc[stats[column] >= threshold, column].items():
+            awards.append((provider_id, name, {
+                'milestone_type': milestone_type,
+                'threshold': convert(threshold),
+                'achieved_value': convert(value),
+                'earned_date': earned_on,
+            }))
+
+    for name, min_rating, min_reviews in RATING_BADGES:
+        qualified = stats[(stats['average_rating'] >= min_rating) & (stats['total_reviews'] >= min_reviews)]
+        for row in qualified.itertuples():
+            awards.append((row.Index, name, {
+                'rating': float(row.average_rating),
+                'review_count': int(row.total_reviews),
+                'earned_date': earned_on,
+            }))
+
+    monthly = stats[
+        (stats['monthly_orders'] >= MONTHLY_MIN_ORDERS) &
+        (stats['monthly_reviews'] >= MONTHLY_MIN_REVIEWS) &
+        (stats['average_rating'] >= MONTHLY_MIN_RATING)
+    ]
+    for row in monthly.itertuples():
+        awards.append((row.Index, PROVIDER_OF_THE_MONTH, {
+            'monthly_orders': int(row.monthly_orders),
+            'monthly_reviews': int(row.monthly_reviews),
+            'monthly_rating': float(row.average_rating),
+            'month': month,
+            'year': year,
+        }))
+
+    for row in stats[stats['date_joined'] <= EARLY_ADOPTER_CUTOFF].itertuples():
+        awards.append((row.Index, EARLY_ADOPTER, {'registration_date': row.date_joined.isoformat()}))
+
+    badges = []
+    for provider_id, name, badge_data in awards:
+        badge_type = badge_types.get(name)
+        if badge_type is None or (provider_id, badge_type.id) in earned:
+            continue
+        # bulk_create skips ProviderBadge.save, which stamps monthly badges
+        is_monthly = badge_type.category == 'monthly'
+        badges.append(ProviderBadge(
+            provider_id=provider_id,
+            badge_type=badge_type,
+            earned_reason=f"Earned {badge_type.name}: {badge_type.criteria_description}",
+            badge_data=badge_data,
+            month=month if is_monthly else None,
+            year=year if is_monthly else None,
+        ))
+    return badges
+
+
+def rebuild_badge_stats(provider_ids, filter_ids=True):
+    """
+    Recount ProviderBadgeStats for the given providers from one GROUP BY over
+    their badges and write them with batched upserts. Providers without any
+    badge get zeroed rows.
+    """
+    aggregates = badge_stats_aggregates()
+    badges = ProviderBadge.objects.all()
+    if filter_ids:
+        badges = badges.filter(provider__in=provider_ids)
+    figures = {row.pop('provider'): row for row in badges.values('provider').annotate(**aggregates)}
+
+    now = timezone.now()
+    ProviderBadgeStats.objects.bulk_create(
+        [
+            ProviderBadgeStats(provider_id=provider_id, last_calculated_at=now, **figures.get(provider_id, {}))
+            for provider_id in provider_ids
+        ],
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['provider'],
+        update_fields=list(aggregates) + ['last_calculated_at'],
+    )
+    badge_stats_changed()
+
+
+def notify_badges(badges):
+    """One in-app notification per new badge, as BadgeService.send_badge_notification sends them"""
+    Notification.objects.bulk_create(
+        [
+            Notification(
+                recipient_id=badge.provider_id,
+                notification_type='badge_earned',
+                title=f"🏆 Badge Earned: {badge.badge_type.name}!",
+                message=f"Congratulations! You've earned the {badge.badge_type.name} badge. {badge.badge_type.description}",
+                data={
+                    'badge_id': str(badge.id),
+                    'badge_type': badge.badge_type.name,
+                    'badge_category': badge.badge_type.category,
+                    'badge_rarity': badge.badge_type.rarity,
+                    'earned_date': badge.earned_date.isoformat(),
+                    'celebration_worthy': True
+                }
+            )
+            for badge in badges
+        ],
+        batch_size=BATCH_SIZE
+    )
+
+
+def recalculate_badges(provider_ids=None, year=None, month=None, notify=True):
+    """
+    Award every badge the providers (default: all) have earned as of a month
+    (default: the current one) and rebuild their badge statistics, with a
+    fixed number of queries however many providers there are. Returns
+    {'providers_processed', 'badges_awarded', 'new_badges'}.
+    """
+    now = timezone.now()
+    year, month = year or now.year, month or now.month
+    start, end = month_bounds(year, month)
+
+    stats = provider_stats_frame(start, end, provider_ids)
+    badge_types = active_badge_types()
+    earned = earned_badge_pairs(badge_types, year, month, provider_ids)
+    badges = evaluate_badge_rules(stats, badge_types, earned, year, month)
+
+    with transaction.atomic():
+        # Monthly rows conflict on (provider, badge_type, month, year) if a signal handler got there first
+        ProviderBadge.objects.bulk_create(badges, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        if badges:
+            # Ids are generated client-side, so only the rows that were inserted can be found by them
+            inserted = set(ProviderBadge.objects.filter(id__in=[badge.id for badge in badges]).values_list('id', flat=True))
+            badges = [badge for badge in badges if badge.id in inserted]
+        rebuild_badge_stats(list(stats.index), filter_ids=provider_ids is not None)
+        if notify:
+            notify_badges(badges)
+
+    logger.info(f"Badge recalculation for {year}-{month:02d} awarded {len(badges)} badges to {len(stats)} providers")
+    return {
+        'providers_processed': len(stats),
+        'badges_awarded': len(badges),
+        'new_badges': badges,
+    }
+
+
+def _recalculate_partition(provider_ids, year, month, notify):
+    try:
+        results = recalculate_badges(provider_ids, year, month, notify)
+        return {
+            'providers_processed': results['providers_processed'],
+            'badges_awarded': results['badges_awarded'],
+            'errors': [],
+        }
+    except Exception as e:
+        logger.error(f"Badge recalculation failed for a partition of {len(provider_ids)} providers: {str(e)}")
+        return {'providers_processed': 0, 'badges_awarded': 0, 'errors': [str(e)]}
+    finally:
+        connections.close_all()
+
+
+def recalculate_all_badges(workers=1, year=None, month=None, notify=True):
+    """
+    Recalculate badges for every provider. With more than one worker the
+    providers are split into equal partitions, each recalculated in its own
+    process. Returns {'providers_processed', 'badges_awarded', 'errors'}.
+    """
+    now = timezone.now()
+    year, month = year or now.year, month or now.month
+
+    if workers <= 1:
+        results = recalculate_badges(year=year, month=month, notify=notify)
+        results.pop('new_badges')
+        results['errors'] = []
+        return results
+
+    provider_ids = sorted(
+        User.objects.filter(user_type='provider', provider_profile__isnull=False).values_list('UserID', flat=True)
+    )
+    partitions = [provider_ids[i::workers] for i in range(workers) if provider_ids[i::workers]]
+
+    # Forked workers must open their own database connections
+    connections.close_all()
+    with multiprocessing.get_context('fork').Pool(len(partitions) or 1) as pool:
+        partition_results = pool.starmap(
+            _recalculate_partition,
+            [(partition, year, month, notify) for partition in partitions]
+        )
+
+    return {
+        'providers_processed': sum(result['providers_processed'] for result in partition_results),
+        'badges_awarded': sum(result['badges_awarded'] for result in partition_results),
+        'errors': [error for result in partition_results for error in result['errors']],
+    }
@@ -0,0 +1,78 @@
+# badges/caching.py
+
+import hashlib
+
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.utils import timezone
+
+from authentication.user_cache import is_shared_cache
+
+LEADERBOARD_CACHE_TIMEOUT = 60 * 10
+# With a per-process cache other workers never see the version move, so
+# their copy only lasts as long as clients may reuse the response (max-age)
+LOCAL_LEADERBOARD_CACHE_TIMEOUT = 60
+LEADERBOARD_CACHE_VERSION_KEY = 'badge_leaderboard_version'
+
+# The cached leaderboard holds this many providers, every limit is a slice of it
+LEADERBOARD_MAX_LIMIT = 50
+
+
+def get_leaderboard_cache_version():
+    version = cache.get(LEADERBOARD_CACHE_VERSION_KEY)
+    if version is None:
+        cache.add(LEADERBOARD_CACHE_VERSION_KEY, 1, None)
+        version = cache.get(LEADERBOARD_CACHE_VERSION_KEY, 1)
+    return version
+
+
+def invalidate_badge_leaderboard():
+    """Invalidate the cached leaderboard by moving to a new cache version"""
+    try:
+        cache.incr(LEADERBOARD_CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(LEADERBOARD_CACHE_VERSION_KEY, 2, None)
+
+
+def badge_stats_changed():
+    """
+    Invalidate the leaderboard once the current transaction commits, so a
+    request in between cannot cache the old stats under the new version
+    """
+    transaction.on_commit(invalidate_badge_leaderboard)
+
+
+def get_cached_badge_leaderboard(limit):
+    """
+    (rows, generated_at, etag) of the public badge leaderboard's top ``limit``
+    providers. The leaderboard is computed once per cache version, which
+    moves whenever ProviderBadgeStats change; the TTL bounds staleness from
+    business name or verification changes, and from stats changed in another
+    worker when the cache is per-process.
+    """
+    from .services import BadgeService
+
+    version = get_leaderboard_cache_version()
+    cache_key = f'badge_leaderboard:{version}'
+    entry = cache.get(cache_key)
+    if entry is None:
+        entry = {
+            'leaderboard': BadgeService().get_badge_leaderboard(LEADERBOARD_MAX_LIMIT),
+            'generated_at': timezone.now(),
+        }
+        timeout = LEADERBOARD_CACHE_TIMEOUT if is_shared_cache(caches['default']) else LOCAL_LEADERBOARD_CACHE_TIMEOUT
+        cache.set(cache_key, entry, timeout)
+
+    etag = f'"{version}-{entry["generated_at"].timestamp():.0f}-{limit}"'
+    return entry['leaderboard'][:limit], entry['generated_at'], etag
+
+
+def badge_profile_etag(provider, stats, own_profile):
+    """
+    ETag of a provider's badge profile. Badge stats are recalculated whenever
+    a badge is awarded, pinned or unpinned, so their calculation time
+    versions the badge list; the business name is part of the payload too.
+    """
+    calculated_at = stats.last_calculated_at.isoformat() if stats else ''
+    key = f'{provider.UserID}:{calculated_at}:{provider.provider_profile.business_name}:{int(own_profile)}'
+    return f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
@@ -0,0 +1,168 @@
+# badges/leaderboards.py
+
+import logging
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Avg, Count, F, Sum, Window
+from django.db.models.functions import Rank, RowNumber
+from django.utils import timezone
+
+from interactions.models import Order
+from reviews.models import Review
+
+from .batch import month_bounds, notify_badges, rebuild_badge_stats
+from .models import BadgeLeaderboard, ProviderBadge
+from .registry import get_badge_type
+
+logger = logging.getLogger(__name__)
+
+PLACES = ['first', 'second', 'third']
+TOP_N = len(PLACES)
+
+# Minimum rated reviews in the month to enter the rating leaderboard
+MIN_RATING_REVIEWS = 3
+
+# Badges awarded when a leaderboard is finalized, by leaderboard type and place
+PLACE_BADGES = {
+    'rating': [
+        'Top Provider - First Place',
+        'Top Provider - Second Place',
+        'Top Provider - Third Place',
+    ],
+}
+
+
+def _metric_rows(leaderboard_type, start, end):
+    """
+    Per-provider metric for a month as ``value``, with ``volume`` (reviews or
+    orders counted) as the first tie-break
+    """
+    if leaderboard_type in ('rating', 'reviews'):
+        rows = Review.objects.filter(
+            status='active',
+            created_at__gte=start,
+            created_at__lt=end
+        ).values(provider=F('business__user'))
+        if leaderboard_type == 'rating':
+            return rows.filter(general_rating__isnull=False).annotate(
+                value=Avg('general_rating'),
+                volume=Count('id')
+            ).filter(volume__gte=MIN_RATING_REVIEWS)
+        return rows.annotate(value=Count('id'), volume=Count('id'))
+
+    rows = Order.objects.filter(
+        status='completed',
+        interaction__created_at__gte=start,
+        interaction__created_at__lt=end
+    ).values(provider=F('interaction__business__user'))
+    if leaderboard_type == 'revenue':
+        return rows.annotate(value=Sum('interaction__total_amount'), volume=Count('id'))
+    return rows.annotate(value=Count('id'), volume=Count('id'))
+
+
+def top_providers(leaderboard_type, year, month, limit=TOP_N):
+    """
+    The ``limit`` best providers of a leaderboard for a month, in one query:
+    the metric is grouped per provider and ranked with window functions.
+    ``place`` (ROW_NUMBER) is unique, ``rank`` (RANK) is shared by ties.
+    """
+    start, end = month_bounds(year, month)
+    order = [F('value').desc(), F('volume').desc(), F('provider').asc()]
+    return list(
+        _metric_rows(leaderboard_type, start, end).annotate(
+            place=Window(RowNumber(), order_by=order),
+            rank=Window(Rank(), order_by=[F('value').desc()]),
+        ).filter(place__lte=limit).order_by('place').values('provider', 'value', 'rank', 'place')
+    )
+
+
+def build_leaderboard(leaderboard_type, year, month):
+    """
+    Recompute and upsert a month's leaderboard row. Finalized rows are left
+    untouched, their places have already been awarded.
+    """
+    leaderboard = BadgeLeaderboard.objects.filter(leaderboard_type=leaderboard_type, year=year, month=month).first()
+    if leaderboard and leaderboard.is_finalized:
+        return leaderboard
+
+    places = {}
+    entries = top_providers(leaderboard_type, year, month)
+    for place, entry in zip(PLACES, entries + [None] * (TOP_N - len(entries))):
+        places[f'{place}_place_id'] = entry['provider'] if entry else None
+        places[f'{place}_place_value'] = round(Decimal(str(entry['value'])), 2) if entry else None
+
+    leaderboard, _ = BadgeLeaderboard.objects.update_or_create(
+        leaderboard_type=leaderboard_type, year=year, month=month,
+        defaults={**places, 'calculated_at': timezone.now()}
+    )
+    return leaderboard
+
+
+def finalize_leaderboards(leaderboards, notify=True):
+    """
+    Award the place badges of unfinalized leaderboards and mark them
+    finalized, in one transaction. Place badges carry the leaderboard's
+    month, so finalizing again never awards twice. Returns the new badges.
+    """
+    pending = [leaderboard for leaderboard in leaderboards if not leaderboard.is_finalized]
+    badges = []
+    for leaderboard in pending:
+        for place, name in zip(PLACES, PLACE_BADGES.get(leaderboard.leaderboard_type, [])):
+            provider_id = getattr(leaderboard, f'{place}_place_id')
+            badge_type = get_badge_type(name)
+            if provider_id is None or badge_type is None:
+                continue
+            value = getattr(leaderboard, f'{place}_place_value')
+            badges.append(ProviderBadge(
+                provider_id=provider_id,
+                badge_type=badge_type,
+                earned_reason=f"Earned {badge_type.name}: {badge_type.criteria_description}",
+                badge_data={
+                    'leaderboard_type': leaderboard.leaderboard_type,
+                    'place': PLACES.index(place) + 1,
+                    'value': float(value) if value is not None else None,
+                    'month': leaderboard.month,
+                    'year': leaderboard.year,
+                },
+                month=leaderboard.month,
+                year=leaderboard.year,
+            ))
+
+    with transaction.atomic():
+        # A conflict means the place badge was already awarded for that month
+        ProviderBadge.objects.bulk_create(badges, ignore_conflicts=True)
+        BadgeLeaderboard.objects.filter(pk__in=[leaderboard.pk for leaderboard in pending]).update(is_finalized=True)
+        if badges:
+            rebuild_badge_stats(sorted({badge.provider_id for badge in badges}))
+        if notify and badges:
+            notify_badges(badges)
+
+    for leaderboard in pending:
+        leaderboard.is_finalized = True
+    return badges
+
+
+def calculate_leaderboards(year, month, finalize=None, notify=True):
+    """
+    Build every leaderboard type for a month and, once the month is over
+    (or when ``finalize`` is given as True), award their place badges.
+    Returns the leaderboards and the badges awarded.
+    """
+    if finalize is None:
+        finalize = month_bounds(year, month)[1] <= timezone.now()
+
+    leaderboards = [
+        build_leaderboard(leaderboard_type, year, month)
+        for leaderboard_type, _ in BadgeLeaderboard.LEADERBOARD_TYPES
+    ]
+    badges = finalize_leaderboards(leaderboards, notify) if finalize else []
+
+    logger.info(f"Leaderboards for {year}-{month:02d} calculated, {len(badges)} place badges awarded")
+    return leaderboards, badges
+
+
+def previous_month(year, month):
+    previous = month_bounds(year, month)[0] - relativedelta(months=1)
+    return previous.year, previous.month
@@ -1,6 +1,8 @@
 # badges/management/commands/calculate_badges.py
 
-from django.core.management.base import BaseCommand
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 from badges.services import BadgeService, BadgeInitializationService
 import logging
@@ -37,6 +39,17 @@ class Command(BaseCommand):
             action='store_true',
             help='Show debug information about providers',
         )
+        parser.add_argument(
+            '--month',
+            type=str,
+            help='Month to calculate monthly badges for as YYYY-MM (defaults to the current month)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes to split providers across for a full calculation',
+        )
     
     def handle(self, *args, **options):
         start_time = timezone.now()
@@ -54,7 +67,17 @@ class Command(BaseCommand):
                 self.style.SUCCESS(f'Created {created_count} new badge types')
             )
         
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        
         badge_service = BadgeService()
+        if options['month']:
+            try:
+                month = datetime.strptime(options['month'], '%Y-%m')
+            except ValueError:
+                raise CommandError('--month must be in YYYY-MM format')
+            badge_service.current_month = month.month
+            badge_service.current_year = month.year
         
         # Add debug information
         if options['debug'] or (not options['provider_email'] and not options['leaderboards_only']):
@@ -130,8 +153,10 @@ class Command(BaseCommand):
             
             else:
                 # Calculate badges for all providers
-                self.stdout.write('Calculating badges for all providers...')
-                results = badge_service.calculate_all_badges()
+                self.stdout.write(
+                    f'Calculating badges for all providers with {options["workers"]} worker(s)...'
+                )
+                results = badge_service.calculate_all_badges(workers=options['workers'])
                 
                 self.stdout.write(
                     self.style.SUCCESS(
@@ -0,0 +1,112 @@
+# badges/registry.py
+
+import threading
+import time
+
+from django.core.cache import cache, caches
+
+from authentication.user_cache import is_shared_cache
+
+from .models import BadgeType
+
+BADGE_TYPES_VERSION_KEY = 'badge_types_version'
+
+# With a per-process cache other workers never see the version move, so a
+# loaded registry is only trusted this long before it is reloaded
+LOCAL_REGISTRY_TIMEOUT = 60
+
+
+class _BadgeTypeRegistry:
+    """Every badge type, loaded once per process and tagged with the version it was loaded at"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._loaded_at = None
+        self._by_name = {}
+        self._by_category = {}
+
+    def snapshot(self, version, max_age=None):
+        """
+        (by name, active by category) for ``version``, reloading once if the
+        version moved on or the loaded rows are older than ``max_age`` seconds
+        """
+        with self._lock:
+            if self._version == version and (max_age is None or time.monotonic() - self._loaded_at < max_age):
+                return self._by_name, self._by_category
+
+        badge_types = list(BadgeType.objects.all())
+        by_name = {badge_type.name: badge_type for badge_type in badge_types}
+        by_category = {}
+        for badge_type in badge_types:
+            if badge_type.is_active:
+                by_category.setdefault(badge_type.category, []).append(badge_type)
+
+        with self._lock:
+            self._version, self._by_name, self._by_category = version, by_name, by_category
+            self._loaded_at = time.monotonic()
+        return by_name, by_category
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+            self._loaded_at = None
+            self._by_name = {}
+            self._by_category = {}
+
+
+_registry = _BadgeTypeRegistry()
+
+
+def get_badge_types_version():
+    """Current version stamp of the badge types, shared by every process through the cache"""
+    version = cache.get(BADGE_TYPES_VERSION_KEY)
+    if version is None:
+        cache.add(BADGE_TYPES_VERSION_KEY, 1, None)
+        version = cache.get(BADGE_TYPES_VERSION_KEY, 1)
+    return version
+
+
+def invalidate_badge_types():
+    """Make every process reload its badge types on next use"""
+    _registry.clear()
+    try:
+        cache.incr(BADGE_TYPES_VERSION_KEY)
+    except ValueError:
+        cache.set(BADGE_TYPES_VERSION_KEY, 2, None)
+
+
+def _snapshot():
+    max_age = None if is_shared_cache(caches['default']) else LOCAL_REGISTRY_TIMEOUT
+    return _registry.snapshot(get_badge_types_version(), max_age)
+
+
+def get_badge_type(name):
+    """
+    The active badge type called ``name``, or None. Instances are shared by
+    the whole process and must not be modified.
+    """
+    badge_type = _snapshot()[0].get(name)
+    if badge_type is None or not badge_type.is_active:
+        return None
+    return badge_type
+
+
+def get_badge_types_by_category(category):
+    """Active badge types of a category in display order"""
+    return list(_snapshot()[1].get(category, []))
+
+
+def active_badge_types():
+    """Active badge types keyed by name"""
+    return {name: badge_type for name, badge_type in _snapshot()[0].items() if badge_type.is_active}
+
+
+def has_badge_types(names):
+    """Whether a badge type (active or not) exists for every name"""
+    by_name = _snapshot()[0]
+    return all(name in by_name for name in names)
+
+
+def clear_badge_type_registry():
+    _registry.clear()
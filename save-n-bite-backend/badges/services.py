@@ -1,15 +1,17 @@
 # badges/services.py
 
 from django.db import transaction
-from django.db.models import Avg, Count, Sum, Q, F
+from django.db.models import Avg, Count, Max, Min, Sum, Q, F
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from decimal import Decimal
 import logging
 from typing import List, Dict, Optional, Tuple
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 
 from .models import BadgeType, ProviderBadge, BadgeLeaderboard, ProviderBadgeStats
+from .caching import badge_stats_changed
+from .registry import get_badge_type
 from authentication.models import FoodProviderProfile
 from reviews.models import Review
 from interactions.models import Order
@@ -18,6 +20,53 @@ from notifications.services import NotificationService
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Badge rules, shared by the signal-time checks below and the batch engine.
+# (badge name, milestone type, stats key, threshold)
+MILESTONES = [
+    ('First Order', 'orders', 'total_orders', 1),
+    ('Order Champion', 'orders', 'total_orders', 100),
+    ('Revenue Milestone - R1000', 'revenue', 'total_revenue', 1000),
+    ('Revenue Milestone - R10000', 'revenue', 'total_revenue', 10000),
+    ('Review Magnet', 'reviews', 'total_reviews', 10),
+    ('Customer Favorite', 'reviews', 'total_reviews', 50),
+]
+
+# (badge name, minimum average rating, minimum reviews)
+RATING_BADGES = [
+    ('Perfect Rating', 5.0, 5),
+    ('Excellence Badge', 4.5, 10),
+]
+
+PROVIDER_OF_THE_MONTH = 'Provider of the Month'
+MONTHLY_MIN_ORDERS = 10
+MONTHLY_MIN_REVIEWS = 3
+MONTHLY_MIN_RATING = 4.0
+
+# Registered in the first month of the platform
+EARLY_ADOPTER = 'Early Adopter'
+EARLY_ADOPTER_CUTOFF = datetime(2024, 1, 1, tzinfo=dt_timezone.utc) + timedelta(days=30)
+
+
+def badge_stats_aggregates() -> Dict:
+    """
+    ProviderBadgeStats columns as conditional aggregates over ProviderBadge,
+    for one provider or grouped by provider
+    """
+    aggregates = {
+        'total_badges': Count('id'),
+        'pinned_badges_count': Count('id', filter=Q(is_pinned=True)),
+        'first_badge_earned': Min('earned_date'),
+        'latest_badge_earned': Max('earned_date'),
+    }
+    
+    # By category and by rarity
+    for category, _ in BadgeType.CATEGORY_CHOICES:
+        aggregates[f'{category}_badges'] = Count('id', filter=Q(badge_type__category=category))
+    for rarity, _ in BadgeType.RARITY_CHOICES:
+        aggregates[f'{rarity}_badges'] = Count('id', filter=Q(badge_type__rarity=rarity))
+    
+    return aggregates
+
 
 class BadgeService:
     """
@@ -106,45 +155,47 @@ class BadgeService:
     
     def update_provider_stats(self, provider: User) -> Dict:
         """
-        Calculate current statistics for a provider
+        Calculate current statistics for a provider, with one conditional
+        aggregate over their active reviews and one over their completed orders
         """
+        current_month_start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        
         # Review statistics
-        reviews = Review.objects.filter(business=provider.provider_profile, status='active')
-        review_stats = reviews.aggregate(
+        review_stats = Review.objects.filter(
+            business=provider.provider_profile,
+            status='active'
+        ).aggregate(
             total_reviews=Count('id'),
             average_rating=Avg('general_rating'),
-            rating_sum=Sum('general_rating')
+            rating_sum=Sum('general_rating'),
+            monthly_reviews=Count('id', filter=Q(created_at__gte=current_month_start)),
         )
         
-        # Order statistics
-        orders = Order.objects.filter(
+        # Order statistics, monthly figures by interaction date
+        this_month = Q(interaction__created_at__gte=current_month_start)
+        order_stats = Order.objects.filter(
             interaction__business=provider.provider_profile,
             status='completed'
+        ).aggregate(
+            total_orders=Count('id'),
+            total_revenue=Sum('interaction__total_amount'),
+            monthly_orders=Count('id', filter=this_month),
+            monthly_revenue=Sum('interaction__total_amount', filter=this_month),
         )
         
-        total_orders = orders.count()
-        total_revenue = orders.aggregate(
-            revenue=Sum('interaction__total_amount')
-        )['revenue'] or Decimal('0.00')
-        
-        # Monthly statistics (current month)
-        current_month_start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        monthly_orders = orders.filter(interaction__created_at__gte=current_month_start)
-        monthly_reviews = reviews.filter(created_at__gte=current_month_start)
-        
         # Time-based statistics
         provider_since = provider.date_joined
         days_active = (timezone.now() - provider_since).days
         
         return {
-            'total_reviews': review_stats['total_reviews'] or 0,
+            'total_reviews': review_stats['total_reviews'],
             'average_rating': review_stats['average_rating'] or 0,
             'rating_sum': review_stats['rating_sum'] or 0,
-            'total_orders': total_orders,
-            'total_revenue': total_revenue,
-            'monthly_orders': monthly_orders.count(),
-            'monthly_reviews': monthly_reviews.count(),
-            'monthly_revenue': monthly_orders.aggregate(revenue=Sum('interaction__total_amount'))['revenue'] or Decimal('0.00'),
+            'total_orders': order_stats['total_orders'],
+            'total_revenue': order_stats['total_revenue'] or Decimal('0.00'),
+            'monthly_orders': order_stats['monthly_orders'],
+            'monthly_reviews': review_stats['monthly_reviews'],
+            'monthly_revenue': order_stats['monthly_revenue'] or Decimal('0.00'),
             'days_active': days_active,
             'provider_since': provider_since,
         }
@@ -154,38 +205,22 @@ class BadgeService:
         Check for milestone badges triggered by order completion
         """
         badges_awarded = []
+        previous_revenue = stats['total_revenue'] - order.interaction.total_amount
         
-        # Order-based milestones
-        order_milestones = [
-            ('First Order', 1),
-            ('Order Champion', 100),
-        ]
-        
-        for badge_name, threshold in order_milestones:
-            if stats['total_orders'] == threshold:  # Exact match for immediate awarding
+        for badge_name, milestone_type, key, threshold in MILESTONES:
+            if milestone_type == 'orders' and stats[key] == threshold:  # Exact match for immediate awarding
                 badge = self.award_milestone_badge(
-                    provider, badge_name, 'orders', threshold, stats['total_orders'], order
+                    provider, badge_name, milestone_type, threshold, stats[key], order
                 )
-                if badge:
-                    badges_awarded.append(badge)
-        
-        # Revenue-based milestones
-        revenue_milestones = [
-            ('Revenue Milestone - R1000', Decimal('1000')),
-            ('Revenue Milestone - R10000', Decimal('10000')),
-        ]
-        
-        for badge_name, threshold in revenue_milestones:
-            # Check if just crossed the threshold with this order
-            order_amount = order.interaction.total_amount
-            previous_revenue = stats['total_revenue'] - order_amount
-            
-            if previous_revenue < threshold <= stats['total_revenue']:
+            elif milestone_type == 'revenue' and previous_revenue < threshold <= stats[key]:
+                # Just crossed the threshold with this order
                 badge = self.award_milestone_badge(
-                    provider, badge_name, 'revenue', float(threshold), float(stats['total_revenue']), order
+                    provider, badge_name, milestone_type, float(threshold), float(stats[key]), order
                 )
-                if badge:
-                    badges_awarded.append(badge)
+            else:
+                continue
+            if badge:
+                badges_awarded.append(badge)
         
         # Special badges
         special_badges = self.check_special_achievement_badges(provider, stats)
@@ -199,16 +234,10 @@ class BadgeService:
         """
         badges_awarded = []
         
-        # Review count milestones
-        review_milestones = [
-            ('Review Magnet', 10),
-            ('Customer Favorite', 50),
-        ]
-        
-        for badge_name, threshold in review_milestones:
-            if stats['total_reviews'] == threshold:  # Exact match for immediate awarding
+        for badge_name, milestone_type, key, threshold in MILESTONES:
+            if milestone_type == 'reviews' and stats[key] == threshold:  # Exact match for immediate awarding
                 badge = self.award_milestone_badge(
-                    provider, badge_name, 'reviews', threshold, stats['total_reviews'], review=review
+                    provider, badge_name, milestone_type, threshold, stats[key], review=review
                 )
                 if badge:
                     badges_awarded.append(badge)
@@ -221,21 +250,13 @@ class BadgeService:
         """
         badges_awarded = []
         
-        # Perfect rating badge
-        if stats['average_rating'] == 5.0 and stats['total_reviews'] >= 5:
-            badge = self.award_rating_badge(
-                provider, 'Perfect Rating', 5.0, stats['total_reviews']
-            )
-            if badge:
-                badges_awarded.append(badge)
-        
-        # Excellence badge  
-        if stats['average_rating'] >= 4.5 and stats['total_reviews'] >= 10:
-            badge = self.award_rating_badge(
-                provider, 'Excellence Badge', stats['average_rating'], stats['total_reviews']
-            )
-            if badge:
-                badges_awarded.append(badge)
+        for badge_name, min_rating, min_reviews in RATING_BADGES:
+            if stats['average_rating'] >= min_rating and stats['total_reviews'] >= min_reviews:
+                badge = self.award_rating_badge(
+                    provider, badge_name, stats['average_rating'], stats['total_reviews']
+                )
+                if badge:
+                    badges_awarded.append(badge)
         
         return badges_awarded
     
@@ -243,9 +264,12 @@ class BadgeService:
         """
         Check if provider should get monthly provider badge
         """
+        badge_type = get_badge_type(PROVIDER_OF_THE_MONTH)
+        if badge_type is None:
+            logger.warning(f"Monthly provider badge type not found: {PROVIDER_OF_THE_MONTH}")
+            return None
+        
         try:
-            badge_type = BadgeType.objects.get(name='Provider of the Month', is_active=True)
-            
             # Check if already earned this month
             if ProviderBadge.objects.filter(
                 provider=provider, 
@@ -256,9 +280,9 @@ class BadgeService:
                 return None
             
             # Award if provider has significant activity this month
-            if (stats['monthly_orders'] >= 10 and 
-                stats['monthly_reviews'] >= 3 and 
-                stats['average_rating'] >= 4.0):
+            if (stats['monthly_orders'] >= MONTHLY_MIN_ORDERS and 
+                stats['monthly_reviews'] >= MONTHLY_MIN_REVIEWS and 
+                stats['average_rating'] >= MONTHLY_MIN_RATING):
                 
                 return self.award_badge(provider, badge_type, {
                     'monthly_orders': stats['monthly_orders'],
@@ -268,8 +292,6 @@ class BadgeService:
                     'year': self.current_year
                 })
                 
-        except BadgeType.DoesNotExist:
-            logger.warning("Monthly provider badge type not found: Provider of the Month")
         except Exception as e:
             logger.error(f"Error checking monthly badge for {provider.email}: {str(e)}")
         
@@ -281,11 +303,10 @@ class BadgeService:
         """
         badges_awarded = []
         
-        # Early adopter badge (registered in first month of platform)
-        platform_launch = timezone.now().replace(year=2024, month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-        if stats['provider_since'] <= (platform_launch + timedelta(days=30)):
+        # Early adopter badge
+        if stats['provider_since'] <= EARLY_ADOPTER_CUTOFF:
             badge = self.award_special_badge(
-                provider, 'Early Adopter', {
+                provider, EARLY_ADOPTER, {
                     'registration_date': stats['provider_since'].isoformat()
                 }
             )
@@ -300,72 +321,66 @@ class BadgeService:
         """
         Award a milestone badge if not already earned
         """
-        try:
-            badge_type = BadgeType.objects.get(name=badge_name, is_active=True)
-            
-            # Check if already earned (milestone badges are one-time only)
-            if ProviderBadge.objects.filter(provider=provider, badge_type=badge_type).exists():
-                return None
-            
-            badge_data = {
-                'milestone_type': milestone_type,
-                'threshold': threshold,
-                'achieved_value': achieved_value,
-                'earned_date': timezone.now().isoformat()
-            }
-            
-            if order:
-                badge_data['triggering_order_id'] = str(order.id)
-            if review:
-                badge_data['triggering_review_id'] = str(review.id)
-            
-            return self.award_badge(provider, badge_type, badge_data)
-            
-        except BadgeType.DoesNotExist:
+        badge_type = get_badge_type(badge_name)
+        if badge_type is None:
             logger.warning(f"Badge type not found: {badge_name}")
             return None
+        
+        # Check if already earned (milestone badges are one-time only)
+        if ProviderBadge.objects.filter(provider=provider, badge_type=badge_type).exists():
+            return None
+        
+        badge_data = {
+            'milestone_type': milestone_type,
+            'threshold': threshold,
+            'achieved_value': achieved_value,
+            'earned_date': timezone.now().isoformat()
+        }
+        
+        if order:
+            badge_data['triggering_order_id'] = str(order.id)
+        if review:
+            badge_data['triggering_review_id'] = str(review.id)
+        
+        return self.award_badge(provider, badge_type, badge_data)
     
     def award_rating_badge(self, provider: User, badge_name: str, rating: float, 
                           review_count: int) -> Optional[ProviderBadge]:
         """
         Award a rating-based badge if not already earned
         """
-        try:
-            badge_type = BadgeType.objects.get(name=badge_name, is_active=True)
-            
-            # Check if already earned (rating badges are one-time achievements)
-            if ProviderBadge.objects.filter(provider=provider, badge_type=badge_type).exists():
-                return None
-            
-            badge_data = {
-                'rating': rating,
-                'review_count': review_count,
-                'earned_date': timezone.now().isoformat()
-            }
-            
-            return self.award_badge(provider, badge_type, badge_data)
-            
-        except BadgeType.DoesNotExist:
+        badge_type = get_badge_type(badge_name)
+        if badge_type is None:
             logger.warning(f"Badge type not found: {badge_name}")
             return None
+        
+        # Check if already earned (rating badges are one-time achievements)
+        if ProviderBadge.objects.filter(provider=provider, badge_type=badge_type).exists():
+            return None
+        
+        badge_data = {
+            'rating': rating,
+            'review_count': review_count,
+            'earned_date': timezone.now().isoformat()
+        }
+        
+        return self.award_badge(provider, badge_type, badge_data)
     
     def award_special_badge(self, provider: User, badge_name: str, 
                            badge_data: Dict) -> Optional[ProviderBadge]:
         """
         Award a special badge if not already earned
         """
-        try:
-            badge_type = BadgeType.objects.get(name=badge_name, is_active=True)
-            
-            # Check if already earned
-            if ProviderBadge.objects.filter(provider=provider, badge_type=badge_type).exists():
-                return None
-            
-            return self.award_badge(provider, badge_type, badge_data)
-            
-        except BadgeType.DoesNotExist:
+        badge_type = get_badge_type(badge_name)
+        if badge_type is None:
             logger.warning(f"Badge type not found: {badge_name}")
             return None
+        
+        # Check if already earned
+        if ProviderBadge.objects.filter(provider=provider, badge_type=badge_type).exists():
+            return None
+        
+        return self.award_badge(provider, badge_type, badge_data)
     
     def award_badge(self, provider: User, badge_type: BadgeType, badge_data: Dict) -> ProviderBadge:
         """
@@ -407,41 +422,60 @@ class BadgeService:
     
     def update_provider_badge_stats(self, provider: User):
         """
-        Update cached badge statistics for a provider
+        Update cached badge statistics for a provider from one conditional
+        aggregate over their badges. The row, and with it the leaderboard and
+        badge profile caches, is left alone when the counts have not changed.
+        """
+        counts = ProviderBadge.objects.filter(provider=provider).aggregate(**badge_stats_aggregates())
+        current = ProviderBadgeStats.objects.filter(provider=provider).values(*counts).first()
+        if current == counts:
+            return
+        
+        counts['last_calculated_at'] = timezone.now()
+        if current is None:
+            ProviderBadgeStats.objects.create(provider=provider, **counts)
+        else:
+            ProviderBadgeStats.objects.filter(provider=provider).update(**counts)
+        badge_stats_changed()
+    
+    def calculate_provider_badges(self, provider: User) -> List[ProviderBadge]:
         """
-        stats, created = ProviderBadgeStats.objects.get_or_create(provider=provider)
-        
-        # Get all badges for this provider
-        badges = ProviderBadge.objects.filter(provider=provider)
-        
-        # Update totals
-        stats.total_badges = badges.count()
-        
-        # Update by category
-        stats.performance_badges = badges.filter(badge_type__category='performance').count()
-        stats.milestone_badges = badges.filter(badge_type__category='milestone').count()
-        stats.recognition_badges = badges.filter(badge_type__category='recognition').count()
-        stats.monthly_badges = badges.filter(badge_type__category='monthly').count()
-        stats.special_badges = badges.filter(badge_type__category='special').count()
-        
-        # Update by rarity
-        stats.common_badges = badges.filter(badge_type__rarity='common').count()
-        stats.uncommon_badges = badges.filter(badge_type__rarity='uncommon').count()
-        stats.rare_badges = badges.filter(badge_type__rarity='rare').count()
-        stats.epic_badges = badges.filter(badge_type__rarity='epic').count()
-        stats.legendary_badges = badges.filter(badge_type__rarity='legendary').count()
+        Award any badges a provider has earned but not received, using the
+        batch engine for a single provider
+        """
+        from .batch import recalculate_badges
         
-        # Update pinned badges
-        stats.pinned_badges_count = badges.filter(is_pinned=True).count()
+        return recalculate_badges(
+            provider_ids=[provider.UserID],
+            year=self.current_year,
+            month=self.current_month
+        )['new_badges']
+    
+    def calculate_all_badges(self, workers: int = 1) -> Dict:
+        """
+        Award missing badges and rebuild badge statistics for all providers
+        in bulk, optionally split across worker processes
+        """
+        from .batch import recalculate_all_badges
         
-        # Update dates
-        first_badge = badges.order_by('earned_date').first()
-        latest_badge = badges.order_by('-earned_date').first()
+        return recalculate_all_badges(
+            workers=workers,
+            year=self.current_year,
+            month=self.current_month
+        )
+    
+    def calculate_leaderboard_badges(self) -> int:
+        """
+        Finalize last month's leaderboards, awarding their place badges, and
+        build the current month's. Returns the number of badges awarded.
+        """
+        from .leaderboards import calculate_leaderboards, previous_month
         
-        stats.first_badge_earned = first_badge.earned_date if first_badge else None
-        stats.latest_badge_earned = latest_badge.earned_date if latest_badge else None
+        year, month = previous_month(self.current_year, self.current_month)
+        _, previous_badges = calculate_leaderboards(year, month, finalize=True)
+        _, current_badges = calculate_leaderboards(self.current_year, self.current_month)
         
-        stats.save()
+        return len(previous_badges) + len(current_badges)
     
     def pin_badge(self, provider: User, badge_id: str) -> bool:
         """
@@ -496,9 +530,22 @@ class BadgeService:
         except ProviderBadge.DoesNotExist:
             return False
     
-    def get_provider_badges(self, provider: User, category: str = None) -> Dict:
+    def get_provider_badge_stats(self, provider: User) -> ProviderBadgeStats:
+        """
+        Get a provider's cached badge statistics, calculating them if the
+        provider has none yet
+        """
+        stats = ProviderBadgeStats.objects.filter(provider=provider).first()
+        if stats is None:
+            self.update_provider_badge_stats(provider)
+            stats = ProviderBadgeStats.objects.get(provider=provider)
+        return stats
+    
+    def get_provider_badges(self, provider: User, category: str = None,
+                            stats: ProviderBadgeStats = None) -> Dict:
         """
-        Get all badges for a provider with optional filtering
+        Get all badges for a provider with optional filtering. Counts come
+        from the provider's badge statistics rather than being recounted.
         """
         badges_query = ProviderBadge.objects.filter(provider=provider).select_related('badge_type')
         
@@ -508,21 +555,18 @@ class BadgeService:
         badges = badges_query.order_by('-earned_date')
         pinned_badges = badges.filter(is_pinned=True).order_by('pin_order')
         
-        # Get or create stats
-        stats, _ = ProviderBadgeStats.objects.get_or_create(provider=provider)
+        stats = stats or self.get_provider_badge_stats(provider)
+        categories = {
+            name: getattr(stats, f'{name}_badges') if not category or name == category else 0
+            for name, _ in BadgeType.CATEGORY_CHOICES
+        }
         
         return {
             'all_badges': badges,
             'pinned_badges': pinned_badges,
             'stats': stats,
-            'total_count': badges.count(),
-            'categories': {
-                'performance': badges.filter(badge_type__category='performance').count(),
-                'milestone': badges.filter(badge_type__category='milestone').count(),
-                'recognition': badges.filter(badge_type__category='recognition').count(),
-                'monthly': badges.filter(badge_type__category='monthly').count(),
-                'special': badges.filter(badge_type__category='special').count(),
-            }
+            'total_count': categories[category] if category else stats.total_badges,
+            'categories': categories
         }
     
     def get_badge_leaderboard(self, limit: int = 10) -> List[Dict]:
@@ -557,6 +601,155 @@ class BadgeService:
         return leaderboard
 
 
+# Badge types created by BadgeInitializationService.create_default_badge_types
+DEFAULT_BADGE_TYPES = [
+    # Performance Badges (will be implemented later via leaderboard calculations)
+    {
+        'name': 'Top Provider - First Place',
+        'description': 'Achieved the highest rating among all providers this month',
+        'category': 'performance',
+        'rarity': 'legendary',
+        'svg_filename': 'top_provider_gold.svg',
+        'criteria_description': 'Highest average rating with minimum 3 reviews in a month',
+        'display_order': 1
+    },
+    {
+        'name': 'Top Provider - Second Place',
+        'description': 'Achieved the second highest rating among all providers this month',
+        'category': 'performance',
+        'rarity': 'epic',
+        'svg_filename': 'top_provider_silver.svg',
+        'criteria_description': 'Second highest average rating with minimum 3 reviews in a month',
+        'display_order': 2
+    },
+    {
+        'name': 'Top Provider - Third Place',
+        'description': 'Achieved the third highest rating among all providers this month',
+        'category': 'performance',
+        'rarity': 'rare',
+        'svg_filename': 'top_provider_bronze.svg',
+        'criteria_description': 'Third highest average rating with minimum 3 reviews in a month',
+        'display_order': 3
+    },
+    
+    # Monthly Badges
+    {
+        'name': 'Provider of the Month',
+        'description': 'Outstanding performance and customer satisfaction this month',
+        'category': 'monthly',
+        'rarity': 'epic',
+        'svg_filename': 'provider_of_month.svg',
+        'criteria_description': 'Minimum 10 orders, 3 reviews, and 4.0+ rating in a month',
+        'display_order': 10
+    },
+    
+    # Milestone Badges (automatically awarded)
+    {
+        'name': 'First Order',
+        'description': 'Completed your very first order on Save n Bite',
+        'category': 'milestone',
+        'rarity': 'common',
+        'svg_filename': 'first_order.svg',
+        'criteria_description': 'Complete 1 order',
+        'display_order': 20
+    },
+    {
+        'name': 'Veteran Provider',
+        'description': 'Been serving customers for over a year',
+        'category': 'milestone',
+        'rarity': 'rare',
+        'svg_filename': 'veteran_provider.svg',
+        'criteria_description': 'Active on platform for 365+ days',
+        'display_order': 21
+    },
+    {
+        'name': 'Review Magnet',
+        'description': 'Attracted your first 10 customer reviews',
+        'category': 'milestone',
+        'rarity': 'uncommon',
+        'svg_filename': 'review_magnet.svg',
+        'criteria_description': 'Receive 10 reviews',
+        'display_order': 22
+    },
+    {
+        'name': 'Customer Favorite',
+        'description': 'Beloved by customers with 50+ reviews',
+        'category': 'milestone',
+        'rarity': 'rare',
+        'svg_filename': 'customer_favorite.svg',
+        'criteria_description': 'Receive 50 reviews',
+        'display_order': 23
+    },
+    {
+        'name': 'Order Champion',
+        'description': 'Completed 100 orders successfully',
+        'category': 'milestone',
+        'rarity': 'epic',
+        'svg_filename': 'order_champion.svg',
+        'criteria_description': 'Complete 100 orders',
+        'display_order': 24
+    },
+    {
+        'name': 'Revenue Milestone - R1000',
+        'description': 'Generated R1000 in total revenue',
+        'category': 'milestone',
+        'rarity': 'uncommon',
+        'svg_filename': 'revenue_1k.svg',
+        'criteria_description': 'Generate R1000+ total revenue',
+        'display_order': 25
+    },
+    {
+        'name': 'Revenue Milestone - R10000',
+        'description': 'Generated R10000 in total revenue',
+        'category': 'milestone',
+        'rarity': 'epic',
+        'svg_filename': 'revenue_10k.svg',
+        'criteria_description': 'Generate R10000+ total revenue',
+        'display_order': 26
+    },
+    
+    # Recognition Badges (automatically awarded)
+    {
+        'name': 'Excellence Badge',
+        'description': 'Maintaining exceptional quality with 4.5+ star rating',
+        'category': 'recognition',
+        'rarity': 'epic',
+        'svg_filename': 'excellence_badge.svg',
+        'criteria_description': '4.5+ average rating with minimum 10 reviews',
+        'display_order': 30
+    },
+    {
+        'name': 'Perfect Rating',
+        'description': 'Achieved and maintained a perfect 5.0 star rating',
+        'category': 'recognition',
+        'rarity': 'legendary',
+        'svg_filename': 'perfect_rating.svg',
+        'criteria_description': '5.0 average rating with minimum 5 reviews',
+        'display_order': 31
+    },
+    
+    # Special Badges (automatically awarded)
+    {
+        'name': 'Early Adopter',
+        'description': 'One of the first providers to join Save n Bite',
+        'category': 'special',
+        'rarity': 'legendary',
+        'svg_filename': 'early_adopter.svg',
+        'criteria_description': 'Registered within first month of platform launch',
+        'display_order': 40
+    },
+    {
+        'name': 'Community Builder',
+        'description': 'Helping build the Save n Bite community',
+        'category': 'special',
+        'rarity': 'rare',
+        'svg_filename': 'community_builder.svg',
+        'criteria_description': 'Special recognition for community contributions',
+        'display_order': 41
+    },
+]
+
+
 class BadgeInitializationService:
     """
     Service to initialize default badge types in the system
@@ -568,155 +761,8 @@ class BadgeInitializationService:
         Create all the default badge types for the system
         This should be called during deployment or app initialization
         """
-        badge_types = [
-            # Performance Badges (will be implemented later via leaderboard calculations)
-            {
-                'name': 'Top Provider - First Place',
-                'description': 'Achieved the highest rating among all providers this month',
-                'category': 'performance',
-                'rarity': 'legendary',
-                'svg_filename': 'top_provider_gold.svg',
-                'criteria_description': 'Highest average rating with minimum 3 reviews in a month',
-                'display_order': 1
-            },
-            {
-                'name': 'Top Provider - Second Place',
-                'description': 'Achieved the second highest rating among all providers this month',
-                'category': 'performance',
-                'rarity': 'epic',
-                'svg_filename': 'top_provider_silver.svg',
-                'criteria_description': 'Second highest average rating with minimum 3 reviews in a month',
-                'display_order': 2
-            },
-            {
-                'name': 'Top Provider - Third Place',
-                'description': 'Achieved the third highest rating among all providers this month',
-                'category': 'performance',
-                'rarity': 'rare',
-                'svg_filename': 'top_provider_bronze.svg',
-                'criteria_description': 'Third highest average rating with minimum 3 reviews in a month',
-                'display_order': 3
-            },
-            
-            # Monthly Badges
-            {
-                'name': 'Provider of the Month',
-                'description': 'Outstanding performance and customer satisfaction this month',
-                'category': 'monthly',
-                'rarity': 'epic',
-                'svg_filename': 'provider_of_month.svg',
-                'criteria_description': 'Minimum 10 orders, 3 reviews, and 4.0+ rating in a month',
-                'display_order': 10
-            },
-            
-            # Milestone Badges (automatically awarded)
-            {
-                'name': 'First Order',
-                'description': 'Completed your very first order on Save n Bite',
-                'category': 'milestone',
-                'rarity': 'common',
-                'svg_filename': 'first_order.svg',
-                'criteria_description': 'Complete 1 order',
-                'display_order': 20
-            },
-            {
-                'name': 'Veteran Provider',
-                'description': 'Been serving customers for over a year',
-                'category': 'milestone',
-                'rarity': 'rare',
-                'svg_filename': 'veteran_provider.svg',
-                'criteria_description': 'Active on platform for 365+ days',
-                'display_order': 21
-            },
-            {
-                'name': 'Review Magnet',
-                'description': 'Attracted your first 10 customer reviews',
-                'category': 'milestone',
-                'rarity': 'uncommon',
-                'svg_filename': 'review_magnet.svg',
-                'criteria_description': 'Receive 10 reviews',
-                'display_order': 22
-            },
-            {
-                'name': 'Customer Favorite',
-                'description': 'Beloved by customers with 50+ reviews',
-                'category': 'milestone',
-                'rarity': 'rare',
-                'svg_filename': 'customer_favorite.svg',
-                'criteria_description': 'Receive 50 reviews',
-                'display_order': 23
-            },
-            {
-                'name': 'Order Champion',
-                'description': 'Completed 100 orders successfully',
-                'category': 'milestone',
-                'rarity': 'epic',
-                'svg_filename': 'order_champion.svg',
-                'criteria_description': 'Complete 100 orders',
-                'display_order': 24
-            },
-            {
-                'name': 'Revenue Milestone - R1000',
-                'description': 'Generated R1000 in total revenue',
-                'category': 'milestone',
-                'rarity': 'uncommon',
-                'svg_filename': 'revenue_1k.svg',
-                'criteria_description': 'Generate R1000+ total revenue',
-                'display_order': 25
-            },
-            {
-                'name': 'Revenue Milestone - R10000',
-                'description': 'Generated R10000 in total revenue',
-                'category': 'milestone',
-                'rarity': 'epic',
-                'svg_filename': 'revenue_10k.svg',
-                'criteria_description': 'Generate R10000+ total revenue',
-                'display_order': 26
-            },
-            
-            # Recognition Badges (automatically awarded)
-            {
-                'name': 'Excellence Badge',
-                'description': 'Maintaining exceptional quality with 4.5+ star rating',
-                'category': 'recognition',
-                'rarity': 'epic',
-                'svg_filename': 'excellence_badge.svg',
-                'criteria_description': '4.5+ average rating with minimum 10 reviews',
-                'display_order': 30
-            },
-            {
-                'name': 'Perfect Rating',
-                'description': 'Achieved and maintained a perfect 5.0 star rating',
-                'category': 'recognition',
-                'rarity': 'legendary',
-                'svg_filename': 'perfect_rating.svg',
-                'criteria_description': '5.0 average rating with minimum 5 reviews',
-                'display_order': 31
-            },
-            
-            # Special Badges (automatically awarded)
-            {
-                'name': 'Early Adopter',
-                'description': 'One of the first providers to join Save n Bite',
-                'category': 'special',
-                'rarity': 'legendary',
-                'svg_filename': 'early_adopter.svg',
-                'criteria_description': 'Registered within first month of platform launch',
-                'display_order': 40
-            },
-            {
-                'name': 'Community Builder',
-                'description': 'Helping build the Save n Bite community',
-                'category': 'special',
-                'rarity': 'rare',
-                'svg_filename': 'community_builder.svg',
-                'criteria_description': 'Special recognition for community contributions',
-                'display_order': 41
-            },
-        ]
-        
         created_count = 0
-        for badge_data in badge_types:
+        for badge_data in DEFAULT_BADGE_TYPES:
             badge_type, created = BadgeType.objects.get_or_create(
                 name=badge_data['name'],
                 defaults=badge_data
@@ -1,56 +1,17 @@
 # badges/signals.py
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 import logging
 
 from interactions.models import Order
 from reviews.models import Review
-from .services import BadgeService, BadgeInitializationService
-
-logger = logging.getLogger(__name__)
-User = get_user_model()
-
-
-@receiver(post_save, sender=Order)
-def award_badges_on_order_completion(sender, instance, created, **kwargs):
-    """
-    Automatically award badges when an order is completed
-    Mirrors the digital garden's automatic plant awarding on order completion
-    """
-    # Only process when order status changes to completed and it's a provider order
-    if (instance.status == 'completed' and 
-        hasattr(instance, 'interaction') and 
-        hasattr(instance.interaction, 'business') and
-        hasattr(instance.interaction.business, 'user') and
-        instance.interaction.business.user.user_type == 'provider'):
-        
-        try:
-            badge_service = BadgeService()
-            badges_awarded = badge_service.process_order_completion(instance)
-            
-            if badges_awarded:
-                logger.info(
-                    f"Order {instance.id} completion awarded {len(badges_awarded)} "
-                    f"badges to provider {instance.interaction.business.user.email}: "
-                    f"{', '.join([badge.badge_type.name for badge in badges_awarded])}"
-                )
-            
-        except Exception as e:
-            logger.error(
-                f"Failed to process badge awards for order {instance.id}: {str(e)}"
-            )
-# badges/signals.py
-
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from django.contrib.auth import get_user_model
-import logging
-
-from interactions.models import Order
-from reviews.models import Review
-from .services import BadgeService, BadgeInitializationService
+from .caching import badge_stats_changed
+from .models import BadgeType, ProviderBadgeStats
+from .registry import has_badge_types, invalidate_badge_types
+from .services import BadgeService, BadgeInitializationService, DEFAULT_BADGE_TYPES
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -67,13 +28,30 @@ def ensure_badge_types_initialized():
     global _badge_types_initialized
     if not _badge_types_initialized:
         try:
-            BadgeInitializationService.create_default_badge_types()
+            # Read from the badge type registry, so no queries once it is loaded
+            if not has_badge_types([badge_data['name'] for badge_data in DEFAULT_BADGE_TYPES]):
+                BadgeInitializationService.create_default_badge_types()
             _badge_types_initialized = True
             logger.info("Badge types initialized on first use")
         except Exception as e:
             logger.error(f"Failed to initialize badge types: {str(e)}")
 
 
+@receiver([post_save, post_delete], sender=BadgeType)
+def invalidate_badge_type_registry(sender, instance, **kwargs):
+    """
+    Make every process reload its badge types once the change is committed,
+    so none reloads the old rows in between
+    """
+    transaction.on_commit(invalidate_badge_types)
+
+
+@receiver([post_save, post_delete], sender=ProviderBadgeStats)
+def invalidate_badge_leaderboard_cache(sender, instance, **kwargs):
+    """Refresh the cached badge leaderboard when stats are saved outside the badge services"""
+    badge_stats_changed()
+
+
 @receiver(post_save, sender=Order)
 def award_badges_on_order_completion(sender, instance, created, **kwargs):
     """
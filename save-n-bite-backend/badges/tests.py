@@ -1,6 +1,10 @@
 # badges/tests_fixed.py - Fixed Unit Tests
 
+from django.db import connection
+from django.db.models.signals import post_save
+from django.dispatch import Signal
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.utils import timezone
@@ -8,8 +12,11 @@ from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework import status
 from datetime import datetime, timedelta, date
+from functools import partial
 from unittest.mock import patch, Mock
+import time
 import uuid
+import pytest
 from decimal import Decimal
 from django.core.files.uploadedfile import SimpleUploadedFile
 
@@ -17,6 +24,12 @@ from badges.models import (
     BadgeType, ProviderBadge, BadgeLeaderboard, ProviderBadgeStats
 )
 from badges.services import BadgeService, BadgeInitializationService
+from badges.batch import recalculate_all_badges, recalculate_badges
+from badges.caching import invalidate_badge_leaderboard
+from badges.leaderboards import calculate_leaderboards, top_providers
+from badges.registry import (
+    clear_badge_type_registry, get_badge_type, get_badge_types_by_category, has_badge_types
+)
 from badges.serializers import (
     BadgeTypeSerializer, ProviderBadgeSerializer, ProviderBadgeStatsSerializer,
     BadgePinSerializer, ProviderBadgeProfileSerializer, BadgeLeaderboardSerializer,
@@ -26,6 +39,7 @@ from authentication.models import FoodProviderProfile, CustomerProfile, NGOProfi
 from reviews.models import Review
 from interactions.models import Interaction, Order, InteractionItem
 from food_listings.models import FoodListing
+from notifications.models import Notification
 
 User = get_user_model()
 
@@ -35,6 +49,9 @@ class BadgeTestCase(TestCase):
     
     def setUp(self):
         """Set up test data"""
+        # Badge types and the leaderboard are cached, and test rollbacks send no signals
+        clear_badge_type_registry()
+        invalidate_badge_leaderboard()
         self.api_client = APIClient()
         
         # Create provider user
@@ -48,7 +65,8 @@ class BadgeTestCase(TestCase):
         # Create a dummy file for cipc_document
         dummy_file = SimpleUploadedFile("test_cipc.pdf", b"dummy content", content_type="application/pdf")
         
-        self.provider_profile, _ = FoodProviderProfile.objects.get_or_create(
+        # The user signal may already have created a blank profile
+        self.provider_profile, _ = FoodProviderProfile.objects.update_or_create(
             user=self.provider_user,
             defaults={
                 'business_name': 'Test Restaurant',
@@ -59,6 +77,7 @@ class BadgeTestCase(TestCase):
                 'cipc_document': dummy_file
             }
         )
+        self.provider_user.provider_profile = self.provider_profile
         
         # Create customer user
         self.customer_user = User.objects.create_user(
@@ -95,6 +114,42 @@ class BadgeTestCase(TestCase):
         refresh = RefreshToken.for_user(self.customer_user)
         self.authenticated_customer_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
 
+    def create_provider(self, index):
+        user = User.objects.create_user(
+            username=f'provider_{index}',
+            email=f'provider{index}@test.com',
+            password='testpass123',
+            user_type='provider'
+        )
+        profile, _ = FoodProviderProfile.objects.update_or_create(
+            user=user,
+            defaults={
+                'business_name': f'Restaurant {index}',
+                'business_address': '123 Test St',
+                'business_contact': '+1234567890',
+                'business_email': f'business{index}@test.com',
+                'status': 'verified',
+                'cipc_document': SimpleUploadedFile("test_cipc.pdf", b"dummy content", content_type="application/pdf")
+            }
+        )
+        return profile
+    
+    def create_business_order(self, business, amount):
+        interaction = Interaction.objects.create(
+            business=business,
+            user=self.customer_user,
+            total_amount=amount,
+            interaction_type='Purchase',
+            status='completed',
+            quantity=1
+        )
+        return Order.objects.create(
+            interaction=interaction,
+            status='completed',
+            pickup_window='17:00-19:00',
+            pickup_code=f'ORD{Order.objects.count()}'
+        )
+
 
 class TestBadgeTypeModel(BadgeTestCase):
     
@@ -180,6 +235,511 @@ class TestBadgeService(BadgeTestCase):
         # mock_notification.assert_called_once()
 
 
+class TestBadgeTypeRegistry(BadgeTestCase):
+    
+    def test_lookups_do_not_query_once_loaded(self):
+        """Test badge type lookups are served from the registry after the first load"""
+        self.assertEqual(get_badge_type('Test Badge'), self.badge_type)
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(get_badge_type('Test Badge'), self.badge_type)
+            self.assertEqual(get_badge_types_by_category('milestone'), [self.badge_type])
+            self.assertIsNone(get_badge_type('Missing Badge'))
+    
+    def test_edits_invalidate_the_registry(self):
+        """Test saving or deactivating a badge type reloads the registry"""
+        self.assertIsNone(get_badge_type('Renamed Badge'))
+        
+        # conftest patches post_save.send out, let the invalidation receiver run for these saves
+        with patch.object(post_save, 'send', partial(Signal.send, post_save)):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.badge_type.name = 'Renamed Badge'
+                self.badge_type.save()
+            self.assertEqual(get_badge_type('Renamed Badge'), self.badge_type)
+            
+            with self.captureOnCommitCallbacks(execute=True):
+                self.badge_type.is_active = False
+                self.badge_type.save()
+        self.assertIsNone(get_badge_type('Renamed Badge'))
+        self.assertTrue(has_badge_types(['Renamed Badge']))
+        self.assertEqual(get_badge_types_by_category('milestone'), [])
+    
+    def test_per_process_registry_reloads_after_timeout(self):
+        """Test a worker that missed another worker's invalidation stops serving a deactivated type"""
+        from badges.registry import LOCAL_REGISTRY_TIMEOUT, _BadgeTypeRegistry
+        
+        this_worker, other_worker = _BadgeTypeRegistry(), _BadgeTypeRegistry()
+        other_worker.snapshot(1, LOCAL_REGISTRY_TIMEOUT)
+        
+        # Deactivated through this worker, whose version bump stays in its own cache
+        BadgeType.objects.filter(pk=self.badge_type.pk).update(is_active=False)
+        self.assertEqual(this_worker.snapshot(2, LOCAL_REGISTRY_TIMEOUT)[1], {})
+        self.assertEqual(other_worker.snapshot(1, LOCAL_REGISTRY_TIMEOUT)[1], {'milestone': [self.badge_type]})
+        
+        later = time.monotonic() + LOCAL_REGISTRY_TIMEOUT + 1
+        with patch('badges.registry.time.monotonic', return_value=later):
+            self.assertEqual(other_worker.snapshot(1, LOCAL_REGISTRY_TIMEOUT)[1], {})
+    
+    def test_registry_timeout_only_applies_to_per_process_caches(self):
+        """Test the registry is trusted until invalidated when the cache is shared"""
+        get_badge_type('Test Badge')
+        later = time.monotonic() + 3600
+        
+        with patch('badges.registry.time.monotonic', return_value=later):
+            with patch('badges.registry.is_shared_cache', return_value=True), self.assertNumQueries(0):
+                get_badge_type('Test Badge')
+            with patch('badges.registry.is_shared_cache', return_value=False), self.assertNumQueries(1):
+                get_badge_type('Test Badge')
+    
+    def test_award_milestone_badge_without_lookup_query(self):
+        """Test awarding a milestone badge only checks and inserts the badge"""
+        service = BadgeService()
+        get_badge_type('Test Badge')
+        
+        with self.assertNumQueries(2):
+            badge = service.award_milestone_badge(self.provider_user, 'Test Badge', 'orders', 1, 1)
+        
+        self.assertEqual(badge.badge_type, self.badge_type)
+
+
+class TestBadgeStatsQueryBudget(BadgeTestCase):
+    
+    def fresh_order(self, order):
+        return Order.objects.select_related('interaction__business__user__provider_profile').get(pk=order.pk)
+    
+    def test_update_provider_stats_single_aggregate_per_table(self):
+        """Test provider stats come from one review and one order aggregate"""
+        for amount in (Decimal('10.00'), Decimal('15.50')):
+            self.create_business_order(self.provider_profile, amount)
+        provider = User.objects.select_related('provider_profile').get(pk=self.provider_user.pk)
+        
+        with self.assertNumQueries(2):
+            stats = BadgeService().update_provider_stats(provider)
+        
+        self.assertEqual(stats['total_orders'], 2)
+        self.assertEqual(stats['monthly_orders'], 2)
+        self.assertEqual(stats['total_revenue'], Decimal('25.50'))
+        self.assertEqual(stats['monthly_revenue'], Decimal('25.50'))
+        self.assertEqual(stats['total_reviews'], 0)
+        self.assertEqual(stats['average_rating'], 0)
+    
+    def test_update_provider_badge_stats_single_aggregate(self):
+        """Test badge stats are recalculated with one aggregate and one read, without a write when unchanged"""
+        epic_type = BadgeType.objects.create(
+            name='Epic Test Badge', description='Epic', category='performance',
+            rarity='epic', svg_filename='epic.svg', criteria_description='Be epic'
+        )
+        ProviderBadge.objects.create(provider=self.provider_user, badge_type=self.badge_type, earned_reason='Test')
+        ProviderBadge.objects.create(provider=self.provider_user, badge_type=epic_type, earned_reason='Test', is_pinned=True)
+        service = BadgeService()
+        service.update_provider_badge_stats(self.provider_user)
+        
+        with self.assertNumQueries(2):
+            service.update_provider_badge_stats(self.provider_user)
+        
+        stats = ProviderBadgeStats.objects.get(provider=self.provider_user)
+        self.assertEqual(stats.total_badges, 2)
+        self.assertEqual(stats.milestone_badges, 1)
+        self.assertEqual(stats.performance_badges, 1)
+        self.assertEqual(stats.common_badges, 1)
+        self.assertEqual(stats.epic_badges, 1)
+        self.assertEqual(stats.pinned_badges_count, 1)
+        self.assertLessEqual(stats.first_badge_earned, stats.latest_badge_earned)
+    
+    @patch('badges.services.NotificationService.create_notification')
+    def test_order_completion_cost_does_not_grow_with_history(self, mock_notification):
+        """Test badge processing adds a fixed number of queries per order completion"""
+        service = BadgeService()
+        # Load the badge type registry and create the badge stats row outside the measurement
+        service.process_order_completion(self.fresh_order(self.create_business_order(self.provider_profile, Decimal('5.00'))))
+        self.create_business_order(self.provider_profile, Decimal('5.00'))
+        order = self.fresh_order(self.create_business_order(self.provider_profile, Decimal('5.00')))
+        with CaptureQueriesContext(connection) as few_orders:
+            service.process_order_completion(order)
+        
+        for _ in range(10):
+            self.create_business_order(self.provider_profile, Decimal('5.00'))
+        order = self.fresh_order(self.create_business_order(self.provider_profile, Decimal('5.00')))
+        with CaptureQueriesContext(connection) as many_orders:
+            service.process_order_completion(order)
+        
+        self.assertEqual(len(few_orders), len(many_orders))
+        self.assertLessEqual(len(many_orders), 10)
+
+
+class TestBadgeBatchRecalculation(BadgeTestCase):
+    
+    def setUp(self):
+        super().setUp()
+        BadgeInitializationService.create_default_badge_types()
+        clear_badge_type_registry()  # setUp signals may have loaded it before the defaults existed
+    
+    def test_recalculate_awards_missed_badges_once(self):
+        """Test the batch engine awards badges the signal handlers missed, and only once"""
+        for amount in (Decimal('600.00'), Decimal('500.00')):
+            self.create_business_order(self.provider_profile, amount)
+        ProviderBadge.objects.all().delete()
+        
+        results = recalculate_badges(notify=False)
+        
+        earned = set(ProviderBadge.objects.filter(provider=self.provider_user).values_list('badge_type__name', flat=True))
+        self.assertEqual(earned, {'First Order', 'Revenue Milestone - R1000'})
+        self.assertEqual(results['badges_awarded'], 2)
+        self.assertEqual(results['providers_processed'], 1)
+        
+        stats = ProviderBadgeStats.objects.get(provider=self.provider_user)
+        self.assertEqual(stats.total_badges, 2)
+        self.assertEqual(stats.milestone_badges, 2)
+        self.assertEqual(stats.epic_badges, 0)
+        
+        self.assertEqual(recalculate_badges(notify=False)['badges_awarded'], 0)
+        self.assertEqual(ProviderBadge.objects.filter(provider=self.provider_user).count(), 2)
+    
+    def test_recalculate_query_count_does_not_grow_with_providers(self):
+        """Test a full recalculation runs the same queries for one provider or many"""
+        self.create_business_order(self.provider_profile, Decimal('5.00'))
+        ProviderBadge.objects.all().delete()
+        get_badge_type('First Order')  # load the badge type registry outside the measurement
+        with CaptureQueriesContext(connection) as one_provider:
+            recalculate_badges(notify=False)
+        
+        for index in range(3):
+            self.create_business_order(self.create_provider(index), Decimal('5.00'))
+        ProviderBadge.objects.all().delete()
+        with CaptureQueriesContext(connection) as many_providers:
+            results = recalculate_badges(notify=False)
+        
+        self.assertEqual(results['badges_awarded'], 4)
+        self.assertEqual(len(one_provider), len(many_providers))
+        self.assertEqual(ProviderBadgeStats.objects.filter(total_badges=1).count(), 4)
+    
+    def test_recalculate_notifies_only_inserted_badges(self):
+        """Test a monthly badge a signal handler awarded first is neither returned nor notified"""
+        orders = [self.create_business_order(self.provider_profile, Decimal('5.00')) for _ in range(10)]
+        for order in orders[:3]:
+            Review.objects.create(
+                interaction=order.interaction,
+                reviewer=self.customer_user,
+                business=self.provider_profile,
+                general_rating=5
+            )
+        ProviderBadge.objects.all().delete()
+        now = timezone.now()
+        ProviderBadge.objects.create(
+            provider=self.provider_user,
+            badge_type=BadgeType.objects.get(name='Provider of the Month'),
+            earned_reason='Signal handler',
+            month=now.month,
+            year=now.year
+        )
+        Notification.objects.all().delete()
+        
+        # The handler's badge lands after the engine read the earned badges
+        with patch('badges.batch.earned_badge_pairs', return_value=set()):
+            results = recalculate_badges()
+        
+        self.assertEqual([badge.badge_type.name for badge in results['new_badges']], ['First Order'])
+        self.assertEqual(results['badges_awarded'], 1)
+        self.assertEqual(
+            list(Notification.objects.filter(notification_type='badge_earned').values_list('title', flat=True)),
+            ['🏆 Badge Earned: First Order!']
+        )
+    
+    def test_calculate_provider_badges_only_touches_that_provider(self):
+        """Test single-provider calculation leaves other providers alone"""
+        other = self.create_provider(0)
+        self.create_business_order(self.provider_profile, Decimal('5.00'))
+        self.create_business_order(other, Decimal('5.00'))
+        ProviderBadge.objects.all().delete()
+        
+        badges = BadgeService().calculate_provider_badges(self.provider_user)
+        
+        self.assertEqual([badge.badge_type.name for badge in badges], ['First Order'])
+        self.assertFalse(ProviderBadge.objects.filter(provider=other.user).exists())
+    
+    def run_pool_in_process(self):
+        """Patch the worker pool to run its partitions in this process, recording them"""
+        partitions = []
+        
+        class InProcessPool:
+            def __init__(self, processes):
+                self.processes = processes
+            
+            def __enter__(self):
+                return self
+            
+            def __exit__(self, *exc_info):
+                return False
+            
+            def starmap(self, func, iterable):
+                calls = list(iterable)
+                partitions.extend(args[0] for args in calls)
+                return [func(*args) for args in calls]
+        
+        context = Mock(Pool=InProcessPool)
+        patchers = [
+            patch('badges.batch.multiprocessing.get_context', return_value=context),
+            # Closing connections would break the test transaction
+            patch('badges.batch.connections.close_all'),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return partitions
+    
+    def test_recalculate_all_badges_partitions_and_merges_workers(self):
+        """Test every provider lands in exactly one partition and the partition results are summed"""
+        providers = [self.provider_profile] + [self.create_provider(index) for index in range(4)]
+        for profile in providers:
+            self.create_business_order(profile, Decimal('5.00'))
+        ProviderBadge.objects.all().delete()
+        partitions = self.run_pool_in_process()
+        
+        results = recalculate_all_badges(workers=3, notify=False)
+        
+        self.assertEqual([len(partition) for partition in partitions], [2, 2, 1])
+        self.assertCountEqual(
+            [provider_id for partition in partitions for provider_id in partition],
+            [profile.user.UserID for profile in providers]
+        )
+        self.assertEqual(results, {'providers_processed': 5, 'badges_awarded': 5, 'errors': []})
+        self.assertEqual(ProviderBadge.objects.filter(badge_type__name='First Order').count(), 5)
+    
+    def test_recalculate_all_badges_collects_partition_errors(self):
+        """Test a failing partition is reported while the others are still counted"""
+        for index in range(3):
+            self.create_business_order(self.create_provider(index), Decimal('5.00'))
+        ProviderBadge.objects.all().delete()
+        partitions = self.run_pool_in_process()
+        failing_id = self.provider_user.UserID
+        
+        def recalculate(provider_ids, year, month, notify):
+            if failing_id in provider_ids:
+                raise RuntimeError('partition failed')
+            return recalculate_badges(provider_ids, year, month, notify)
+        
+        with patch('badges.batch.recalculate_badges', side_effect=recalculate):
+            results = recalculate_all_badges(workers=2, notify=False)
+        
+        self.assertEqual(len(partitions), 2)
+        self.assertEqual(results['errors'], ['partition failed'])
+        self.assertEqual(results['providers_processed'], 2)
+        self.assertEqual(results['badges_awarded'], 2)
+    
+    @pytest.mark.slow
+    def test_recalculate_all_badges_benchmark_10000_providers(self):
+        """Benchmark recalculating badges for 10,000 providers with one completed order each"""
+        users = User.objects.bulk_create([
+            User(username=f'bench_{index}', email=f'bench{index}@test.com', user_type='provider')
+            for index in range(10000)
+        ])
+        profiles = FoodProviderProfile.objects.bulk_create([
+            FoodProviderProfile(
+                user=user,
+                business_name=f'Bench Restaurant {index}',
+                business_address='123 Test St',
+                business_contact='+1234567890',
+                business_email=f'bench{index}@test.com',
+                status='verified',
+                cipc_document='provider_documents/bench_cipc.pdf'
+            )
+            for index, user in enumerate(users)
+        ], batch_size=1000)
+        interactions = Interaction.objects.bulk_create([
+            Interaction(
+                business=profile,
+                user=self.customer_user,
+                total_amount=Decimal('25.00'),
+                interaction_type='Purchase',
+                status='completed',
+                quantity=1
+            )
+            for profile in profiles
+        ], batch_size=1000)
+        Order.objects.bulk_create([
+            Order(interaction=interaction, status='completed', pickup_window='17:00-19:00', pickup_code=f'B{index}')
+            for index, interaction in enumerate(interactions)
+        ], batch_size=1000)
+        
+        start_time = time.perf_counter()
+        results = recalculate_all_badges()
+        execution_time = time.perf_counter() - start_time
+        
+        self.assertEqual(results['errors'], [])
+        self.assertGreaterEqual(results['providers_processed'], 10000)
+        self.assertGreaterEqual(results['badges_awarded'], 10000)
+        self.assertLess(execution_time, 10.0, f"Recalculating 10,000 providers took {execution_time:.2f} seconds")
+
+
+class TestBadgeLeaderboards(BadgeTestCase):
+    
+    def setUp(self):
+        super().setUp()
+        BadgeInitializationService.create_default_badge_types()
+        clear_badge_type_registry()  # setUp signals may have loaded it before the defaults existed
+        now = timezone.now()
+        self.year, self.month = now.year, now.month
+    
+    def review_order(self, order, rating):
+        return Review.objects.create(
+            interaction=order.interaction,
+            reviewer=self.customer_user,
+            business=order.interaction.business,
+            general_rating=rating
+        )
+    
+    def test_leaderboards_rank_providers_per_type(self):
+        """Test each leaderboard type ranks providers by its own metric"""
+        runner_up = self.create_provider(0)
+        self.create_business_order(self.provider_profile, Decimal('50.00'))
+        for _ in range(2):
+            self.create_business_order(runner_up, Decimal('5.00'))
+        
+        with self.assertNumQueries(1):
+            top_orders = top_providers('orders', self.year, self.month)
+        self.assertEqual([entry['provider'] for entry in top_orders], [runner_up.user.UserID, self.provider_user.UserID])
+        self.assertEqual([entry['place'] for entry in top_orders], [1, 2])
+        
+        leaderboards, badges = calculate_leaderboards(self.year, self.month, finalize=False)
+        by_type = {leaderboard.leaderboard_type: leaderboard for leaderboard in leaderboards}
+        self.assertEqual(badges, [])
+        self.assertEqual(by_type['revenue'].first_place, self.provider_user)
+        self.assertEqual(by_type['revenue'].first_place_value, Decimal('50.00'))
+        self.assertEqual(by_type['revenue'].second_place_value, Decimal('10.00'))
+        self.assertEqual(by_type['orders'].first_place, runner_up.user)
+        self.assertIsNone(by_type['orders'].third_place)
+        self.assertIsNone(by_type['rating'].first_place)
+        self.assertFalse(any(leaderboard.is_finalized for leaderboard in leaderboards))
+    
+    def test_finalize_awards_place_badges_once(self):
+        """Test finalizing awards the rating place badges and a second run awards nothing"""
+        runner_up = self.create_provider(0)
+        for rating in (5, 5, 4):
+            self.review_order(self.create_business_order(self.provider_profile, Decimal('5.00')), rating)
+        for rating in (4, 4, 4):
+            self.review_order(self.create_business_order(runner_up, Decimal('5.00')), rating)
+        
+        _, badges = calculate_leaderboards(self.year, self.month, finalize=True, notify=False)
+        
+        awarded = {(badge.provider_id, badge.badge_type.name) for badge in badges}
+        self.assertEqual(awarded, {
+            (self.provider_user.UserID, 'Top Provider - First Place'),
+            (runner_up.user.UserID, 'Top Provider - Second Place'),
+        })
+        self.assertTrue(BadgeLeaderboard.objects.get(leaderboard_type='rating', year=self.year, month=self.month).is_finalized)
+        self.assertEqual(ProviderBadgeStats.objects.get(provider=self.provider_user).performance_badges, 1)
+        
+        _, badges = calculate_leaderboards(self.year, self.month, finalize=True, notify=False)
+        self.assertEqual(badges, [])
+        self.assertEqual(ProviderBadge.objects.filter(badge_type__category='performance').count(), 2)
+    
+    def test_monthly_leaderboards_view_serves_precomputed_rows(self):
+        """Test the monthly leaderboards endpoint reads the stored rows"""
+        self.create_business_order(self.provider_profile, Decimal('20.00'))
+        calculate_leaderboards(self.year, self.month, finalize=False)
+        url = reverse('badges:monthly-leaderboards')
+        
+        response = self.api_client.get(url, {'year': self.year, 'month': self.month})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        by_type = {row['leaderboard_type']: row for row in response.data['leaderboards']}
+        self.assertEqual(len(by_type), 4)
+        self.assertEqual(by_type['orders']['first_place_name'], 'Test Restaurant')
+        self.assertFalse(by_type['orders']['is_finalized'])
+        
+        response = self.api_client.get(url, {'month': 'june'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestBadgeCaching(BadgeTestCase):
+    
+    def award_badge(self, **kwargs):
+        badge = ProviderBadge.objects.create(
+            provider=self.provider_user, badge_type=self.badge_type, earned_reason='Test', **kwargs
+        )
+        BadgeService().update_provider_badge_stats(self.provider_user)
+        return badge
+    
+    def test_badge_leaderboard_served_from_cache(self):
+        """Test repeated leaderboard requests hit the cache and revalidate with the ETag"""
+        self.award_badge()
+        url = reverse('badges:badge-leaderboard')
+        
+        response = self.api_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['leaderboard'][0]['provider_name'], 'Test Restaurant')
+        etag = response['ETag']
+        
+        with self.assertNumQueries(0):
+            response = self.api_client.get(url)
+        self.assertEqual(response.data['total_providers'], 1)
+        
+        response = self.api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertNotEqual(self.api_client.get(url, {'limit': 5})['ETag'], etag)
+    
+    def test_badge_leaderboard_refreshed_when_stats_change(self):
+        """Test the cached leaderboard is dropped once new badge stats are committed"""
+        url = reverse('badges:badge-leaderboard')
+        response = self.api_client.get(url)
+        self.assertEqual(response.data['leaderboard'], [])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.award_badge()
+        
+        refreshed = self.api_client.get(url)
+        self.assertEqual(refreshed.data['total_providers'], 1)
+        self.assertNotEqual(refreshed['ETag'], response['ETag'])
+    
+    def test_unchanged_stats_keep_the_cached_leaderboard(self):
+        """Test recalculating stats that did not change neither writes them nor drops the leaderboard"""
+        from badges.caching import get_leaderboard_cache_version
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.award_badge()
+        version = get_leaderboard_cache_version()
+        calculated_at = ProviderBadgeStats.objects.get(provider=self.provider_user).last_calculated_at
+        
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            BadgeService().update_provider_badge_stats(self.provider_user)
+        
+        self.assertEqual(callbacks, [])
+        self.assertEqual(get_leaderboard_cache_version(), version)
+        self.assertEqual(ProviderBadgeStats.objects.get(provider=self.provider_user).last_calculated_at, calculated_at)
+    
+    def test_provider_badge_profile_revalidates_until_badges_change(self):
+        """Test the public badge profile returns 304 until a badge is pinned"""
+        badge = self.award_badge()
+        url = reverse('badges:provider-badges', kwargs={'provider_id': self.provider_user.UserID})
+        
+        response = self.api_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['badges'], [])
+        etag = response['ETag']
+        
+        with self.assertNumQueries(1):
+            response = self.api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        self.assertTrue(BadgeService().pin_badge(self.provider_user, str(badge.id)))
+        response = self.api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['badges']), 1)
+    
+    def test_my_badges_counts_come_from_stats(self):
+        """Test the provider's own badge counts are read from their badge stats"""
+        self.award_badge()
+        url = reverse('badges:my-badges')
+        
+        response = self.authenticated_provider_client.get(url)
+        self.assertEqual(response.data['badges']['total_count'], 1)
+        self.assertEqual(response.data['badges']['categories']['milestone'], 1)
+        self.assertEqual(response.data['badges']['categories']['performance'], 0)
+        
+        response = self.authenticated_provider_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
 class TestBadgeTypeListView(BadgeTestCase):
     
     def test_get_badge_types(self):
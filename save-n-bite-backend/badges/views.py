@@ -9,10 +9,15 @@ from django.contrib.auth import get_user_model
 from django.db.models import Q
 from django.utils import timezone
 from django.core.paginator import Paginator
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from collections import Counter
 import logging
 
-from .models import BadgeType, ProviderBadge, ProviderBadgeStats, BadgeLeaderboard
+from .models import BadgeType, ProviderBadge, BadgeLeaderboard
 from .services import BadgeService
+from .caching import LEADERBOARD_MAX_LIMIT, badge_profile_etag, get_cached_badge_leaderboard
+from .registry import active_badge_types, get_badge_types_by_category
 from .serializers import (
     BadgeTypeSerializer, ProviderBadgeSerializer, ProviderBadgeStatsSerializer,
     BadgePinSerializer, ProviderBadgeSummarySerializer, BadgeLeaderboardSerializer,
@@ -57,14 +62,24 @@ def get_my_badges(request):
     
     try:
         badge_service = BadgeService()
-        badge_data = badge_service.get_provider_badges(request.user)
+        badge_stats = badge_service.get_provider_badge_stats(request.user)
+        
+        # Badge stats are recalculated on every badge change, so they version the whole payload
+        etag = badge_profile_etag(request.user, badge_stats, own_profile=True)
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        
+        badge_data = badge_service.get_provider_badges(request.user, stats=badge_stats)
         
         # Serialize the data
         all_badges = ProviderBadgeSerializer(badge_data['all_badges'], many=True)
         pinned_badges = ProviderBadgeSerializer(badge_data['pinned_badges'], many=True)
         stats = ProviderBadgeStatsSerializer(badge_data['stats'])
         
-        return Response({
+        response = Response({
             'provider_info': {
                 'provider_id': str(request.user.UserID),
                 'business_name': request.user.provider_profile.business_name
@@ -77,6 +92,9 @@ def get_my_badges(request):
             },
             'stats': stats.data
         }, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
         
     except Exception as e:
         logger.error(f"Error fetching badges for {request.user.email}: {str(e)}")
@@ -92,10 +110,23 @@ def get_provider_badges(request, provider_id):
     Get public badges for a specific provider (for profile viewing)
     """
     try:
-        provider = User.objects.get(UserID=provider_id, user_type='provider')
+        provider = User.objects.select_related('provider_profile', 'badge_stats').get(
+            UserID=provider_id, user_type='provider'
+        )
+        is_own_profile = request.user.is_authenticated and request.user == provider
+        
+        # Get stats
+        stats = getattr(provider, 'badge_stats', None)
+        
+        etag = badge_profile_etag(provider, stats, is_own_profile)
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
         
         # Only show pinned badges publicly, or all if it's the provider themselves
-        if request.user.is_authenticated and request.user == provider:
+        if is_own_profile:
             badges = ProviderBadge.objects.filter(provider=provider).select_related('badge_type')
         else:
             badges = ProviderBadge.objects.filter(
@@ -103,24 +134,21 @@ def get_provider_badges(request, provider_id):
                 is_pinned=True
             ).select_related('badge_type').order_by('pin_order')
         
-        # Get stats
-        try:
-            stats = ProviderBadgeStats.objects.get(provider=provider)
-        except ProviderBadgeStats.DoesNotExist:
-            stats = None
-        
         serializer = ProviderBadgeProfileSerializer(badges, many=True)
         stats_serializer = ProviderBadgeStatsSerializer(stats) if stats else None
         
-        return Response({
+        response = Response({
             'provider_info': {
                 'provider_id': str(provider.UserID),
                 'business_name': provider.provider_profile.business_name
             },
             'badges': serializer.data,
             'stats': stats_serializer.data if stats_serializer else None,
-            'is_own_profile': request.user.is_authenticated and request.user == provider
+            'is_own_profile': is_own_profile
         }, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
         
     except User.DoesNotExist:
         return Response({
@@ -188,18 +216,23 @@ def get_badge_leaderboard(request):
     """
     try:
         limit = int(request.query_params.get('limit', 10))
-        limit = min(max(limit, 1), 50)  # Between 1 and 50
-        
-        badge_service = BadgeService()
-        leaderboard_data = badge_service.get_badge_leaderboard(limit)
+        limit = min(max(limit, 1), LEADERBOARD_MAX_LIMIT)  # Between 1 and 50
         
-        serializer = BadgeLeaderboardRankingSerializer(leaderboard_data, many=True)
+        # Served from the cache, which is refreshed whenever badge stats change
+        leaderboard_data, generated_at, etag = get_cached_badge_leaderboard(limit)
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponseNotModified()
+        else:
+            serializer = BadgeLeaderboardRankingSerializer(leaderboard_data, many=True)
+            response = Response({
+                'leaderboard': serializer.data,
+                'total_providers': len(leaderboard_data),
+                'generated_at': generated_at
+            }, status=status.HTTP_200_OK)
         
-        return Response({
-            'leaderboard': serializer.data,
-            'total_providers': len(leaderboard_data),
-            'generated_at': timezone.now()
-        }, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=60)
+        return response
         
     except Exception as e:
         logger.error(f"Error generating badge leaderboard: {str(e)}")
@@ -212,24 +245,33 @@ def get_badge_leaderboard(request):
 @permission_classes([permissions.AllowAny])
 def get_monthly_leaderboards(request):
     """
-    Get historical monthly leaderboards
+    Get monthly leaderboards, as precomputed by the leaderboard builder.
+    The current month's leaderboards are provisional until finalized.
     """
     try:
-        year = request.query_params.get('year', timezone.now().year)
-        month = request.query_params.get('month', timezone.now().month)
-        
+        year = int(request.query_params.get('year', timezone.now().year))
+        month = int(request.query_params.get('month', timezone.now().month))
+    except ValueError:
+        return Response({
+            'error': 'year and month must be integers'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
         leaderboards = BadgeLeaderboard.objects.filter(
             year=year,
-            month=month,
-            is_finalized=True
-        ).select_related('first_place', 'second_place', 'third_place')
+            month=month
+        ).select_related(
+            'first_place__provider_profile',
+            'second_place__provider_profile',
+            'third_place__provider_profile'
+        )
         
         serializer = BadgeLeaderboardSerializer(leaderboards, many=True)
         
         return Response({
             'leaderboards': serializer.data,
-            'month': int(month),
-            'year': int(year)
+            'month': month,
+            'year': year
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -292,16 +334,15 @@ def get_badge_categories(request):
     Get all badge categories with counts
     """
     try:
-        categories = BadgeType.objects.filter(is_active=True).values('category').distinct()
-        
         category_data = []
-        for category in categories:
-            cat_name = category['category']
-            badge_count = BadgeType.objects.filter(category=cat_name, is_active=True).count()
+        for cat_name, display_name in BadgeType.CATEGORY_CHOICES:
+            badge_count = len(get_badge_types_by_category(cat_name))
+            if not badge_count:
+                continue
             
             category_data.append({
                 'category': cat_name,
-                'display_name': dict(BadgeType.CATEGORY_CHOICES)[cat_name],
+                'display_name': display_name,
                 'badge_count': badge_count
             })
         
@@ -323,17 +364,17 @@ def get_badge_rarities(request):
     Get all badge rarities with counts
     """
     try:
-        rarities = BadgeType.objects.filter(is_active=True).values('rarity').distinct()
+        rarity_counts = Counter(badge_type.rarity for badge_type in active_badge_types().values())
         
         rarity_data = []
-        for rarity in rarities:
-            rarity_name = rarity['rarity']
-            badge_count = BadgeType.objects.filter(rarity=rarity_name, is_active=True).count()
+        for rarity_name, display_name in BadgeType.RARITY_CHOICES:
+            if not rarity_counts[rarity_name]:
+                continue
             
             rarity_data.append({
                 'rarity': rarity_name,
-                'display_name': dict(BadgeType.RARITY_CHOICES)[rarity_name],
-                'badge_count': badge_count
+                'display_name': display_name,
+                'badge_count': rarity_counts[rarity_name]
             })
         
         return Response({
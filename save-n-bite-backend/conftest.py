@@ -16,6 +16,20 @@ def enable_db_access_for_all_tests(db):
     """Enable database access for all tests"""
     pass
 
+@pytest.fixture(autouse=True)
+def clear_badge_type_registry():
+    """Badge types are cached per process, and test rollbacks send no signals"""
+    from badges.registry import clear_badge_type_registry
+    clear_badge_type_registry()
+    yield
+
+@pytest.fixture(autouse=True)
+def clear_plant_registry():
+    """Plants are cached per process, and test rollbacks send no signals"""
+    from digital_garden.registry import clear_plant_registry
+    clear_plant_registry()
+    yield
+
 @pytest.fixture(autouse=True) 
 def disable_signals():
     """Disable problematic signals during tests"""
@@ -0,0 +1,43 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_customer_stats(apps, schema_editor):
+    """
+    Recount existing customer stats from their completed orders. Order
+    completions only add to them from now on, and gardens used to create
+    zeroed stats without the customer's earlier orders.
+    """
+    CustomerStats = apps.get_model('digital_garden', 'CustomerStats')
+    Order = apps.get_model('interactions', 'Order')
+
+    completed = Order.objects.filter(
+        interaction__user=OuterRef('customer'), status='completed'
+    ).order_by().values('interaction__user')
+
+    CustomerStats.objects.update(
+        total_orders=Coalesce(Subquery(completed.annotate(count=Count('id')).values('count')), 0),
+        total_order_amount=Coalesce(
+            Subquery(completed.annotate(total=Sum('interaction__total_amount')).values('total')),
+            Decimal('0'),
+            output_field=models.DecimalField(max_digits=10, decimal_places=2)
+        ),
+        unique_businesses_ordered_from=Coalesce(
+            Subquery(completed.annotate(count=Count('interaction__business', distinct=True)).values('count')), 0
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('digital_garden', '0002_plant_svg_image_url_alter_plant_care_difficulty_and_more'),
+        ('interactions', '0006_rename_interaction_interactionstatushistory_interaction'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_customer_stats, migrations.RunPython.noop),
+    ]
@@ -320,29 +320,21 @@ class CustomerStats(models.Model):
         return f"{self.customer.username} - Stats"
     
     def calculate_stats(self):
-        """Recalculate statistics from orders"""
+        """Recalculate statistics from orders, in one aggregate query"""
         from interactions.models import Order
         from django.db.models import Sum, Count
         
-        completed_orders = Order.objects.filter(
+        totals = Order.objects.filter(
             interaction__user=self.customer,
             status='completed'
+        ).aggregate(
+            total_orders=Count('id'),
+            total_amount=Sum('interaction__total_amount'),
+            unique_businesses=Count('interaction__business', distinct=True)
         )
         
-        # Calculate totals
-        self.total_orders = completed_orders.count()
-        
-        # Calculate total amount
-        total_amount = completed_orders.aggregate(
-            total=Sum('interaction__total_amount')
-        )['total'] or 0
-        self.total_order_amount = total_amount
-        
-        # Calculate unique businesses
-        unique_businesses = completed_orders.values(
-            'interaction__business'
-        ).distinct().count()
-        self.unique_businesses_ordered_from = unique_businesses
+        self.total_orders = totals['total_orders']
+        self.total_order_amount = totals['total_amount'] or 0
+        self.unique_businesses_ordered_from = totals['unique_businesses']
         
         self.save()
-        return self
\ No newline at end of file
@@ -0,0 +1,100 @@
+# digital_garden/registry.py
+
+import random
+import threading
+from bisect import bisect_right
+from itertools import accumulate
+
+from django.core.cache import cache
+
+from .models import Plant
+
+PLANTS_VERSION_KEY = 'garden_plants_version'
+
+# Relative chance of drawing a plant within its rarity, so easier plants are awarded more often
+CARE_DIFFICULTY_WEIGHTS = {
+    'easy': 3,
+    'moderate': 2,
+    'difficult': 1,
+}
+
+
+class _PlantRegistry:
+    """Active plants, loaded once per process and tagged with the version they were loaded at"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._by_id = {}
+        self._draws_by_rarity = {}
+
+    def snapshot(self, version):
+        """
+        (plants by id, (plant ids, cumulative weights) by rarity) for
+        ``version``, reloading once if the version moved on
+        """
+        with self._lock:
+            if self._version == version:
+                return self._by_id, self._draws_by_rarity
+
+        by_id = {plant.id: plant for plant in Plant.objects.filter(is_active=True).order_by('name')}
+        plants_by_rarity = {}
+        for plant in by_id.values():
+            plants_by_rarity.setdefault(plant.rarity, []).append(plant)
+        draws_by_rarity = {
+            rarity: (
+                [plant.id for plant in plants],
+                list(accumulate(CARE_DIFFICULTY_WEIGHTS.get(plant.care_difficulty, 1) for plant in plants)),
+            )
+            for rarity, plants in plants_by_rarity.items()
+        }
+
+        with self._lock:
+            self._version, self._by_id, self._draws_by_rarity = version, by_id, draws_by_rarity
+        return by_id, draws_by_rarity
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+            self._by_id = {}
+            self._draws_by_rarity = {}
+
+
+_registry = _PlantRegistry()
+
+
+def get_plants_version():
+    """Current version stamp of the plants, shared by every process through the cache"""
+    version = cache.get(PLANTS_VERSION_KEY)
+    if version is None:
+        cache.add(PLANTS_VERSION_KEY, 1, None)
+        version = cache.get(PLANTS_VERSION_KEY, 1)
+    return version
+
+
+def invalidate_plants():
+    """Make every process reload its plants on next use"""
+    _registry.clear()
+    try:
+        cache.incr(PLANTS_VERSION_KEY)
+    except ValueError:
+        cache.set(PLANTS_VERSION_KEY, 2, None)
+
+
+def pick_random_plant(rarity):
+    """
+    A random active plant of ``rarity``, or None if there is none, drawn in
+    memory from the cached plant ids by bisecting their cumulative
+    ``CARE_DIFFICULTY_WEIGHTS``. Instances are shared by the whole process and
+    must not be modified.
+    """
+    by_id, draws_by_rarity = _registry.snapshot(get_plants_version())
+    if rarity not in draws_by_rarity:
+        return None
+    plant_ids, cumulative_weights = draws_by_rarity[rarity]
+    index = bisect_right(cumulative_weights, random.random() * cumulative_weights[-1])
+    return by_id[plant_ids[index]]
+
+
+def clear_plant_registry():
+    _registry.clear()
@@ -1,9 +1,12 @@
 # digital_garden/services.py
 
 from django.db import transaction
+from django.db.models import F
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from decimal import Decimal
+from bisect import bisect_right
+from operator import itemgetter
 import logging
 from typing import List, Dict, Tuple, Optional
 
@@ -11,11 +14,42 @@ from .models import (
     Plant, CustomerGarden, GardenTile, PlantInventory,
     PlantReward, CustomerStats
 )
+from .registry import pick_random_plant
 from interactions.models import Order
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+# Milestone thresholds and the rarity of the plant each one awards, in ascending order
+ORDER_COUNT_MILESTONES = [
+    (1, 'uncommon'),   # First order
+    (3, 'uncommon'),   # 3rd order
+    (5, 'rare'),       # 5th order
+    (10, 'rare'),      # 10th order
+    (15, 'epic'),      # 15th order
+    (20, 'epic'),      # 20th order
+    (25, 'legendary'), # 25th order
+    (30, 'legendary'), # 30th order
+    (50, 'legendary'), # 50th order
+    (100, 'legendary') # 100th order
+]
+
+ORDER_AMOUNT_MILESTONES = [
+    (150, 'uncommon'),
+    (200, 'uncommon'),
+    (300, 'rare'),
+    (500, 'epic'),
+    (1000, 'legendary')
+]
+
+BUSINESS_COUNT_MILESTONES = [
+    (5, 'rare'),       # 5 different businesses
+    (10, 'epic'),      # 10 different businesses
+    (15, 'epic'),      # 15 different businesses
+    (20, 'legendary'), # 20 different businesses
+    (25, 'legendary')  # 25 different businesses
+]
+
 
 class DigitalGardenService:
     """Core service class for digital garden operations"""
@@ -66,34 +100,34 @@ class DigitalGardenService:
                             f"Created {len(tiles_to_create)} missing tiles for garden {garden.id}"
                         )
                 
-                # Initialize stats
-                CustomerStats.objects.get_or_create(customer=customer)
-                
                 if created:
                     self.logger.info(f"Initialized new garden for customer {customer.username}")
                 
                 return garden
     
     def process_order_completion(self, order: Order) -> Dict:
-        """Process plant rewards when an order is completed"""
+        """
+        Process plant rewards when an order is completed. The customer's stats
+        are updated incrementally, milestones are checked against the updated
+        counters in memory and plants are drawn from the plant registry.
+        """
         customer = order.interaction.user
-        
         if customer.user_type != 'customer':
+            self.logger.warning(f"Non-customer user {customer.username} completed order {order.id}")
             return {'plants_earned': []}
         
         # Ensure garden exists
         garden = self.initialize_customer_garden(customer)
         
-        # Calculate and update stats
-        stats = self.update_customer_stats(customer)
-        
         plants_earned = []
         
         with transaction.atomic():
+            stats = self.record_order_completion(customer, order)
+            
             # 1. Always give a common plant for any order
-            common_plant = self._get_random_plant('common')
+            common_plant = pick_random_plant('common')
             if common_plant:
-                inventory_item = self._add_plant_to_inventory(
+                self._add_plant_to_inventory(
                     customer=customer,
                     plant=common_plant,
                     quantity=1,
@@ -103,12 +137,15 @@ class DigitalGardenService:
                 plants_earned.append({
                     'plant': common_plant,
                     'quantity': 1,
-                    'reason': 'Regular order completion'
+                    'reason': 'order',
+                    'description': 'Regular order completion'
                 })
                 
                 # Update garden stats
-                garden.total_plants_earned += 1
-                garden.save()
+                CustomerGarden.objects.filter(pk=garden.pk).update(
+                    total_plants_earned=F('total_plants_earned') + 1,
+                    updated_at=timezone.now()
+                )
             
             # 2. Check for milestone rewards
             milestone_plants = self._check_and_award_milestones(
@@ -118,7 +155,7 @@ class DigitalGardenService:
         
         self.logger.info(
             f"Order {order.id} completed for {customer.username}. "
-            f"Earned {len(plants_earned)} plants"
+            f"Earned {len(plants_earned)} plants: {[p['plant'].name for p in plants_earned]}"
         )
         
         return {
@@ -270,14 +307,56 @@ class DigitalGardenService:
         return from_tile, to_tile
     
     def update_customer_stats(self, customer: User) -> CustomerStats:
-        """Update customer statistics based on completed orders"""
+        """Recalculate customer statistics from all of their completed orders"""
         stats, created = CustomerStats.objects.get_or_create(customer=customer)
         stats.calculate_stats()
         return stats
     
+    def get_customer_stats(self, customer: User) -> CustomerStats:
+        """
+        Get customer statistics, which order completions keep up to date,
+        calculating them from the order history the first time
+        """
+        stats, created = CustomerStats.objects.get_or_create(customer=customer)
+        if created:
+            stats.calculate_stats()
+        return stats
+    
+    def record_order_completion(self, customer: User, order: Order) -> CustomerStats:
+        """
+        Add a completed order to the customer's statistics with F() expressions
+        instead of recounting every order. Must run inside a transaction: the
+        update locks the stats row, so concurrent completions for the same
+        customer read each other's counters and milestones.
+        """
+        stats, created = CustomerStats.objects.get_or_create(customer=customer)
+        if created:
+            # First stats for this customer, the order history already includes this order
+            stats.calculate_stats()
+            return stats
+        
+        interaction = order.interaction
+        new_business = not Order.objects.filter(
+            interaction__user=customer,
+            interaction__business_id=interaction.business_id,
+            status='completed'
+        ).exclude(pk=order.pk).exists()
+        
+        CustomerStats.objects.filter(pk=stats.pk).update(
+            total_orders=F('total_orders') + 1,
+            total_order_amount=F('total_order_amount') + interaction.total_amount,
+            unique_businesses_ordered_from=F('unique_businesses_ordered_from') + int(new_business),
+            last_calculated_at=timezone.now()
+        )
+        stats.refresh_from_db(fields=[
+            'total_orders', 'total_order_amount', 'unique_businesses_ordered_from',
+            'achieved_milestones', 'last_calculated_at'
+        ])
+        return stats
+    
     def get_next_milestones(self, customer: User) -> List[Dict]:
         """Get the next achievable milestones for a customer"""
-        stats = CustomerStats.objects.get_or_create(customer=customer)[0]
+        stats = self.get_customer_stats(customer)
         
         # Define milestone thresholds
         order_milestones = [1, 3, 5, 10, 15, 20, 25, 30, 50, 100]
@@ -334,13 +413,6 @@ class DigitalGardenService:
             queryset = queryset.filter(rarity=rarity)
         return list(queryset.order_by('name'))
     
-    def _get_random_plant(self, rarity: str) -> Optional[Plant]:
-        """Get a random plant of specified rarity"""
-        plants = Plant.objects.filter(rarity=rarity, is_active=True)
-        if plants.exists():
-            return plants.order_by('?').first()
-        return None
-    
     def _add_plant_to_inventory(self, customer: User, plant: Plant, quantity: int = 1, 
                                reason: str = 'order', order: Order = None) -> PlantInventory:
         """Add a plant to customer's inventory"""
@@ -355,165 +427,95 @@ class DigitalGardenService:
         )
         
         if not created:
+            PlantInventory.objects.filter(pk=inventory_item.pk).update(quantity=F('quantity') + quantity)
             inventory_item.quantity += quantity
-            inventory_item.save()
         
         return inventory_item
     
     def _check_and_award_milestones(self, customer: User, stats: CustomerStats, order: Order) -> List[Dict]:
-        """Check for milestone achievements and award plants"""
-        plants_earned = []
-        
-        # Get order details
+        """
+        Check for milestone achievements and award plants. The updated
+        counters are compared with the milestone tables, so no queries are
+        made unless a milestone is reached.
+        """
         order_amount = float(order.interaction.total_amount)
         
-        # Check order count milestones
-        order_milestones = self._check_order_count_milestones(customer, stats)
-        plants_earned.extend(order_milestones)
-        
-        # Check order amount milestones  
-        amount_milestones = self._check_order_amount_milestones(customer, stats, order_amount)
-        plants_earned.extend(amount_milestones)
-        
-        # Check business diversity milestones
-        business_milestones = self._check_business_milestones(customer, stats)
-        plants_earned.extend(business_milestones)
-        
-        return plants_earned
-    
-    def _check_order_count_milestones(self, customer: User, stats: CustomerStats) -> List[Dict]:
-        """Check and award order count milestone rewards"""
         plants_earned = []
-        milestone_key = 'order_count'
-        
-        # Define order count milestones and their rarities
-        milestones = [
-            (1, 'uncommon'),   # First order
-            (3, 'uncommon'),   # 3rd order  
-            (5, 'rare'),       # 5th order
-            (10, 'rare'),      # 10th order
-            (15, 'epic'),      # 15th order
-            (20, 'epic'),      # 20th order
-            (25, 'legendary'), # 25th order
-            (30, 'legendary'), # 30th order
-            (50, 'legendary'), # 50th order
-            (100, 'legendary') # 100th order
-        ]
         
-        achieved_milestones = stats.achieved_milestones.get(milestone_key, [])
-        
-        for count, rarity in milestones:
-            if stats.total_orders >= count and count not in achieved_milestones:
-                # Award plant
-                plant = self._get_random_plant(rarity)
-                if plant:
-                    self._add_plant_to_inventory(
-                        customer=customer,
-                        plant=plant,
-                        reason='milestone_orders'
-                    )
-                    
-                    plants_earned.append({
-                        'plant': plant,
-                        'quantity': 1,
-                        'reason': f'Order milestone: {count} orders completed'
-                    })
-                    
-                    # Mark milestone as achieved
-                    achieved_milestones.append(count)
-        
-        # Update achieved milestones
-        if achieved_milestones:
-            stats.achieved_milestones[milestone_key] = achieved_milestones
-            stats.save()
-        
-        return plants_earned
-    
-    def _check_order_amount_milestones(self, customer: User, stats: CustomerStats, order_amount: float) -> List[Dict]:
-        """Check and award order amount milestone rewards"""
-        plants_earned = []
-        milestone_key = 'order_amount'
-        
-        # Define amount milestones and their rarities
-        milestones = [
-            (150, 'uncommon'),
-            (200, 'uncommon'), 
-            (300, 'rare'),
-            (500, 'epic'),
-            (1000, 'legendary')
-        ]
-        
-        achieved_milestones = stats.achieved_milestones.get(milestone_key, [])
-        
-        for amount, rarity in milestones:
-            if order_amount >= amount and amount not in achieved_milestones:
-                # Award plant
-                plant = self._get_random_plant(rarity)
-                if plant:
-                    self._add_plant_to_inventory(
-                        customer=customer,
-                        plant=plant,
-                        reason='milestone_amount'
-                    )
-                    
-                    plants_earned.append({
-                        'plant': plant,
-                        'quantity': 1,
-                        'reason': f'Order amount milestone: R{amount} order'
-                    })
-                    
-                    # Mark milestone as achieved
-                    achieved_milestones.append(amount)
+        # Order count milestones
+        for count, plant in self._reach_milestones(stats, 'order_count', ORDER_COUNT_MILESTONES, stats.total_orders):
+            self._add_plant_to_inventory(customer=customer, plant=plant, reason='milestone_orders')
+            plants_earned.append({
+                'plant': plant,
+                'quantity': 1,
+                'reason': 'milestone_orders',
+                'description': f'Order milestone: {count} orders completed',
+                'milestone_details': {
+                    'milestone_count': count,
+                    'milestone_type': 'order_count',
+                    'total_orders': stats.total_orders
+                }
+            })
+        
+        # Order amount milestones, reached by the amount of a single order
+        for amount, plant in self._reach_milestones(stats, 'order_amount', ORDER_AMOUNT_MILESTONES, order_amount):
+            self._add_plant_to_inventory(customer=customer, plant=plant, reason='milestone_amount')
+            plants_earned.append({
+                'plant': plant,
+                'quantity': 1,
+                'reason': 'milestone_amount',
+                'description': f'Order amount milestone: R{amount} order',
+                'milestone_details': {
+                    'milestone_amount': amount,
+                    'milestone_type': 'order_amount',
+                    'current_order_amount': order_amount
+                }
+            })
+        
+        # Business diversity milestones
+        for count, plant in self._reach_milestones(
+            stats, 'business_count', BUSINESS_COUNT_MILESTONES, stats.unique_businesses_ordered_from
+        ):
+            self._add_plant_to_inventory(customer=customer, plant=plant, reason='milestone_businesses')
+            plants_earned.append({
+                'plant': plant,
+                'quantity': 1,
+                'reason': 'milestone_businesses',
+                'description': f'Business diversity milestone: {count} different businesses',
+                'milestone_details': {
+                    'business_count': count,
+                    'milestone_type': 'business_diversity',
+                    'total_businesses': stats.unique_businesses_ordered_from
+                }
+            })
         
         # Update achieved milestones
-        if achieved_milestones:
-            stats.achieved_milestones[milestone_key] = achieved_milestones
-            stats.save()
+        if plants_earned:
+            CustomerStats.objects.filter(pk=stats.pk).update(achieved_milestones=stats.achieved_milestones)
         
         return plants_earned
     
-    def _check_business_milestones(self, customer: User, stats: CustomerStats) -> List[Dict]:
-        """Check and award business diversity milestone rewards"""
-        plants_earned = []
-        milestone_key = 'business_count'
-        
-        # Define business count milestones and their rarities
-        milestones = [
-            (5, 'rare'),       # 5 different businesses
-            (10, 'epic'),      # 10 different businesses
-            (15, 'epic'),      # 15 different businesses
-            (20, 'legendary'), # 20 different businesses
-            (25, 'legendary')  # 25 different businesses
-        ]
-        
-        achieved_milestones = stats.achieved_milestones.get(milestone_key, [])
-        
-        for count, rarity in milestones:
-            if stats.unique_businesses_ordered_from >= count and count not in achieved_milestones:
-                # Award plant
-                plant = self._get_random_plant(rarity)
-                if plant:
-                    self._add_plant_to_inventory(
-                        customer=customer,
-                        plant=plant,
-                        reason='milestone_businesses'
-                    )
-                    
-                    plants_earned.append({
-                        'plant': plant,
-                        'quantity': 1,
-                        'reason': f'Business diversity milestone: {count} unique businesses'
-                    })
-                    
-                    # Mark milestone as achieved
-                    achieved_milestones.append(count)
-        
-        # Update achieved milestones
-        if achieved_milestones:
-            stats.achieved_milestones[milestone_key] = achieved_milestones
-            stats.save()
-        
-        return plants_earned
+    def _reach_milestones(self, stats: CustomerStats, milestone_key: str,
+                          milestones: List[Tuple[int, str]], value) -> List[Tuple[int, Plant]]:
+        """
+        (threshold, plant) for every milestone of an ascending table that
+        ``value`` reaches for the first time, marking them achieved on
+        ``stats``. Milestones without a plant of their rarity stay unachieved.
+        """
+        achieved = stats.achieved_milestones.get(milestone_key, [])
+        reached = []
+        
+        for threshold, rarity in milestones[:bisect_right(milestones, value, key=itemgetter(0))]:
+            if threshold in achieved:
+                continue
+            plant = pick_random_plant(rarity)
+            if plant:
+                reached.append((threshold, plant))
+                achieved.append(threshold)
+        
+        if reached:
+            stats.achieved_milestones[milestone_key] = achieved
+        return reached
     
     def perform_bulk_garden_actions(self, customer: User, actions: List[Dict]) -> Dict:
         """Perform multiple garden actions in a single transaction"""
@@ -582,255 +584,6 @@ class DigitalGardenService:
             'errors': errors
         }
     
-    def process_order_completion(self, order: Order):
-        """
-        Updated method to process order completion and send notifications
-        """
-        customer = order.interaction.user
-        if customer.user_type != 'customer':
-            self.logger.warning(f"Non-customer user {customer.username} completed order {order.id}")
-            return []
-        
-        plants_earned = []
-        
-        try:
-            # Get or create customer stats
-            stats, created = CustomerStats.objects.get_or_create(
-                customer=customer,
-                defaults={
-                    'total_orders': 0,
-                    'total_order_amount': 0,
-                    'unique_businesses_ordered_from': 0,
-                    'achieved_milestones': {}
-                }
-            )
-            
-            # Update stats
-            stats.calculate_stats()
-            
-            # Get or create customer garden
-            garden, created = CustomerGarden.objects.get_or_create(
-                customer=customer,
-                defaults={'name': "My Garden"}
-            )
-            
-            # 1. Always give a common plant for any order
-            common_plant = self._get_random_plant('common')
-            if common_plant:
-                inventory_item = self._add_plant_to_inventory(
-                    customer=customer,
-                    plant=common_plant,
-                    quantity=1,
-                    reason='order',
-                    order=order
-                )
-                plants_earned.append({
-                    'plant': common_plant,
-                    'quantity': 1,
-                    'reason': 'order',
-                    'description': 'Regular order completion'
-                })
-                
-                # Update garden stats
-                garden.total_plants_earned += 1
-                garden.save()
-            
-            # 2. Check for milestone rewards
-            milestone_plants = self._check_and_award_milestones(
-                customer, stats, order
-            )
-            plants_earned.extend(milestone_plants)
-            
-            # 3. Send notification for earned plants
-            if plants_earned:
-                try:
-                    if len(plants_earned) == 1:
-                        # Single plant notification
-                        plant_info = plants_earned[0]
-                        milestone_details = plant_info.get('milestone_details') if 'milestone' in plant_info['reason'] else None
-                        
-                        NotificationService.send_plant_earned_notification(
-                            customer=customer,
-                            plant=plant_info['plant'],
-                            quantity=plant_info['quantity'],
-                            reason=plant_info['reason'],
-                            order=order,
-                            milestone_details=milestone_details
-                        )
-                    else:
-                        # Multiple plants notification
-                        NotificationService.send_multiple_plants_earned_notification(
-                            customer=customer,
-                            plants_earned_list=plants_earned,
-                            order=order
-                        )
-                        
-                except Exception as e:
-                    logger.error(f"Failed to send plant earning notifications for order {order.id}: {str(e)}")
-                    # Don't fail the order completion process due to notification errors
-                    
-        except Exception as e:
-            self.logger.error(f"Error processing order completion for {customer.username}: {str(e)}")
-            
-        self.logger.info(
-            f"Order {order.id} completed for {customer.username}. "
-            f"Earned {len(plants_earned)} plants: {[p['plant'].name for p in plants_earned]}"
-        )
-        
-        return plants_earned
-    
-    def _check_order_count_milestones(self, customer: User, stats: CustomerStats) -> List[Dict]:
-        """Check and award order count milestone rewards with notification details"""
-        plants_earned = []
-        milestone_key = 'order_count'
-        
-        # Define order count milestones and their rarities
-        milestones = [
-            (1, 'uncommon'),   # First order
-            (3, 'uncommon'),   # 3rd order  
-            (5, 'rare'),       # 5th order
-            (10, 'rare'),      # 10th order
-            (15, 'epic'),      # 15th order
-            (20, 'epic'),      # 20th order
-            (25, 'legendary'), # 25th order
-            (30, 'legendary'), # 30th order
-            (50, 'legendary'), # 50th order
-            (100, 'legendary') # 100th order
-        ]
-        
-        achieved_milestones = stats.achieved_milestones.get(milestone_key, [])
-        
-        for count, rarity in milestones:
-            if stats.total_orders >= count and count not in achieved_milestones:
-                # Award plant
-                plant = self._get_random_plant(rarity)
-                if plant:
-                    self._add_plant_to_inventory(
-                        customer=customer,
-                        plant=plant,
-                        reason='milestone_orders'
-                    )
-                    
-                    plants_earned.append({
-                        'plant': plant,
-                        'quantity': 1,
-                        'reason': 'milestone_orders',
-                        'description': f'Order milestone: {count} orders completed',
-                        'milestone_details': {
-                            'milestone_count': count,
-                            'milestone_type': 'order_count',
-                            'total_orders': stats.total_orders
-                        }
-                    })
-                    
-                    # Mark milestone as achieved
-                    achieved_milestones.append(count)
-        
-        # Update achieved milestones
-        if achieved_milestones:
-            stats.achieved_milestones[milestone_key] = achieved_milestones
-            stats.save()
-        
-        return plants_earned
-    
-    def _check_order_amount_milestones(self, customer: User, stats: CustomerStats, order_amount: float) -> List[Dict]:
-        """Check and award order amount milestone rewards with notification details"""
-        plants_earned = []
-        milestone_key = 'order_amount'
-        
-        # Define amount milestones and their rarities
-        milestones = [
-            (150, 'uncommon'),
-            (200, 'uncommon'), 
-            (300, 'rare'),
-            (500, 'epic'),
-            (1000, 'legendary')
-        ]
-        
-        achieved_milestones = stats.achieved_milestones.get(milestone_key, [])
-        
-        for amount, rarity in milestones:
-            if order_amount >= amount and amount not in achieved_milestones:
-                # Award plant
-                plant = self._get_random_plant(rarity)
-                if plant:
-                    self._add_plant_to_inventory(
-                        customer=customer,
-                        plant=plant,
-                        reason='milestone_amount'
-                    )
-                    
-                    plants_earned.append({
-                        'plant': plant,
-                        'quantity': 1,
-                        'reason': 'milestone_amount',
-                        'description': f'Order amount milestone: R{amount} order',
-                        'milestone_details': {
-                            'milestone_amount': amount,
-                            'milestone_type': 'order_amount',
-                            'current_order_amount': order_amount
-                        }
-                    })
-                    
-                    # Mark milestone as achieved
-                    achieved_milestones.append(amount)
-        
-        # Update achieved milestones
-        if achieved_milestones:
-            stats.achieved_milestones[milestone_key] = achieved_milestones
-            stats.save()
-        
-        return plants_earned
-    
-    def _check_business_milestones(self, customer: User, stats: CustomerStats) -> List[Dict]:
-        """Check and award business diversity milestone rewards with notification details"""
-        plants_earned = []
-        milestone_key = 'business_count'
-        
-        # Define business count milestones and their rarities
-        milestones = [
-            (5, 'rare'),       # 5 different businesses
-            (10, 'epic'),      # 10 different businesses
-            (15, 'epic'),      # 15 different businesses
-            (20, 'legendary'), # 20 different businesses
-            (25, 'legendary')  # 25 different businesses
-        ]
-        
-        achieved_milestones = stats.achieved_milestones.get(milestone_key, [])
-        
-        for count, rarity in milestones:
-            if stats.unique_businesses_ordered_from >= count and count not in achieved_milestones:
-                # Award plant
-                plant = self._get_random_plant(rarity)
-                if plant:
-                    self._add_plant_to_inventory(
-                        customer=customer,
-                        plant=plant,
-                        reason='milestone_businesses'
-                    )
-                    
-                    plants_earned.append({
-                        'plant': plant,
-                        'quantity': 1,
-                        'reason': 'milestone_businesses',
-                        'description': f'Business diversity milestone: {count} different businesses',
-                        'milestone_details': {
-                            'business_count': count,
-                            'milestone_type': 'business_diversity',
-                            'total_businesses': stats.unique_businesses_ordered_from
-                        }
-                    })
-                    
-                    # Mark milestone as achieved
-                    achieved_milestones.append(count)
-        
-        # Update achieved milestones
-        if achieved_milestones:
-            stats.achieved_milestones[milestone_key] = achieved_milestones
-            stats.save()
-        
-        return plants_earned
-    
     def check_garden_milestones(self, customer: User):
         """
         Check for garden-specific milestones and send notifications
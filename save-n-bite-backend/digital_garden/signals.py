@@ -1,13 +1,15 @@
 # digital_garden/signals.py
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 import logging
 
 from notifications.services import NotificationService
-from .models import PlantInventory
+from .models import Plant, PlantInventory
 from interactions.models import Order
+from .registry import invalidate_plants
 from .services import DigitalGardenService
 
 User = get_user_model()
@@ -20,8 +22,10 @@ def handle_order_completion(sender, instance, **kwargs):
     Signal handler for when an order is completed.
     Automatically awards plants to customer's garden.
     """
-    # Only process when order status changes to completed
-    if instance.status == 'completed' and instance.interaction.user.user_type == 'customer':
+    # Only process when order status changes to completed, customer stats are incremental
+    if (instance.status == 'completed' and
+        instance.get_previous('status') != 'completed' and
+        instance.interaction.user.user_type == 'customer'):
         try:
             service = DigitalGardenService()
             result = service.process_order_completion(instance)
@@ -37,6 +41,12 @@ def handle_order_completion(sender, instance, **kwargs):
                 f"Failed to process plant rewards for order {instance.id}: {str(e)}"
             )
 
+@receiver([post_save, post_delete], sender=Plant)
+def invalidate_plant_registry(sender, instance, **kwargs):
+    """Make every process reload its plants once the change is committed"""
+    transaction.on_commit(invalidate_plants)
+
+
 @receiver(post_save, sender=PlantInventory)
 def notify_plant_earned(sender, instance, created, **kwargs):
     """Send notification when a new plant is added to inventory"""
@@ -1,14 +1,20 @@
 # digital_garden/tests.py - Comprehensive Unit Tests
 
+from django.db import connection
+from django.db.models.signals import post_save
+from django.dispatch import Signal
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework import status
 from datetime import datetime, timedelta
+from functools import partial
 from unittest.mock import patch, Mock
 import uuid
 from decimal import Decimal
@@ -16,8 +22,9 @@ from decimal import Decimal
 from digital_garden.models import (
     Plant, CustomerGarden, GardenTile, PlantInventory, PlantReward, CustomerStats
 )
+from digital_garden.registry import clear_plant_registry, pick_random_plant
 from digital_garden.services import DigitalGardenService
-from authentication.models import CustomerProfile
+from authentication.models import CustomerProfile, FoodProviderProfile
 from interactions.models import Interaction, Order
 
 User = get_user_model()
@@ -28,6 +35,8 @@ class DigitalGardenTestCase(TestCase):
     
     def setUp(self):
         """Set up test data"""
+        # Plants are cached per process and test rollbacks send no signals
+        clear_plant_registry()
         self.api_client = APIClient()
         
         # Create customer user
@@ -589,6 +598,158 @@ class TestGardenStatistics(DigitalGardenTestCase):
     #     self.assertIn('total_plants_placed', response.data['summary'])
 
 
+class TestOrderCompletionRewards(DigitalGardenTestCase):
+    
+    def create_provider(self, index):
+        user = User.objects.create_user(
+            username=f'provider_{index}',
+            email=f'provider{index}@test.com',
+            password='testpass123',
+            user_type='provider'
+        )
+        profile, _ = FoodProviderProfile.objects.get_or_create(
+            user=user,
+            defaults={
+                'business_name': f'Restaurant {index}',
+                'business_address': '123 Test St',
+                'business_contact': '+1234567890',
+                'business_email': f'business{index}@test.com',
+                'status': 'verified',
+                'cipc_document': SimpleUploadedFile("test_cipc.pdf", b"dummy content", content_type="application/pdf")
+            }
+        )
+        return profile
+    
+    def create_completed_order(self, business, amount):
+        interaction = Interaction.objects.create(
+            business=business,
+            user=self.customer_user,
+            total_amount=amount,
+            interaction_type='Purchase',
+            quantity=1
+        )
+        order = Order.objects.create(
+            interaction=interaction,
+            status='ready',
+            pickup_window='17:00-19:00',
+            pickup_code=f'GDN{Order.objects.count()}'
+        )
+        # Completed without the completion signal, the tests process orders themselves
+        Order.objects.filter(pk=order.pk).update(status='completed')
+        order.status = 'completed'
+        return order
+    
+    def test_order_completion_updates_stats_incrementally(self):
+        """Test each completion adds to the stats the full recalculation would give"""
+        first, second = self.create_provider(1), self.create_provider(2)
+        
+        for business, amount in [(first, '100.00'), (first, '20.00'), (second, '30.00')]:
+            result = self.garden_service.process_order_completion(
+                self.create_completed_order(business, Decimal(amount))
+            )
+            self.assertEqual(result['plants_earned'][0]['plant'], self.common_plant)
+        
+        stats = CustomerStats.objects.get(customer=self.customer_user)
+        self.assertEqual(stats.total_orders, 3)
+        self.assertEqual(stats.total_order_amount, Decimal('150.00'))
+        self.assertEqual(stats.unique_businesses_ordered_from, 2)
+        
+        stats.calculate_stats()
+        self.assertEqual(
+            (stats.total_orders, stats.total_order_amount, stats.unique_businesses_ordered_from),
+            (3, Decimal('150.00'), 2)
+        )
+        self.assertEqual(PlantInventory.objects.get(customer=self.customer_user, plant=self.common_plant).quantity, 3)
+        self.assertEqual(CustomerGarden.objects.get(customer=self.customer_user).total_plants_earned, 3)
+    
+    def test_milestones_awarded_from_updated_counters(self):
+        """Test milestones are awarded once, and only when a plant of their rarity exists"""
+        business = self.create_provider(1)
+        CustomerStats.objects.create(
+            customer=self.customer_user,
+            total_orders=4,
+            total_order_amount=Decimal('40.00'),
+            unique_businesses_ordered_from=1
+        )
+        
+        result = self.garden_service.process_order_completion(self.create_completed_order(business, Decimal('10.00')))
+        
+        self.assertEqual([plant['reason'] for plant in result['plants_earned']], ['order', 'milestone_orders'])
+        self.assertEqual(result['plants_earned'][1]['plant'], self.rare_plant)
+        self.assertEqual(result['plants_earned'][1]['milestone_details']['milestone_count'], 5)
+        stats = CustomerStats.objects.get(customer=self.customer_user)
+        # There are no uncommon plants, so the 1 and 3 order milestones are still open
+        self.assertEqual(stats.achieved_milestones, {'order_count': [5]})
+        
+        result = self.garden_service.process_order_completion(self.create_completed_order(business, Decimal('10.00')))
+        self.assertEqual([plant['reason'] for plant in result['plants_earned']], ['order'])
+    
+    def test_plants_drawn_from_registry(self):
+        """Test plants are picked in memory and the registry follows plant changes"""
+        pick_random_plant('common')
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(pick_random_plant('common'), self.common_plant)
+            self.assertIsNone(pick_random_plant('legendary'))
+        
+        # conftest patches post_save.send out, let the invalidation receiver run for this save
+        with patch.object(post_save, 'send', partial(Signal.send, post_save)):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.common_plant.is_active = False
+                self.common_plant.save()
+        self.assertIsNone(pick_random_plant('common'))
+    
+    def test_plants_drawn_by_care_difficulty_weight(self):
+        """Test plants of a rarity are drawn in proportion to their care difficulty weight"""
+        difficult_plant = Plant.objects.create(
+            name='Test Orchid',
+            scientific_name='Orchis testus',
+            category='flower',
+            rarity='common',
+            native_region='Western Cape',
+            care_difficulty='difficult',
+            sunlight_requirements='partial_sun',
+            water_requirements='moderate',
+            svg_image_url='plants/orchid.svg',
+            icon_color='#9B59B6'
+        )
+        clear_plant_registry()
+        
+        # The easy plant covers [0, 3) of the cumulative weights and the difficult one [3, 4)
+        with patch('digital_garden.registry.random.random', return_value=0.7):
+            self.assertEqual(pick_random_plant('common'), self.common_plant)
+        with patch('digital_garden.registry.random.random', return_value=0.8):
+            self.assertEqual(pick_random_plant('common'), difficult_plant)
+    
+    def test_order_completion_cost_does_not_grow_with_history(self):
+        """Test order completion makes the same queries however many orders came before"""
+        business = self.create_provider(1)
+        CustomerStats.objects.create(
+            customer=self.customer_user,
+            total_orders=5,
+            total_order_amount=Decimal('50.00'),
+            unique_businesses_ordered_from=1,
+            achieved_milestones={'order_count': [5]}
+        )
+        # Create the garden and the inventory row outside the measurement
+        self.garden_service.process_order_completion(self.create_completed_order(business, Decimal('10.00')))
+        
+        order = self.create_completed_order(business, Decimal('10.00'))
+        with CaptureQueriesContext(connection) as few_orders:
+            self.garden_service.process_order_completion(order)
+        
+        for _ in range(10):
+            self.create_completed_order(business, Decimal('10.00'))
+        CustomerStats.objects.filter(customer=self.customer_user).update(
+            total_orders=17, achieved_milestones={'order_count': [5, 10, 15]}
+        )
+        order = self.create_completed_order(business, Decimal('10.00'))
+        with CaptureQueriesContext(connection) as many_orders:
+            self.garden_service.process_order_completion(order)
+        
+        self.assertEqual(len(few_orders), len(many_orders))
+
+
 class TestPlantRewardService(DigitalGardenTestCase):
     
     def setUp(self):
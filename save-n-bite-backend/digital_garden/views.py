@@ -327,7 +327,7 @@ class CustomerStatsView(APIView):
             )
         
         service = DigitalGardenService()
-        stats = service.update_customer_stats(customer)
+        stats = service.get_customer_stats(customer)
         
         serializer = CustomerStatsSerializer(stats)
         return Response(serializer.data)
@@ -414,19 +414,21 @@ def simulate_order_completion(request):
         
         order = Order.objects.create(
             interaction=interaction,
-            status='completed',
+            status='ready',
             pickup_window='12:00-13:00',
             pickup_code='TEST123'
         )
         
-        # Process the order completion
-        service = DigitalGardenService()
-        result = service.process_order_completion(order)
+        # Complete it like a real order, the completion receivers award the plants
+        order.status = 'completed'
+        order.save()
+        
+        stats = CustomerStats.objects.filter(customer=customer).first()
         
         return Response({
             'message': 'Order completion simulated',
             'order_id': str(order.id),
-            'result': result
+            'stats': CustomerStatsSerializer(stats).data if stats else None
         })
     
     except Exception as e:
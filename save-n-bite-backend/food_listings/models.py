@@ -1,15 +1,18 @@
 # food_listings/models.py - Updated with Azure Blob Storage
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 import uuid
 from rest_framework.exceptions import ValidationError
 from django.utils import timezone
+from authentication.mixins import FieldTrackingMixin
 from blob_storage import get_food_listing_storage, food_listing_image_path
 
 User = get_user_model()
 
-class FoodListing(models.Model):
+class FoodListing(FieldTrackingMixin, models.Model):
     FOOD_TYPE_CHOICES = [
         ('ready_to_eat', 'Ready to Eat'),
         ('ingredients', 'Ingredients'),
@@ -25,6 +28,9 @@ class FoodListing(models.Model):
         ('flagged', 'Flagged'), 
     ]
     
+    # The provider's active listing count follows status transitions
+    TRACKED_FIELDS = ('status',)
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     
     # Basic Information
@@ -141,7 +147,20 @@ class FoodListing(models.Model):
         if self.quantity_available <= 0 and self.status == 'active':
             self.status = 'sold_out'
         
-        super().save(*args, **kwargs)
+        previous_status = self.stored_status()
+        active_delta = (self.status == 'active') - (previous_status == 'active')
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if active_delta:
+                from authentication.models import FoodProviderProfile
+                FoodProviderProfile.adjust_counters(active_listing_delta=active_delta, user_id=self.provider_id)
+    
+    def stored_status(self):
+        """Status as last loaded or saved, None for an unsaved listing"""
+        if self.is_tracked:
+            return self.get_previous('status')
+        return None if self._state.adding else self.status
 
     @property
     def is_expired(self):
@@ -241,4 +260,12 @@ class FoodListing(models.Model):
         """Get the number of images"""
         if isinstance(self.images, list):
             return len(self.images)
-        return 0
\ No newline at end of file
+        return 0
+
+
+@receiver(post_delete, sender=FoodListing)
+def food_listing_deleted(sender, instance, **kwargs):
+    """Keep the provider's active listing count in step with every delete, including bulk and cascade deletes"""
+    if instance.stored_status() == 'active':
+        from authentication.models import FoodProviderProfile
+        FoodProviderProfile.adjust_counters(active_listing_delta=-1, user_id=instance.provider_id)
@@ -290,6 +290,27 @@ class TestProviderViews:
         assert listing.name == data['name']
         assert listing.provider == provider_user
         
+    def test_get_listing_suggestions(self, authenticated_provider_client, provider_user):
+        """Test the suggestions endpoint serves demand forecast suggestions"""
+        from analytics.models import DemandForecast
+        DemandForecast.objects.create(
+            provider=None, food_type='ready_to_eat', alpha=0.3, daily_demand=12.0,
+            listings_per_day=2.0, suggested_quantity=6, suggested_discount_percent=35.0,
+            mae=1.5, baseline_mae=2.5, sample_days=90
+        )
+        url = reverse('food_listings:listing_suggestions')
+        
+        response = authenticated_provider_client.get(url, {'food_type': 'ready_to_eat'})
+        
+        assert response.status_code == status.HTTP_200_OK
+        suggestion = response.json()['suggestions']['ready_to_eat']
+        assert suggestion['suggestedQuantity'] == 6
+        assert suggestion['suggestedDiscountPercent'] == 35.0
+        assert suggestion['basedOn'] == 'category'
+        
+        response = authenticated_provider_client.get(url, {'food_type': 'invalid_type'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        
     def test_create_food_listing_validation_error(self, authenticated_provider_client):
         """Test create listing with invalid data"""
         url = reverse('food_listings:create_listing')
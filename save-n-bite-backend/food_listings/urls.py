@@ -17,6 +17,7 @@ urlpatterns = [
     
     # Customer browsing endpoints
     path('food-listings/', views.browse_food_listings, name='browse_listings'),
+    path('food-listings/suggestions/', views.get_listing_suggestions, name='listing_suggestions'),
     path('food-listings/<uuid:listing_id>/', views.get_food_listing_details, name='listing_details'),
     # Admin endpoints
     path('admin/listings/', admin_views.admin_get_all_listings, name='admin_get_all_listings'),
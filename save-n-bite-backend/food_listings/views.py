@@ -36,10 +36,7 @@ def get_provider_listings(request):
     
     # Add follower insights
     try:
-        from notifications.models import BusinessFollower
-        follower_count = BusinessFollower.objects.filter(
-            business=request.user.provider_profile
-        ).count()
+        follower_count = request.user.provider_profile.follower_count
     except:
         follower_count = 0
     
@@ -112,6 +109,40 @@ def create_food_listing(request):
     }, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_listing_suggestions(request):
+    """
+    Suggested quantity and discount for a new listing of each food type (or
+    of ?food_type=...) from the provider's demand forecast
+    """
+    if request.user.user_type != 'provider':
+        return Response({
+            'error': {
+                'code': 'FORBIDDEN',
+                'message': 'Only food providers can access this endpoint'
+            }
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    # Forecasting pulls in pandas and numpy, only load it for this request
+    from analytics.forecasting import get_suggestions
+    
+    food_type = request.query_params.get('food_type')
+    food_types = [choice for choice, _ in FoodListing.FOOD_TYPE_CHOICES]
+    if food_type and food_type not in food_types:
+        return Response({
+            'error': {
+                'code': 'VALIDATION_ERROR',
+                'message': 'Request validation failed',
+                'details': [{'field': 'food_type', 'message': f'"{food_type}" is not a valid choice.'}]
+            }
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'suggestions': get_suggestions(request.user, [food_type] if food_type else food_types)
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
 def update_food_listing(request, listing_id):
@@ -521,10 +552,7 @@ def get_food_listing_details(request, listing_id):
             listing_data['provider']['is_following'] = is_following
             
             # Add follower count
-            follower_count = BusinessFollower.objects.filter(
-                business=listing.provider.provider_profile
-            ).count()
-            listing_data['provider']['follower_count'] = follower_count
+            listing_data['provider']['follower_count'] = listing.provider.provider_profile.follower_count
         except:
             listing_data['provider']['is_following'] = False
             listing_data['provider']['follower_count'] = 0
@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from authentication.mixins import FieldTrackingMixin
 from authentication.models import FoodProviderProfile
 from food_listings.models import FoodListing
 from django.contrib.postgres.fields import ArrayField
@@ -195,7 +196,7 @@ class CartItem(models.Model):
     def __str__(self):
         return f"{self.quantity} x {self.food_listing.name} in cart"
     
-class Order(models.Model):
+class Order(FieldTrackingMixin, models.Model):
     class Status(models.TextChoices):
         PENDING = 'pending', 'Pending'
         CONFIRMED = 'confirmed', 'Confirmed'
@@ -203,6 +204,9 @@ class Order(models.Model):
         COMPLETED = 'completed', 'Completed'
         CANCELLED = 'cancelled', 'Cancelled'
     
+    # post_save receivers tell completions from re-saves by the stored status
+    TRACKED_FIELDS = ('status',)
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     interaction = models.OneToOneField(Interaction, on_delete=models.CASCADE, related_name='order',default=1)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
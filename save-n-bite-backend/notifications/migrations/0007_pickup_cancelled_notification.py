@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_pickup_reschedule_suggestions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('new_listing', 'New Listing'), ('listing_expiring', 'Listing Expiring'), ('business_update', 'Business Update'), ('system_announcement', 'System Announcement'), ('welcome', 'Welcome'), ('pickup_reminder', 'Pickup Reminder'), ('order_preparation', 'Order Preparation'), ('order_completion', 'Order Completion'), ('donation_request', 'Donation Request'), ('donation_response', 'Donation Response'), ('plant_earned', 'Plant Earned'), ('garden_milestone', 'Garden Milestone'), ('plant_collection_reward', 'Plant Collection Reward'), ('pickup_reschedule', 'Pickup Reschedule Suggestion'), ('pickup_cancelled', 'Pickup Cancelled')], max_length=40),
+        ),
+    ]
@@ -1,6 +1,8 @@
 # notifications/models.py
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from authentication.models import FoodProviderProfile
 import uuid
@@ -19,6 +21,7 @@ class NotificationPreferences(models.Model):
     new_listing_notifications = models.BooleanField(default=True)
     promotional_notifications = models.BooleanField(default=False)
     weekly_digest = models.BooleanField(default=True)
+    pickup_reschedule_suggestions = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -48,6 +51,18 @@ class BusinessFollower(models.Model):
     def __str__(self):
         return f"{self.user.email} follows {self.business.business_name}"
 
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new:
+                FoodProviderProfile.adjust_counters(follower_delta=1, pk=self.business_id)
+
+@receiver(post_delete, sender=BusinessFollower)
+def business_follower_deleted(sender, instance, **kwargs):
+    """Keep the follower counter in step with every delete, including bulk and cascade deletes"""
+    FoodProviderProfile.adjust_counters(follower_delta=-1, pk=instance.business_id)
+
 class Notification(models.Model):
     """In-app notifications"""
     NOTIFICATION_TYPES = [
@@ -64,6 +79,8 @@ class Notification(models.Model):
         ('plant_earned', 'Plant Earned'),
         ('garden_milestone', 'Garden Milestone'),
         ('plant_collection_reward', 'Plant Collection Reward'), 
+        ('pickup_reschedule', 'Pickup Reschedule Suggestion'),
+        ('pickup_cancelled', 'Pickup Cancelled'),
     ]
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -14,7 +14,8 @@ class NotificationPreferencesSerializer(serializers.ModelSerializer):
             'email_notifications', 
             'new_listing_notifications', 
             'promotional_notifications', 
-            'weekly_digest'
+            'weekly_digest',
+            'pickup_reschedule_suggestions'
         ]
 
 class BusinessFollowerSerializer(serializers.ModelSerializer):
@@ -5,6 +5,7 @@ from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
 from django.utils import timezone
+from django.db.models import Count, Q
 from django.contrib.auth import get_user_model
 from .models import Notification, EmailNotificationLog, BusinessFollower, NotificationPreferences
 from authentication.models import FoodProviderProfile
@@ -443,6 +444,7 @@ class NotificationService:
             )
             
             if created:
+                business_profile.refresh_from_db(fields=['follower_count'])
                 # Send notification to business about new follower
                 NotificationService.create_notification(
                     recipient=business_user,
@@ -455,7 +457,7 @@ class NotificationService:
                         'follower_id': str(user.UserID),
                         'follower_name': NotificationService._get_user_display_name(user),
                         'follower_type': user.user_type,
-                        'total_followers': business_profile.followers.count()
+                        'total_followers': business_profile.follower_count
                     }
                 )
                 
@@ -494,16 +496,17 @@ class NotificationService:
             ).delete()
             
             if deleted_count > 0:
+                business_profile.refresh_from_db(fields=['follower_count'])
                 # Optionally send notification to business about unfollowing
                 try:
                     NotificationService.create_notification(
                         recipient=business_user,
                         notification_type='business_update',
                         title="Follower Update",
-                        message=f"Someone unfollowed your business. Total followers: {business_profile.followers.count()}",
+                        message=f"Someone unfollowed your business. Total followers: {business_profile.follower_count}",
                         business=business_profile,
                         data={
-                            'total_followers': business_profile.followers.count(),
+                            'total_followers': business_profile.follower_count,
                             'action': 'unfollow'
                         }
                     )
@@ -535,20 +538,6 @@ class NotificationService:
                 business_profile = follow_relationship.business
                 business_user = business_profile.user
                 
-                # Get additional business stats
-                try:
-                    from food_listings.models import FoodListing
-                    active_listings_count = FoodListing.objects.filter(
-                        provider=business_user,
-                        status='active'
-                    ).count()
-                except ImportError:
-                    active_listings_count = 0
-                
-                follower_count = BusinessFollower.objects.filter(
-                    business=business_profile
-                ).count()
-                
                 business_data = {
                     'follow_id': follow_relationship.id,
                     'business_id': str(business_user.UserID),  # Fix: Use UserID
@@ -559,8 +548,8 @@ class NotificationService:
                     'logo': business_profile.logo.url if business_profile.logo else None,
                     'status': business_profile.status,
                     'followed_at': follow_relationship.created_at,
-                    'follower_count': follower_count,
-                    'active_listings_count': active_listings_count,
+                    'follower_count': business_profile.follower_count,
+                    'active_listings_count': business_profile.active_listing_count,
                 }
                 
                 following_data.append(business_data)
@@ -666,13 +655,9 @@ class NotificationService:
                 business=business_profile
             ).exists()
             
-            follower_count = BusinessFollower.objects.filter(
-                business=business_profile
-            ).count()
-            
             return {
                 'is_following': is_following,
-                'follower_count': follower_count,
+                'follower_count': business_profile.follower_count,
                 'business_name': business_profile.business_name,
                 'business_status': business_profile.status
             }
@@ -700,31 +685,18 @@ class NotificationService:
                 UserID__in=already_following  # Fix: Use UserID
             ).exclude(
                 UserID=user.UserID  # Fix: Use UserID - Don't recommend user's own business if they're a provider
-            ).select_related('provider_profile')[:limit]
+            ).select_related('provider_profile').annotate(
+                recent_listings_count=Count('food_listings', filter=Q(
+                    food_listings__status='active',
+                    food_listings__created_at__gte=timezone.now() - timezone.timedelta(days=7)
+                ))
+            )[:limit]
             
             recommendations = []
             for business_user in recommended_businesses:
                 business_profile = business_user.provider_profile
-                
-                # Get business stats
-                follower_count = BusinessFollower.objects.filter(
-                    business=business_profile
-                ).count()
-                
-                try:
-                    from food_listings.models import FoodListing
-                    active_listings_count = FoodListing.objects.filter(
-                        provider=business_user,
-                        status='active'
-                    ).count()
-                    recent_listings_count = FoodListing.objects.filter(
-                        provider=business_user,
-                        status='active',
-                        created_at__gte=timezone.now() - timezone.timedelta(days=7)
-                    ).count()
-                except ImportError:
-                    active_listings_count = 0
-                    recent_listings_count = 0
+                follower_count = business_profile.follower_count
+                recent_listings_count = business_user.recent_listings_count
                 
                 recommendation = {
                     'business_id': str(business_user.UserID),  # Fix: Use UserID
@@ -732,7 +704,7 @@ class NotificationService:
                     'business_address': business_profile.business_address,
                     'logo': business_profile.logo.url if business_profile.logo else None,
                     'follower_count': follower_count,
-                    'active_listings_count': active_listings_count,
+                    'active_listings_count': business_profile.active_listing_count,
                     'recent_listings_count': recent_listings_count,
                     'recommendation_score': follower_count + (recent_listings_count * 2)  # Simple scoring
                 }
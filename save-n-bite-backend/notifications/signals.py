@@ -1,6 +1,6 @@
 # notifications/signals.py - Fixed verification signals
 
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from authentication.models import NGOProfile, FoodProviderProfile
@@ -20,36 +20,13 @@ def send_welcome_notification(sender, instance, created, **kwargs):
         except Exception as e:
             logger.error(f"Failed to send welcome notification to {instance.email}: {str(e)}")
 
-# Store the previous status to detect changes
-_ngo_previous_status = {}
-_provider_previous_status = {}
-
-@receiver(pre_save, sender=NGOProfile)
-def store_ngo_previous_status(sender, instance, **kwargs):
-    """Store the previous status before saving"""
-    if instance.pk:
-        try:
-            old_instance = NGOProfile.objects.get(pk=instance.pk)
-            _ngo_previous_status[instance.pk] = old_instance.status
-        except NGOProfile.DoesNotExist:
-            _ngo_previous_status[instance.pk] = None
-
-@receiver(pre_save, sender=FoodProviderProfile)
-def store_provider_previous_status(sender, instance, **kwargs):
-    """Store the previous status before saving"""
-    if instance.pk:
-        try:
-            old_instance = FoodProviderProfile.objects.get(pk=instance.pk)
-            _provider_previous_status[instance.pk] = old_instance.status
-        except FoodProviderProfile.DoesNotExist:
-            _provider_previous_status[instance.pk] = None
-
 @receiver(post_save, sender=NGOProfile)
 def ngo_verification_status_changed(sender, instance, created, **kwargs):
     """Send notification when NGO verification status changes"""
     if not created:  # Only for updates, not new creations
         try:
-            previous_status = _ngo_previous_status.get(instance.pk)
+            # Profiles track the status loaded from the database, so no extra fetch is needed
+            previous_status = instance.get_previous('status')
             current_status = instance.status
             
             # Only send notification if status actually changed to verified or rejected
@@ -64,10 +41,6 @@ def ngo_verification_status_changed(sender, instance, created, **kwargs):
                 )
                 logger.info(f"Verification status notification sent to NGO {instance.organisation_name}: {current_status}")
                 
-            # Clean up the stored status
-            if instance.pk in _ngo_previous_status:
-                del _ngo_previous_status[instance.pk]
-                
         except Exception as e:
             logger.error(f"Failed to send verification notification to NGO {instance.organisation_name}: {str(e)}")
 
@@ -76,7 +49,8 @@ def provider_verification_status_changed(sender, instance, created, **kwargs):
     """Send notification when Food Provider verification status changes"""
     if not created:  # Only for updates, not new creations
         try:
-            previous_status = _provider_previous_status.get(instance.pk)
+            # Profiles track the status loaded from the database, so no extra fetch is needed
+            previous_status = instance.get_previous('status')
             current_status = instance.status
             
             # Only send notification if status actually changed to verified or rejected
@@ -91,10 +65,6 @@ def provider_verification_status_changed(sender, instance, created, **kwargs):
                 )
                 logger.info(f"Verification status notification sent to Provider {instance.business_name}: {current_status}")
                 
-            # Clean up the stored status
-            if instance.pk in _provider_previous_status:
-                del _provider_previous_status[instance.pk]
-                
         except Exception as e:
             logger.error(f"Failed to send verification notification to Provider {instance.business_name}: {str(e)}")
 
@@ -0,0 +1,11 @@
+# scheduling/apps.py
+
+from django.apps import AppConfig
+
+
+class SchedulingConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'scheduling'
+
+    def ready(self):
+        import scheduling.signals  # Pickup analytics and listing deletion receivers
@@ -0,0 +1,35 @@
+# scheduling/management/commands/mark_missed_pickups.py
+
+from django.core.management.base import BaseCommand
+from scheduling.services import PickupSchedulingService
+
+
+class Command(BaseCommand):
+    help = 'Mark overdue scheduled/confirmed pickups as missed and release their time slots'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-minutes',
+            type=int,
+            default=30,
+            help='Minutes after the end of a slot before a pickup counts as missed',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of pickups updated per batch',
+        )
+
+    def handle(self, *args, **options):
+        results = PickupSchedulingService.mark_missed_pickups(
+            grace_minutes=options['grace_minutes'],
+            batch_size=options['batch_size'],
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Marked {results["marked_missed"]} pickups as missed, '
+                f'updated analytics for {results["business_days_updated"]} business days'
+            )
+        )
@@ -0,0 +1,58 @@
+# scheduling/management/commands/rebuild_pickup_analytics.py
+
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from authentication.models import FoodProviderProfile
+from scheduling.services import PickupAnalyticsService
+
+
+class Command(BaseCommand):
+    help = 'Recompute PickupAnalytics for a date range for all businesses (or one business)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start-date',
+            type=str,
+            help='First date to rebuild (YYYY-MM-DD). Defaults to yesterday',
+        )
+        parser.add_argument(
+            '--end-date',
+            type=str,
+            help='Last date to rebuild (YYYY-MM-DD). Defaults to the start date',
+        )
+        parser.add_argument(
+            '--business-id',
+            type=str,
+            help='Only rebuild analytics for this FoodProviderProfile id',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options['start_date']:
+                start_date = datetime.strptime(options['start_date'], '%Y-%m-%d').date()
+            else:
+                start_date = timezone.now().date() - timedelta(days=1)
+
+            if options['end_date']:
+                end_date = datetime.strptime(options['end_date'], '%Y-%m-%d').date()
+            else:
+                end_date = start_date
+        except ValueError:
+            raise CommandError('Dates must be in YYYY-MM-DD format')
+
+        if end_date < start_date:
+            raise CommandError('--end-date must not be before --start-date')
+
+        business = None
+        if options['business_id']:
+            try:
+                business = FoodProviderProfile.objects.get(id=options['business_id'])
+            except (FoodProviderProfile.DoesNotExist, ValueError):
+                raise CommandError(f'Business not found: {options["business_id"]}')
+
+        rows = PickupAnalyticsService.rebuild_analytics(start_date, end_date, business=business)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {rows} pickup analytics rows for {start_date} to {end_date}')
+        )
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduling', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledpickup',
+            name='reschedule_suggested_slot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='scheduling.pickuptimeslot'),
+        ),
+    ]
@@ -4,6 +4,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from authentication.mixins import FieldTrackingMixin
 from authentication.models import FoodProviderProfile
 from interactions.models import Order
 from food_listings.models import FoodListing
@@ -207,7 +208,7 @@ class PickupTimeSlot(models.Model):
         return f"Slot {self.slot_number} for {self.pickup_schedule.food_listing.name} on {self.date} ({self.start_time}-{self.end_time})"
 
 
-class ScheduledPickup(models.Model):
+class ScheduledPickup(FieldTrackingMixin, models.Model):
     """Individual scheduled pickup appointments - updated to reference food listing"""
     STATUS_CHOICES = [
         ('scheduled', 'Scheduled'),
@@ -218,6 +219,9 @@ class ScheduledPickup(models.Model):
         ('cancelled', 'Cancelled'),
     ]
     
+    # Status transitions are read by the post_save receivers
+    TRACKED_FIELDS = ('status',)
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     order = models.OneToOneField(
         Order, 
@@ -257,6 +261,14 @@ class ScheduledPickup(models.Model):
     
     # Communication
     reminder_sent = models.BooleanField(default=False)
+    # Slot the customer was last asked to move to, so each suggestion is only sent once
+    reschedule_suggested_slot = models.ForeignKey(
+        PickupTimeSlot,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
     customer_notes = models.TextField(blank=True)
     business_notes = models.TextField(blank=True)
     
@@ -273,7 +285,7 @@ class ScheduledPickup(models.Model):
         # Ensure location matches the time slot's location
         if self.time_slot:
             self.location = self.time_slot.pickup_schedule.location
-            
+        
         super().save(*args, **kwargs)
 
     def generate_confirmation_code(self):
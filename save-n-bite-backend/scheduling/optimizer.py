@@ -0,0 +1,159 @@
+# scheduling/optimizer.py
+
+import numpy as np
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def _minute_of_day(value):
+    return value.hour * 60 + value.minute
+
+
+def _slot_bounds(slot):
+    start = _minute_of_day(slot['start_time'])
+    end = _minute_of_day(slot['end_time'])
+    if end <= start:
+        # Slot runs past midnight; clamp it to the end of the day
+        end = MINUTES_PER_DAY
+    return start, end
+
+
+def build_coverage_matrix(slots):
+    """Return the (slots x segments) coverage matrix and the segment lengths in minutes.
+
+    The day is cut at every slot start and end, so concurrency is constant
+    within a segment and only a couple of segments per slot need evaluating.
+    """
+    bounds = [_slot_bounds(slot) for slot in slots]
+    breakpoints = np.array(sorted({minute for pair in bounds for minute in pair}), dtype=np.int32)
+    if breakpoints.size < 2:
+        return np.zeros((len(slots), 0), dtype=np.int32), np.zeros(0, dtype=np.int32)
+
+    segment_starts = breakpoints[:-1]
+    starts = np.array([start for start, _ in bounds], dtype=np.int32)
+    ends = np.array([end for _, end in bounds], dtype=np.int32)
+    coverage = (
+        (starts[:, None] <= segment_starts[None, :]) & (segment_starts[None, :] < ends[:, None])
+    ).astype(np.int32)
+    return coverage, np.diff(breakpoints)
+
+
+def rebalance_slots(slots, pickups, max_moves=None):
+    """Greedily reassign pickups between sibling slots to minimize peak concurrency.
+
+    ``slots`` is a list of dicts with ``id``, ``group`` (slots in the same group
+    belong to the same pickup schedule, so pickups may only move between them),
+    ``start_time``, ``end_time``, ``capacity`` and ``is_active``. ``pickups`` is a
+    list of dicts with ``id``, ``slot_id``, an optional ``priority`` (lower
+    values are moved first) and an optional ``suggested_slot_id``: a pickup
+    already suggested the target slot is moved before any other, so repeated
+    runs propose the same moves.
+
+    Concurrency at a given minute is the number of pickups whose slot covers it.
+    Each step evaluates every move of one pickup off a peak slot in a single
+    vectorized pass and applies the one giving the lowest (peak, minutes at
+    peak), stopping when no move improves the schedule.
+
+    Returns ``(assignment, load_before, load_after)`` where ``assignment`` maps
+    pickup id to its proposed slot id and the loads are per-segment arrays
+    (see ``build_coverage_matrix``).
+    """
+    slot_index = {slot['id']: index for index, slot in enumerate(slots)}
+    coverage, segment_lengths = build_coverage_matrix(slots)
+    capacity = np.array([slot['capacity'] for slot in slots], dtype=np.int64)
+    active = np.array([bool(slot.get('is_active', True)) for slot in slots])
+    groups = np.array([slot['group'] for slot in slots], dtype=object)
+
+    # Pickups per slot, kept ordered so the preferred pickup is moved first
+    members = [[] for _ in slots]
+    for pickup in sorted(pickups, key=lambda item: item.get('priority', 0)):
+        members[slot_index[pickup['slot_id']]].append(pickup['id'])
+
+    suggested = {pickup['id']: pickup.get('suggested_slot_id') for pickup in pickups}
+
+    bookings = np.array([len(slot_members) for slot_members in members], dtype=np.int64)
+    load = bookings @ coverage
+    load_before = load.copy()
+    assignment = {pickup['id']: pickup['slot_id'] for pickup in pickups}
+
+    if max_moves is None:
+        max_moves = len(pickups)
+
+    for _ in range(max_moves):
+        if load.size == 0 or load.max() <= 1:
+            break
+        peak = load.max()
+        peak_width = int(segment_lengths[load == peak].sum())
+
+        # Source slots: booked slots covering a peak minute
+        sources = np.flatnonzero((bookings > 0) & (coverage[:, load == peak].any(axis=1)))
+
+        best = None
+        for source in sources:
+            targets = np.flatnonzero(
+                (groups == groups[source]) & active & (bookings < capacity)
+            )
+            targets = targets[targets != source]
+            if targets.size == 0:
+                continue
+
+            # Loads after moving one pickup from source to each target, all at once
+            candidate_loads = load - coverage[source] + coverage[targets]
+            candidate_peaks = candidate_loads.max(axis=1)
+            candidate_widths = (candidate_loads == candidate_peaks[:, None]) @ segment_lengths
+
+            order = np.lexsort((candidate_widths, candidate_peaks))
+            choice = order[0]
+            score = (int(candidate_peaks[choice]), int(candidate_widths[choice]))
+            if best is None or score < best[0]:
+                best = (score, source, targets[choice])
+
+        if best is None or best[0] >= (int(peak), peak_width):
+            break
+
+        _, source, target = best
+        target_id = slots[target]['id']
+        position = next(
+            (index for index, member in enumerate(members[source]) if suggested[member] == target_id), 0
+        )
+        pickup_id = members[source].pop(position)
+        members[target].append(pickup_id)
+        bookings[source] -= 1
+        bookings[target] += 1
+        load += coverage[target] - coverage[source]
+        assignment[pickup_id] = target_id
+
+    return assignment, load_before, load
+
+
+def assignment_load(slots, assignment):
+    """Per-segment concurrency (see ``build_coverage_matrix``) of pickups assigned to slots by id"""
+    coverage, _ = build_coverage_matrix(slots)
+    slot_index = {slot['id']: index for index, slot in enumerate(slots)}
+    bookings = np.zeros(len(slots), dtype=np.int64)
+    for slot_id in assignment.values():
+        bookings[slot_index[slot_id]] += 1
+    return bookings @ coverage
+
+
+def plan_capacity(slots, load, assignment, max_concurrent):
+    """Suggest per-slot capacities that keep future bookings within ``max_concurrent``"""
+    coverage, _ = build_coverage_matrix(slots)
+    bookings = {slot['id']: 0 for slot in slots}
+    for slot_id in assignment.values():
+        bookings[slot_id] += 1
+
+    plan = []
+    for index, slot in enumerate(slots):
+        covered = coverage[index].astype(bool)
+        slot_peak = int(load[covered].max()) if covered.any() else 0
+        headroom = max_concurrent - slot_peak
+        booked = bookings[slot['id']]
+        plan.append({
+            'slot_id': slot['id'],
+            'bookings': booked,
+            'current_capacity': slot['capacity'],
+            'suggested_capacity': max(booked, booked + headroom),
+            'peak_concurrency': slot_peak,
+        })
+    return plan
@@ -1,23 +1,33 @@
 # scheduling/services.py
 
 import qrcode
+import hashlib
 from io import BytesIO
-import base64
 from datetime import datetime, timedelta, time, date
 from django.utils import timezone
-from django.db.models import Count, Q, Avg, F
+from django.core.cache import cache
+from django.urls import reverse
+from django.db.models import Count, Q, Avg, F, Value, Case, When, IntegerField
+from django.db.models.functions import Greatest
 from django.core.exceptions import ValidationError
+from django.utils.crypto import constant_time_compare, salted_hmac
 from django.db import transaction
 from .models import (
     PickupLocation, FoodListingPickupSchedule, PickupTimeSlot, 
     ScheduledPickup, PickupOptimization, PickupAnalytics
 )
+from .optimizer import assignment_load, rebalance_slots, plan_capacity
 from food_listings.models import FoodListing
 from interactions.models import Order
+from notifications.models import Notification, NotificationPreferences
+from collections import Counter
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Rendered QR PNGs are keyed by a hash of their payload, so entries never go stale
+QR_CODE_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
 class PickupSchedulingService:
     """Core service for handling food-listing-based pickup scheduling logic"""
 
@@ -193,12 +203,13 @@ class PickupSchedulingService:
                 time_slot.current_bookings += 1
                 time_slot.save()
                 
-                # Generate QR code
-                qr_code_image = PickupSchedulingService.generate_qr_code(scheduled_pickup)
+                # Render the QR image once the pickup is stored, so the image endpoint only reads the cache
+                transaction.on_commit(lambda: PickupSchedulingService.prerender_qr_code(scheduled_pickup))
+                qr_code_url = PickupSchedulingService.get_qr_code_url(scheduled_pickup)
                 
                 logger.info(f"Scheduled pickup {scheduled_pickup.confirmation_code} for order {order.id}")
                 
-                return scheduled_pickup, qr_code_image
+                return scheduled_pickup, qr_code_url
                 
         except PickupTimeSlot.DoesNotExist:
             raise ValidationError("Time slot not found or inactive")
@@ -209,34 +220,66 @@ class PickupSchedulingService:
             raise ValidationError(f"Failed to schedule pickup: {str(e)}")
 
     @staticmethod
-    def generate_qr_code(scheduled_pickup):
-        """Generate QR code for pickup verification"""
+    def get_qr_code_key(scheduled_pickup):
+        """Content hash of the QR payload, used as the cache key and ETag"""
+        return hashlib.sha256(str(scheduled_pickup.qr_code_data).encode()).hexdigest()
+
+    @staticmethod
+    def get_qr_code_token(scheduled_pickup):
+        """Signature of the QR payload that authorizes fetching its image without credentials"""
+        return salted_hmac(
+            'scheduling.pickup_qr_code', str(scheduled_pickup.qr_code_data), algorithm='sha256'
+        ).hexdigest()
+
+    @staticmethod
+    def get_qr_code_url(scheduled_pickup):
+        """
+        Signed URL of the pickup's QR code image. It needs no Authorization
+        header, so it can be used directly as an image source.
+        """
+        return reverse('scheduling:pickup_qr_code', kwargs={
+            'pickup_id': scheduled_pickup.id,
+            'token': PickupSchedulingService.get_qr_code_token(scheduled_pickup),
+        })
+
+    @staticmethod
+    def check_qr_code_token(scheduled_pickup, token):
+        """Whether ``token`` is the signature issued for the pickup's QR code URL"""
+        return constant_time_compare(token, PickupSchedulingService.get_qr_code_token(scheduled_pickup))
+
+    @staticmethod
+    def render_qr_code_png(scheduled_pickup):
+        """Return the pickup's QR code as PNG bytes, rendering it once per payload"""
+        cache_key = f"pickup_qr_png:{PickupSchedulingService.get_qr_code_key(scheduled_pickup)}"
+        png = cache.get(cache_key)
+        if png is not None:
+            return png
+
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=qrcode.constants.ERROR_CORRECT_L,
+            box_size=10,
+            border=4,
+        )
+        qr.add_data(str(scheduled_pickup.qr_code_data))
+        qr.make(fit=True)
+        
+        img = qr.make_image(fill_color="black", back_color="white")
+        buffer = BytesIO()
+        img.save(buffer, format='PNG')
+        png = buffer.getvalue()
+
+        cache.set(cache_key, png, QR_CODE_CACHE_TIMEOUT)
+        return png
+
+    @staticmethod
+    def prerender_qr_code(scheduled_pickup):
+        """Render the pickup's QR code into the cache ahead of its first fetch"""
         try:
-            qr_data = scheduled_pickup.qr_code_data
-            
-            # Create QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(str(qr_data))
-            qr.make(fit=True)
-            
-            # Create image
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            # Convert to base64
-            buffer = BytesIO()
-            img.save(buffer, format='PNG')
-            img_str = base64.b64encode(buffer.getvalue()).decode()
-            
-            return f"data:image/png;base64,{img_str}"
-            
+            PickupSchedulingService.render_qr_code_png(scheduled_pickup)
         except Exception as e:
-            logger.error(f"Error generating QR code: {str(e)}")
-            return None
+            # The image endpoint renders it on demand instead
+            logger.error(f"Error pre-rendering QR code: {str(e)}")
 
     @staticmethod
     def verify_pickup_code(confirmation_code, business):
@@ -285,15 +328,10 @@ class PickupSchedulingService:
         """Cancel a scheduled pickup"""
         try:
             with transaction.atomic():
-                # Update pickup status
+                # Update pickup status, the post_save receiver frees up the time slot
                 pickup.status = 'cancelled'
                 pickup.save()
                 
-                # Free up the time slot
-                time_slot = pickup.time_slot
-                time_slot.current_bookings = max(0, time_slot.current_bookings - 1)
-                time_slot.save()
-                
                 # Update order status
                 order = pickup.order
                 if cancelled_by_customer:
@@ -307,6 +345,137 @@ class PickupSchedulingService:
             logger.error(f"Error cancelling pickup: {str(e)}")
             raise ValidationError(f"Failed to cancel pickup: {str(e)}")
 
+    @staticmethod
+    def release_slot_bookings(slot_counts):
+        """Release bookings on time slots with a single aggregated UPDATE.
+
+        ``slot_counts`` maps a time slot id to the number of bookings to free.
+        """
+        slot_counts = {slot_id: count for slot_id, count in slot_counts.items() if count > 0}
+        if not slot_counts:
+            return 0
+
+        released = Case(
+            *[When(id=slot_id, then=Value(count)) for slot_id, count in slot_counts.items()],
+            default=Value(0),
+            output_field=IntegerField()
+        )
+        return PickupTimeSlot.objects.filter(id__in=slot_counts).update(
+            current_bookings=Greatest(F('current_bookings') - released, Value(0))
+        )
+
+    @staticmethod
+    def notify_listing_pickups_cancelled(food_listing):
+        """Record and announce the cancellation of a deleted listing's upcoming pickups.
+
+        Called before the listing is deleted: its pickups and time slots
+        cascade with it, so they are only read (one query), their analytics
+        counters moved to cancelled and the affected customers notified with
+        one insert. Returns the number of cancelled pickups.
+        """
+        pickups = list(
+            ScheduledPickup.objects.filter(
+                food_listing=food_listing,
+                scheduled_date__gte=timezone.now().date(),
+                status__in=['scheduled', 'confirmed']
+            ).values(
+                'id', 'status', 'location__business_id', 'scheduled_date',
+                'scheduled_start_time', 'confirmation_code', 'order__interaction__user_id'
+            )
+        )
+        if not pickups:
+            return 0
+
+        transitions = Counter(
+            (pickup['location__business_id'], pickup['scheduled_date'], pickup['status'])
+            for pickup in pickups
+        )
+        for (business_id, pickup_date, old_status), count in transitions.items():
+            PickupAnalyticsService.record_status_transition(
+                business_id, pickup_date, old_status=old_status, new_status='cancelled', count=count
+            )
+
+        try:
+            Notification.objects.bulk_create([
+                Notification(
+                    recipient_id=pickup['order__interaction__user_id'],
+                    business_id=pickup['location__business_id'],
+                    notification_type='pickup_cancelled',
+                    title="Pickup Cancelled",
+                    message=(
+                        f"Your pickup of '{food_listing.name}' on {pickup['scheduled_date'].strftime('%B %d, %Y')} "
+                        f"at {pickup['scheduled_start_time'].strftime('%H:%M')} was cancelled because the listing was removed."
+                    ),
+                    data={
+                        'pickup_id': str(pickup['id']),
+                        'confirmation_code': pickup['confirmation_code'],
+                        'food_listing_id': str(food_listing.id),
+                        'food_listing_name': food_listing.name,
+                    }
+                )
+                for pickup in pickups
+            ])
+        except Exception as e:
+            logger.error(f"Error notifying customers of cancelled pickups for {food_listing.id}: {str(e)}")
+
+        return len(pickups)
+
+    @staticmethod
+    def mark_missed_pickups(grace_minutes=30, batch_size=500, now=None):
+        """Mark every overdue scheduled/confirmed pickup as missed.
+
+        A pickup is overdue once ``grace_minutes`` have passed since the end of
+        its slot. Pickups are flagged with one UPDATE per batch, the freed slot
+        capacity is released per slot, and the PickupAnalytics counters of the
+        affected businesses and dates are incremented.
+        """
+        if now is None:
+            now = timezone.now()
+
+        cutoff = timezone.localtime(now - timedelta(minutes=grace_minutes))
+        overdue_filter = (
+            Q(scheduled_date__lt=cutoff.date()) |
+            Q(scheduled_date=cutoff.date(), scheduled_end_time__lt=cutoff.time())
+        )
+
+        total_marked = 0
+        affected_days = Counter()
+
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    ScheduledPickup.objects.select_for_update(skip_locked=True, of=('self',))
+                    .filter(overdue_filter, status__in=['scheduled', 'confirmed'])
+                    .values_list('id', 'time_slot_id', 'location__business_id', 'scheduled_date')[:batch_size]
+                )
+                if not batch:
+                    break
+
+                marked = ScheduledPickup.objects.filter(
+                    id__in=[row[0] for row in batch]
+                ).update(status='missed', updated_at=now)
+
+                PickupSchedulingService.release_slot_bookings(
+                    Counter(row[1] for row in batch)
+                )
+
+            affected_days.update((row[2], row[3]) for row in batch)
+            total_marked += marked
+
+            if len(batch) < batch_size:
+                break
+
+        for (business_id, pickup_date), count in affected_days.items():
+            PickupAnalyticsService.record_status_transition(
+                business_id, pickup_date, old_status='scheduled', new_status='missed', count=count
+            )
+
+        logger.info(f"Marked {total_marked} overdue pickups as missed across {len(affected_days)} business days")
+        return {
+            'marked_missed': total_marked,
+            'business_days_updated': len(affected_days),
+        }
+
     @staticmethod
     def get_business_schedule_overview(business, target_date=None):
         """Get schedule overview for a business"""
@@ -493,9 +662,18 @@ class PickupOptimizationService:
     """Service for optimizing pickup schedules"""
 
     @staticmethod
-    def optimize_schedule(business, target_date=None):
-        """Optimize pickup schedule for a business"""
+    def optimize_schedule(business, target_date=None, notify_customers=False):
+        """Rebalance a business's pickups for a date to minimize peak concurrency.
+
+        Pickups may only move between slots of their own food listing and only
+        into slots with spare capacity that are not over yet. Returns the
+        proposed moves, a per-slot capacity plan derived from
+        ``max_concurrent_pickups`` and the hourly peak summary. With
+        ``notify_customers`` the customers who opted in to reschedule
+        suggestions are told about their proposed move.
+        """
         try:
+            now = timezone.localtime()
             if target_date is None:
                 target_date = timezone.now().date()
             
@@ -508,20 +686,47 @@ class PickupOptimizationService:
                 }
             )
             
-            # Get scheduled pickups for the date
-            scheduled_pickups = ScheduledPickup.objects.filter(
-                location__business=business,
-                scheduled_date=target_date,
-                status__in=['scheduled', 'confirmed']
-            ).order_by('scheduled_start_time')
-            
-            # Analysis and optimization logic
+            # Evaluate each queryset exactly once
+            pickups = list(
+                ScheduledPickup.objects.filter(
+                    location__business=business,
+                    scheduled_date=target_date,
+                    status__in=['scheduled', 'confirmed']
+                ).values(
+                    'id', 'time_slot_id', 'confirmation_code', 'scheduled_start_time',
+                    'order__interaction__user_id', 'reschedule_suggested_slot_id'
+                ).order_by('id')
+            )
+            slots = list(
+                PickupTimeSlot.objects.filter(
+                    Q(pickup_schedule__location__business=business, date=target_date) |
+                    Q(id__in={pickup['time_slot_id'] for pickup in pickups})
+                ).values(
+                    'id', 'pickup_schedule_id', 'start_time', 'end_time',
+                    'max_orders_per_slot', 'is_active', 'pickup_schedule__food_listing__name'
+                ).order_by('start_time', 'id')
+            )
+
+            opted_in = set(
+                NotificationPreferences.objects.filter(
+                    user_id__in={pickup['order__interaction__user_id'] for pickup in pickups},
+                    pickup_reschedule_suggestions=True
+                ).values_list('user_id', flat=True)
+            )
+
             recommendations = PickupOptimizationService._analyze_schedule(
-                scheduled_pickups, optimization
+                pickups, slots, opted_in, optimization,
+                open_after=now.time() if target_date == now.date() else None
             )
             
+            if notify_customers and recommendations['proposed_moves']:
+                recommendations['notifications_sent'] = PickupOptimizationService._notify_proposed_moves(
+                    business, recommendations['proposed_moves']
+                )
+            
             optimization.last_optimization = timezone.now()
-            optimization.save()
+            optimization.optimization_score = recommendations['efficiency_score']
+            optimization.save(update_fields=['last_optimization', 'optimization_score', 'updated_at'])
             
             return recommendations
             
@@ -530,157 +735,332 @@ class PickupOptimizationService:
             return None
 
     @staticmethod
-    def _analyze_schedule(pickups, optimization):
-        """Analyze pickup schedule and provide recommendations"""
-        try:
-            recommendations = {
-                'total_pickups': pickups.count(),
-                'peak_hours': [],
-                'suggestions': [],
-                'efficiency_score': 0.0
-            }
-            
-            if not pickups.exists():
-                return recommendations
-            
-            # Group pickups by hour to find peak times
-            pickups_by_hour = {}
-            for pickup in pickups:
-                hour = pickup.scheduled_start_time.hour
-                pickups_by_hour[hour] = pickups_by_hour.get(hour, 0) + 1
-            
-            # Find peak hours (more than max_concurrent_pickups)
-            for hour, count in pickups_by_hour.items():
-                if count > optimization.max_concurrent_pickups:
-                    recommendations['peak_hours'].append({
-                        'hour': hour,
-                        'pickup_count': count,
-                        'suggested_max': optimization.max_concurrent_pickups
-                    })
-                    recommendations['suggestions'].append(
-                        f"Consider spreading out pickups at {hour}:00 - currently {count} scheduled"
-                    )
-            
-            # Calculate efficiency score
-            total_slots = len(pickups_by_hour)
-            if total_slots > 0:
-                avg_pickups_per_slot = pickups.count() / total_slots
-                optimal_pickups_per_slot = optimization.max_concurrent_pickups * 0.8  # 80% utilization
-                efficiency = min(100, (avg_pickups_per_slot / optimal_pickups_per_slot) * 100)
-                recommendations['efficiency_score'] = round(efficiency, 2)
-            
+    def _analyze_schedule(pickups, slots, opted_in, optimization, open_after=None):
+        """
+        Compute the rebalancing plan for already-fetched pickups and slots.
+        Slots ending by ``open_after`` (a time of day) take no moves.
+        ``peak_concurrency_after`` assumes only the customers who opted in to
+        suggestions move, ``peak_concurrency_if_all_move`` that every
+        proposed move is made.
+        """
+        max_concurrent = optimization.max_concurrent_pickups
+        recommendations = {
+            'total_pickups': len(pickups),
+            'max_concurrent_pickups': max_concurrent,
+            'peak_concurrency_before': 0,
+            'peak_concurrency_after': 0,
+            'peak_concurrency_if_all_move': 0,
+            'peak_hours': [],
+            'proposed_moves': [],
+            'capacity_plan': [],
+            'suggestions': [],
+            'efficiency_score': 0.0,
+            'notifications_sent': 0
+        }
+        
+        if not pickups:
             return recommendations
-            
-        except Exception as e:
-            logger.error(f"Error analyzing schedule: {str(e)}")
-            return {'error': str(e)}
+
+        # Find peak hours (more than max_concurrent_pickups)
+        pickups_by_hour = Counter(pickup['scheduled_start_time'].hour for pickup in pickups)
+        for hour, count in sorted(pickups_by_hour.items()):
+            if count > max_concurrent:
+                recommendations['peak_hours'].append({
+                    'hour': hour,
+                    'pickup_count': count,
+                    'suggested_max': max_concurrent
+                })
+
+        slot_rows = [
+            {
+                'id': slot['id'],
+                'group': slot['pickup_schedule_id'],
+                'start_time': slot['start_time'],
+                'end_time': slot['end_time'],
+                'capacity': slot['max_orders_per_slot'],
+                # Slots running past midnight are never over
+                'is_active': slot['is_active'] and not (
+                    open_after is not None and slot['start_time'] < slot['end_time'] <= open_after
+                ),
+            }
+            for slot in slots
+        ]
+        pickup_rows = [
+            {
+                'id': pickup['id'],
+                'slot_id': pickup['time_slot_id'],
+                # Customers who opted in to suggestions are asked to move first
+                'priority': 0 if pickup['order__interaction__user_id'] in opted_in else 1,
+                # and those already told about a slot move there again
+                'suggested_slot_id': pickup['reschedule_suggested_slot_id'],
+            }
+            for pickup in pickups
+        ]
+
+        assignment, load_before, load_after = rebalance_slots(slot_rows, pickup_rows)
+        # Only customers who opted in are told about their move, the others stay put
+        expected_assignment = {
+            pickup['id']: (
+                assignment[pickup['id']] if pickup['order__interaction__user_id'] in opted_in
+                else pickup['time_slot_id']
+            )
+            for pickup in pickups
+        }
+        expected_load = assignment_load(slot_rows, expected_assignment)
+        recommendations['peak_concurrency_before'] = int(load_before.max())
+        recommendations['peak_concurrency_after'] = int(expected_load.max())
+        recommendations['peak_concurrency_if_all_move'] = int(load_after.max())
+
+        slots_by_id = {slot['id']: slot for slot in slots}
+        for pickup in pickups:
+            new_slot_id = assignment[pickup['id']]
+            if new_slot_id == pickup['time_slot_id']:
+                continue
+            old_slot = slots_by_id[pickup['time_slot_id']]
+            new_slot = slots_by_id[new_slot_id]
+            recommendations['proposed_moves'].append({
+                'pickup_id': str(pickup['id']),
+                'confirmation_code': pickup['confirmation_code'],
+                'customer_id': str(pickup['order__interaction__user_id']),
+                'customer_opted_in': pickup['order__interaction__user_id'] in opted_in,
+                'food_listing_name': old_slot['pickup_schedule__food_listing__name'],
+                'from_slot_id': str(old_slot['id']),
+                'from_time': f"{old_slot['start_time'].strftime('%H:%M')}-{old_slot['end_time'].strftime('%H:%M')}",
+                'to_slot_id': str(new_slot['id']),
+                'to_time': f"{new_slot['start_time'].strftime('%H:%M')}-{new_slot['end_time'].strftime('%H:%M')}",
+            })
+
+        for entry in plan_capacity(slot_rows, expected_load, expected_assignment, max_concurrent):
+            slot = slots_by_id[entry['slot_id']]
+            entry.update({
+                'slot_id': str(slot['id']),
+                'food_listing_name': slot['pickup_schedule__food_listing__name'],
+                'start_time': slot['start_time'].strftime('%H:%M'),
+                'end_time': slot['end_time'].strftime('%H:%M'),
+            })
+            recommendations['capacity_plan'].append(entry)
+
+        if recommendations['proposed_moves']:
+            opted_in_moves = sum(move['customer_opted_in'] for move in recommendations['proposed_moves'])
+            recommendations['suggestions'].append(
+                f"Moving {len(recommendations['proposed_moves'])} pickups lowers peak concurrency "
+                f"from {recommendations['peak_concurrency_before']} to {recommendations['peak_concurrency_if_all_move']}; "
+                f"the {opted_in_moves} suggested to customers who opted in lower it to "
+                f"{recommendations['peak_concurrency_after']}"
+            )
+        if recommendations['peak_concurrency_after'] > max_concurrent:
+            recommendations['suggestions'].append(
+                f"Peak concurrency stays above {max_concurrent}; lower slot capacities to the suggested values "
+                f"or add staff during peak windows"
+            )
+        for peak in recommendations['peak_hours']:
+            recommendations['suggestions'].append(
+                f"Consider spreading out pickups at {peak['hour']}:00 - currently {peak['pickup_count']} scheduled"
+            )
+        
+        # Calculate efficiency score
+        avg_pickups_per_hour = len(pickups) / len(pickups_by_hour)
+        optimal_pickups_per_hour = max_concurrent * 0.8  # 80% utilization
+        efficiency = min(100, (avg_pickups_per_hour / optimal_pickups_per_hour) * 100) if optimal_pickups_per_hour else 0.0
+        recommendations['efficiency_score'] = round(efficiency, 2)
+        
+        return recommendations
+
+    @staticmethod
+    def _notify_proposed_moves(business, proposed_moves):
+        """
+        Notify opted-in customers about their proposed pickup move in one
+        insert, skipping pickups already told about the same target slot
+        """
+        moves = {move['pickup_id']: move for move in proposed_moves if move['customer_opted_in']}
+        if not moves:
+            return 0
+
+        with transaction.atomic():
+            # Locking the pickups keeps concurrent requests from sending the same suggestion twice
+            suggested_slots = {
+                str(pickup_id): str(slot_id) if slot_id else None
+                for pickup_id, slot_id in ScheduledPickup.objects.select_for_update().filter(
+                    id__in=moves
+                ).values_list('id', 'reschedule_suggested_slot_id')
+            }
+            moves = [
+                move for pickup_id, move in moves.items()
+                if pickup_id in suggested_slots and suggested_slots[pickup_id] != move['to_slot_id']
+            ]
+
+            notifications = [
+                Notification(
+                    recipient_id=move['customer_id'],
+                    business=business,
+                    notification_type='pickup_reschedule',
+                    title="Quieter pickup time available",
+                    message=(
+                        f"{business.business_name} suggests moving your pickup for '{move['food_listing_name']}' "
+                        f"from {move['from_time']} to {move['to_time']} to avoid the rush."
+                    ),
+                    data={
+                        'pickup_id': move['pickup_id'],
+                        'confirmation_code': move['confirmation_code'],
+                        'from_slot_id': move['from_slot_id'],
+                        'to_slot_id': move['to_slot_id'],
+                        'to_time': move['to_time'],
+                    }
+                )
+                for move in moves
+            ]
+            Notification.objects.bulk_create(notifications)
+            ScheduledPickup.objects.bulk_update(
+                [
+                    ScheduledPickup(id=move['pickup_id'], reschedule_suggested_slot_id=move['to_slot_id'])
+                    for move in moves
+                ],
+                ['reschedule_suggested_slot']
+            )
+        return len(notifications)
 
 
 class PickupAnalyticsService:
     """Service for pickup analytics"""
 
+    # Pickup statuses that have their own PickupAnalytics counter
+    STATUS_COUNTER_FIELDS = {
+        'completed': 'total_completed',
+        'missed': 'total_missed',
+        'cancelled': 'total_cancelled',
+    }
+
     @staticmethod
-    def update_daily_analytics(business, target_date=None):
-        """Update daily analytics for a business"""
+    def record_status_transition(business_id, target_date, old_status=None, new_status=None, count=1):
+        """Apply a pickup status transition to the day's counters with F() expressions.
+
+        ``old_status`` is None for a newly created pickup, which also counts
+        towards ``total_scheduled``. Derived rates (on-time, utilization,
+        efficiency) are left to ``rebuild_analytics``.
+        """
+        counter_fields = PickupAnalyticsService.STATUS_COUNTER_FIELDS
+        deltas = Counter()
+
+        if old_status is None:
+            deltas['total_scheduled'] += count
+        elif old_status in counter_fields:
+            deltas[counter_fields[old_status]] -= count
+
+        if new_status in counter_fields:
+            deltas[counter_fields[new_status]] += count
+
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
         try:
-            if target_date is None:
-                target_date = timezone.now().date()
-            
-            # Get pickups for the date
-            pickups = ScheduledPickup.objects.filter(
-                location__business=business,
-                scheduled_date=target_date
-            )
-            
-            # Calculate metrics
-            total_scheduled = pickups.count()
-            total_completed = pickups.filter(status='completed').count()
-            total_missed = pickups.filter(status='missed').count()
-            total_cancelled = pickups.filter(status='cancelled').count()
-            
-            # Calculate on-time percentage
-            on_time_pickups = pickups.filter(
-                status='completed',
-                actual_pickup_time__lte=timezone.make_aware(
-                    datetime.combine(target_date, time(23, 59))
-                )
-            ).count()
-            
-            on_time_percentage = (on_time_pickups / total_scheduled * 100) if total_scheduled > 0 else 0
-            
-            # Update or create analytics record
-            analytics, created = PickupAnalytics.objects.update_or_create(
-                business=business,
-                date=target_date,
-                defaults={
-                    'total_scheduled': total_scheduled,
-                    'total_completed': total_completed,
-                    'total_missed': total_missed,
-                    'total_cancelled': total_cancelled,
-                    'on_time_percentage': round(on_time_percentage, 2),
-                    'slot_utilization_rate': PickupAnalyticsService._calculate_slot_utilization(business, target_date),
-                    'efficiency_score': PickupAnalyticsService._calculate_efficiency_score(business, target_date)
+            PickupAnalytics.objects.get_or_create(business_id=business_id, date=target_date)
+            PickupAnalytics.objects.filter(business_id=business_id, date=target_date).update(
+                updated_at=timezone.now(),
+                **{
+                    field: Greatest(F(field) + delta, Value(0))
+                    for field, delta in deltas.items()
                 }
             )
-            
-            logger.info(f"Updated analytics for {business.business_name} on {target_date}")
-            return analytics
-            
         except Exception as e:
-            logger.error(f"Error updating analytics: {str(e)}")
-            return None
+            logger.error(f"Error recording pickup status transition: {str(e)}")
 
     @staticmethod
-    def _calculate_slot_utilization(business, target_date):
-        """Calculate slot utilization rate"""
-        try:
-            # Get all time slots for the date
-            total_slots = PickupTimeSlot.objects.filter(
-                pickup_schedule__location__business=business,
-                date=target_date,
-                is_active=True
-            ).count()
-            
-            if total_slots == 0:
-                return 0.0
-            
-            # Get slots with bookings
-            utilized_slots = PickupTimeSlot.objects.filter(
-                pickup_schedule__location__business=business,
+    def rebuild_analytics(start_date, end_date=None, business=None):
+        """Recompute PickupAnalytics exactly for a date range with set-based queries.
+
+        Pickup counters and slot utilization are each aggregated with a single
+        GROUP BY over every business (or only ``business``), then written back
+        with one upsert. Returns the number of analytics rows written.
+        """
+        if end_date is None:
+            end_date = start_date
+
+        pickups = ScheduledPickup.objects.filter(scheduled_date__range=(start_date, end_date))
+        slots = PickupTimeSlot.objects.filter(date__range=(start_date, end_date), is_active=True)
+        existing = PickupAnalytics.objects.filter(date__range=(start_date, end_date))
+        if business is not None:
+            pickups = pickups.filter(location__business=business)
+            slots = slots.filter(pickup_schedule__location__business=business)
+            existing = existing.filter(business=business)
+
+        pickup_totals = {
+            (row['location__business_id'], row['scheduled_date']): row
+            for row in pickups.values('location__business_id', 'scheduled_date').annotate(
+                total_scheduled=Count('id'),
+                total_completed=Count('id', filter=Q(status='completed')),
+                total_missed=Count('id', filter=Q(status='missed')),
+                total_cancelled=Count('id', filter=Q(status='cancelled')),
+                on_time=Count('id', filter=Q(
+                    status='completed',
+                    actual_pickup_time__date__lte=F('scheduled_date')
+                )),
+            )
+        }
+        slot_totals = {
+            (row['pickup_schedule__location__business_id'], row['date']): row
+            for row in slots.values('pickup_schedule__location__business_id', 'date').annotate(
+                total_slots=Count('id'),
+                utilized_slots=Count('id', filter=Q(current_bookings__gt=0)),
+            )
+        }
+
+        keys = set(pickup_totals) | set(slot_totals) | set(existing.values_list('business_id', 'date'))
+        rows = []
+        for business_id, target_date in keys:
+            totals = pickup_totals.get((business_id, target_date), {})
+            slot_row = slot_totals.get((business_id, target_date), {})
+
+            total_scheduled = totals.get('total_scheduled', 0)
+            total_completed = totals.get('total_completed', 0)
+            total_slots = slot_row.get('total_slots', 0)
+
+            on_time_percentage = round(totals.get('on_time', 0) / total_scheduled * 100, 2) if total_scheduled else 0.0
+            slot_utilization_rate = round(slot_row.get('utilized_slots', 0) / total_slots * 100, 2) if total_slots else 0.0
+            completion_rate = (total_completed / max(1, total_scheduled)) * 100
+
+            rows.append(PickupAnalytics(
+                business_id=business_id,
                 date=target_date,
-                is_active=True,
-                current_bookings__gt=0
-            ).count()
-            
-            return round((utilized_slots / total_slots) * 100, 2)
-            
-        except Exception as e:
-            logger.error(f"Error calculating slot utilization: {str(e)}")
-            return 0.0
+                total_scheduled=total_scheduled,
+                total_completed=total_completed,
+                total_missed=totals.get('total_missed', 0),
+                total_cancelled=totals.get('total_cancelled', 0),
+                on_time_percentage=on_time_percentage,
+                slot_utilization_rate=slot_utilization_rate,
+                efficiency_score=round(
+                    (completion_rate * 0.4) + (on_time_percentage * 0.3) + (slot_utilization_rate * 0.3), 2
+                ),
+            ))
+
+        if rows:
+            PickupAnalytics.objects.bulk_create(
+                rows,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['business', 'date'],
+                update_fields=[
+                    'total_scheduled', 'total_completed', 'total_missed', 'total_cancelled',
+                    'on_time_percentage', 'slot_utilization_rate', 'efficiency_score', 'updated_at',
+                ],
+            )
+
+        logger.info(f"Rebuilt {len(rows)} pickup analytics rows for {start_date} to {end_date}")
+        return len(rows)
 
     @staticmethod
-    def _calculate_efficiency_score(business, target_date):
-        """Calculate overall efficiency score"""
+    def update_daily_analytics(business, target_date=None):
+        """Update daily analytics for a business"""
         try:
-            # This is a composite score based on various factors
-            analytics = PickupAnalytics.objects.filter(
-                business=business,
-                date=target_date
-            ).first()
-            
-            if not analytics:
-                return 0.0
-            
-            # Factors: completion rate, on-time rate, slot utilization
-            completion_rate = (analytics.total_completed / max(1, analytics.total_scheduled)) * 100
-            on_time_rate = analytics.on_time_percentage
-            utilization_rate = analytics.slot_utilization_rate
-            
-            # Weighted average
-            efficiency_score = (completion_rate * 0.4) + (on_time_rate * 0.3) + (utilization_rate * 0.3)
-            
-            return round(efficiency_score, 2)
-            
+            if target_date is None:
+                target_date = timezone.now().date()
+
+            PickupAnalyticsService.rebuild_analytics(target_date, business=business)
+            analytics = PickupAnalytics.objects.filter(business=business, date=target_date).first()
+
+            logger.info(f"Updated analytics for {business.business_name} on {target_date}")
+            return analytics
+
         except Exception as e:
-            logger.error(f"Error calculating efficiency score: {str(e)}")
-            return 0.0
\ No newline at end of file
+            logger.error(f"Error updating analytics: {str(e)}")
+            return None
@@ -1,6 +1,6 @@
 # scheduling/signals.py
 
-from django.db.models.signals import post_save, pre_save, post_delete
+from django.db.models.signals import post_save, pre_save, pre_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from datetime import timedelta
@@ -10,68 +10,33 @@ from .models import (
 )
 from food_listings.models import FoodListing
 from interactions.models import Order
-from .services import PickupAnalyticsService
+from .services import PickupAnalyticsService, PickupSchedulingService
 import logging
 
 logger = logging.getLogger(__name__)
 
-@receiver(post_save, sender=FoodListing)
-def food_listing_created(sender, instance, created, **kwargs):
-    """Create pickup schedule when food listing is created (if pickup_window is provided)"""
-    if created and instance.pickup_window:
-        try:
-            # Check if the business has any pickup locations
-            from .models import PickupLocation
-            
-            pickup_locations = PickupLocation.objects.filter(
-                business=instance.provider.provider_profile,
-                is_active=True
-            )
-            
-            if pickup_locations.exists():
-                # Use the first available location as default
-                # In production, this should be configurable by the business
-                default_location = pickup_locations.first()
-                
-                # Create pickup schedule automatically
-                FoodListingPickupSchedule.objects.create(
-                    food_listing=instance,
-                    location=default_location,
-                    pickup_window=instance.pickup_window,
-                    total_slots=4,  # Default value
-                    max_orders_per_slot=5,  # Default value
-                    slot_buffer_minutes=5  # Default value
-                )
-                
-                logger.info(f"Created pickup schedule for food listing {instance.name}")
-            else:
-                logger.warning(f"No pickup locations available for business {instance.provider.provider_profile.business_name}")
-                
-        except Exception as e:
-            logger.error(f"Error creating pickup schedule for food listing {instance.id}: {str(e)}")
-
-
 @receiver(post_save, sender=ScheduledPickup)
 def pickup_status_changed(sender, instance, created, **kwargs):
     """Handle pickup status changes and analytics updates"""
-    if not created:  # Only for updates
-        try:
-            # Update analytics when pickup is completed
-            if instance.status == 'completed' and instance.actual_pickup_time:
-                update_daily_analytics(instance)
-            
-            # Auto-mark missed pickups (this could be run as a periodic task)
-            elif instance.status in ['scheduled', 'confirmed']:
-                check_missed_pickup(instance)
-                
-            # Update time slot booking count when pickup is cancelled
-            elif instance.status == 'cancelled':
-                time_slot = instance.time_slot
-                time_slot.current_bookings = max(0, time_slot.current_bookings - 1)
-                time_slot.save()
-                
-        except Exception as e:
-            logger.error(f"Error in pickup status change handler: {str(e)}")
+    try:
+        previous_status = None if created else instance.get_previous('status')
+
+        # Keep the day's analytics counters in step with the transition
+        # (overdue pickups are marked missed by the periodic sweeper in scheduling.tasks)
+        if created or (previous_status and previous_status != instance.status):
+            PickupAnalyticsService.record_status_transition(
+                instance.location.business_id,
+                instance.scheduled_date,
+                old_status=previous_status,
+                new_status=instance.status
+            )
+
+        # Free the time slot booking when the pickup is cancelled
+        if not created and instance.status == 'cancelled' and previous_status != 'cancelled':
+            PickupSchedulingService.release_slot_bookings({instance.time_slot_id: 1})
+
+    except Exception as e:
+        logger.error(f"Error in pickup status change handler: {str(e)}")
 
 
 @receiver(post_save, sender=Order)
@@ -80,7 +45,7 @@ def order_created_notification(sender, instance, created, **kwargs):
     if created:
         try:
             # Get the business from the order
-            business = instance.interaction.food_listings.first().provider.provider_profile
+            business = instance.interaction.business
             
             # Check if business has auto-scheduling enabled
             optimization = getattr(business, 'pickup_optimization', None)
@@ -94,23 +59,12 @@ def order_created_notification(sender, instance, created, **kwargs):
             logger.error(f"Error in order creation handler: {str(e)}")
 
 
-@receiver(post_delete, sender=FoodListing)
+@receiver(pre_delete, sender=FoodListing)
 def food_listing_deleted(sender, instance, **kwargs):
-    """Clean up when food listing is deleted"""
+    """Announce the cancellation of future pickups before they are deleted with the listing"""
     try:
-        # Cancel any future scheduled pickups for this food listing
-        future_pickups = ScheduledPickup.objects.filter(
-            food_listing=instance,
-            scheduled_date__gte=timezone.now().date(),
-            status__in=['scheduled', 'confirmed']
-        )
-        
-        cancelled_count = 0
-        for pickup in future_pickups:
-            pickup.status = 'cancelled'
-            pickup.save()
-            cancelled_count += 1
-        
+        cancelled_count = PickupSchedulingService.notify_listing_pickups_cancelled(instance)
+
         if cancelled_count > 0:
             logger.info(f"Cancelled {cancelled_count} future pickups for deleted food listing {instance.name}")
             
@@ -124,7 +78,7 @@ def validate_pickup_before_save(sender, instance, **kwargs):
     try:
         # Ensure the food listing matches the time slot's food listing
         if instance.time_slot and instance.food_listing:
-            if instance.time_slot.pickup_schedule.food_listing != instance.food_listing:
+            if instance.time_slot.pickup_schedule.food_listing_id != instance.food_listing_id:
                 raise ValueError("Food listing must match the time slot's food listing")
         
         # Ensure location matches the pickup schedule location
@@ -136,45 +90,6 @@ def validate_pickup_before_save(sender, instance, **kwargs):
         raise
 
 
-def update_daily_analytics(pickup):
-    """Update daily analytics when pickup is completed"""
-    try:
-        business = pickup.location.business
-        pickup_date = pickup.scheduled_date
-        
-        # Update analytics using the service
-        PickupAnalyticsService.update_daily_analytics(business, pickup_date)
-        
-        logger.info(f"Updated analytics for {business.business_name} on {pickup_date}")
-        
-    except Exception as e:
-        logger.error(f"Error updating daily analytics: {str(e)}")
-
-
-def check_missed_pickup(pickup):
-    """Check if pickup should be marked as missed"""
-    try:
-        current_time = timezone.now()
-        scheduled_datetime = timezone.make_aware(
-            timezone.datetime.combine(pickup.scheduled_date, pickup.scheduled_end_time)
-        )
-        
-        # If current time is more than 30 minutes past scheduled end time, mark as missed
-        if current_time > scheduled_datetime + timedelta(minutes=30):
-            pickup.status = 'missed'
-            pickup.save()
-            
-            # Free up the time slot
-            time_slot = pickup.time_slot
-            time_slot.current_bookings = max(0, time_slot.current_bookings - 1)
-            time_slot.save()
-            
-            logger.info(f"Marked pickup {pickup.confirmation_code} as missed")
-            
-    except Exception as e:
-        logger.error(f"Error checking missed pickup: {str(e)}")
-
-
 # New signals for the updated models
 
 @receiver(post_save, sender=FoodListingPickupSchedule)
@@ -216,30 +131,3 @@ def time_slot_created(sender, instance, created, **kwargs):
         except Exception as e:
             logger.error(f"Error in time slot creation handler: {str(e)}")
 
-
-# Signal to auto-generate time slots when needed
-@receiver(post_save, sender=Order)
-def check_time_slots_availability(sender, instance, created, **kwargs):
-    """Check if time slots need to be generated for the order's food listings"""
-    if created:
-        try:
-            # Get all food listings in this order
-            food_listings = []
-            for item in instance.items.all():
-                if hasattr(item, 'food_listing'):
-                    food_listings.append(item.food_listing)
-            
-            # Generate time slots for the next few days if they don't exist
-            from .services import PickupSchedulingService
-            
-            for food_listing in food_listings:
-                if hasattr(food_listing, 'pickup_schedule'):
-                    for days_ahead in range(0, 3):  # Today, tomorrow, day after
-                        target_date = timezone.now().date() + timedelta(days=days_ahead)
-                        try:
-                            PickupSchedulingService.generate_time_slots_for_date(food_listing, target_date)
-                        except Exception as e:
-                            logger.error(f"Error generating time slots for {food_listing.name} on {target_date}: {str(e)}")
-                            
-        except Exception as e:
-            logger.error(f"Error checking time slots availability: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,15 @@
+from celery import shared_task
+from datetime import timedelta
+from django.utils import timezone
+from .services import PickupSchedulingService, PickupAnalyticsService
+
+@shared_task
+def mark_missed_pickups():
+    """Mark overdue pickups as missed and release their slot capacity"""
+    return PickupSchedulingService.mark_missed_pickups()
+
+@shared_task
+def reconcile_pickup_analytics():
+    """Nightly rebuild of yesterday's and today's PickupAnalytics from source rows"""
+    today = timezone.now().date()
+    return PickupAnalyticsService.rebuild_analytics(today - timedelta(days=1), today)
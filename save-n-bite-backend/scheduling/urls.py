@@ -29,6 +29,7 @@ urlpatterns = [
     path('my-pickups/', views.customer_pickups, name='customer_pickups'),
     path('pickups/<uuid:pickup_id>/', views.pickup_details, name='pickup_details'),
     path('pickups/<uuid:pickup_id>/cancel/', views.cancel_pickup, name='cancel_pickup'),
+    path('pickups/<uuid:pickup_id>/qr-code/<str:token>/', views.pickup_qr_code, name='pickup_qr_code'),
     
     # =============== ANALYTICS AND OPTIMIZATION ===============
     
@@ -7,6 +7,8 @@ from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
 from django.db.models import Q, Count
 from django.utils import timezone
 from datetime import datetime, timedelta, date
@@ -609,7 +611,7 @@ def schedule_pickup(request):
                 interaction__user=request.user
             )
             
-            scheduled_pickup, qr_code = PickupSchedulingService.schedule_pickup(
+            scheduled_pickup, qr_code_url = PickupSchedulingService.schedule_pickup(
                 order, serializer.validated_data
             )
             
@@ -634,7 +636,7 @@ def schedule_pickup(request):
                     'location_name': scheduled_pickup.location.name,
                     'customer_notes': scheduled_pickup.customer_notes
                 },
-                'qr_code': qr_code
+                'qr_code_url': request.build_absolute_uri(qr_code_url)
             }, status=status.HTTP_201_CREATED)
             
         except Order.DoesNotExist:
@@ -779,6 +781,7 @@ def customer_pickups(request):
             'scheduled_end_time': pickup.scheduled_end_time,
             'status': pickup.status,
             'confirmation_code': pickup.confirmation_code,
+            'qr_code_url': request.build_absolute_uri(PickupSchedulingService.get_qr_code_url(pickup)),
             'food_listing': {
                 'id': str(pickup.food_listing.id),
                 'name': pickup.food_listing.name,
@@ -864,6 +867,7 @@ def pickup_details(request, pickup_id):
             'actual_pickup_time': pickup.actual_pickup_time,
             'status': pickup.status,
             'confirmation_code': pickup.confirmation_code,
+            'qr_code_url': request.build_absolute_uri(PickupSchedulingService.get_qr_code_url(pickup)),
             'customer': {
                 'id': str(user.id),
                 'full_name': customer_profile.full_name if customer_profile else '',
@@ -891,6 +895,37 @@ def pickup_details(request, pickup_id):
         }, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def pickup_qr_code(request, pickup_id, token):
+    """
+    Serve the pickup's QR code PNG with long-lived cache headers. The signed
+    URL is only handed to the pickup's customer and provider, so image tags
+    can load it without an Authorization header.
+    """
+    pickup = ScheduledPickup.objects.filter(id=pickup_id).only('id', 'qr_code_data').first()
+    if pickup is None or not PickupSchedulingService.check_qr_code_token(pickup, token):
+        return Response({
+            'error': {
+                'code': 'NOT_FOUND',
+                'message': 'Pickup not found'
+            }
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    # The QR payload never changes for a pickup, so clients can keep the image indefinitely
+    etag = f'"{PickupSchedulingService.get_qr_code_key(pickup)}"'
+    if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(
+            PickupSchedulingService.render_qr_code_png(pickup),
+            content_type='image/png'
+        )
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=60 * 60 * 24 * 365, immutable=True)
+    return response
+
+
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def cancel_pickup(request, pickup_id):
@@ -982,10 +1017,10 @@ def business_analytics(request):
     }, status=status.HTTP_200_OK)
 
 
-@api_view(['GET'])
+@api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def optimization_recommendations(request):
-    """Get optimization recommendations for business"""
+    """Get optimization recommendations for business (POST also notifies opted-in customers)"""
     if request.user.user_type != 'provider':
         return Response({
             'error': {
@@ -995,7 +1030,7 @@ def optimization_recommendations(request):
         }, status=status.HTTP_403_FORBIDDEN)
 
     business = request.user.provider_profile
-    target_date = request.query_params.get('date')
+    target_date = request.query_params.get('date') or request.data.get('date')
     
     if target_date:
         try:
@@ -1011,7 +1046,9 @@ def optimization_recommendations(request):
         target_date = timezone.now().date()
     
     try:
-        recommendations = PickupOptimizationService.optimize_schedule(business, target_date)
+        recommendations = PickupOptimizationService.optimize_schedule(
+            business, target_date, notify_customers=request.method == 'POST'
+        )
         
         return Response({
             'recommendations': recommendations,
@@ -39,7 +39,8 @@ const PickupDetailsModal = ({ order, isOpen, onClose, onStatusUpdate }) => {
 
   const isDonation = order.interaction_type === 'Donation';
   const codeToShow = isDonation ? order.verification_code : order.confirmation_code;
-  const qrCodeUrl = `https://api.qrserver.com/v1/create-qr-code/?size=160x160&data=${codeToShow}`;
+  // Pickups carry a signed backend URL that loads without credentials
+  const qrCodeUrl = order.qr_code_url || `https://api.qrserver.com/v1/create-qr-code/?size=160x160&data=${codeToShow}`;
   const itemName = isDonation ? order.items?.[0]?.name : order.food_listing?.name;
   const providerName = isDonation ? (order.order?.providerName || 'Provider') : order.business?.business_name;
 
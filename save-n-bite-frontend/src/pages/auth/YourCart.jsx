@@ -869,7 +869,7 @@ const YourCart = () => {
             scheduledPickups.push({
               order: order,
               pickup: scheduleResponse.data.pickup,
-              qrCode: scheduleResponse.data.qr_code,
+              qrCode: scheduleResponse.data.qr_code_url,
               cartItem: cartItem,
               timeSlot: timeSlot
             });